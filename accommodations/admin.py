@@ -4,9 +4,10 @@ from .models import Accommodation, Amenity, City
 
 @admin.register(Accommodation)
 class AccommodationAdmin(admin.ModelAdmin):
-    list_display = ("name", "region", "city")
+    list_display = ("name", "region", "city", "wishlist_count")
     list_filter = ("region", "type")
     search_fields = ("name", "city")
+    readonly_fields = ("wishlist_count",)
 
 
 @admin.register(Amenity)
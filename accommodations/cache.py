@@ -0,0 +1,64 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+DETAIL_KEY = "accommodations:detail:{pk}"
+LIST_KEY = "accommodations:list:{generation}:{region}:{params}"
+LIST_GENERATION_KEY = "accommodations:list-generation"
+HITS_KEY = "accommodations:stats:hits"
+MISSES_KEY = "accommodations:stats:misses"
+
+
+def get_cache():
+    """Return the cache backend configured through ACCOMMODATION_CACHE_ALIAS"""
+    return caches[settings.ACCOMMODATION_CACHE_ALIAS]
+
+
+def _increment(key):
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+
+
+def _get_or_build(key, builder):
+    """Read-through lookup: return the cached payload or build, store and return it"""
+    cache = get_cache()
+    payload = cache.get(key)
+    if payload is not None:
+        _increment(HITS_KEY)
+        return payload
+
+    _increment(MISSES_KEY)
+    payload = builder()
+    cache.set(key, payload, timeout=settings.ACCOMMODATION_CACHE_TIMEOUT)
+    return payload
+
+
+def cached_detail(pk, builder):
+    """Serialized accommodation detail, built by `builder` on a miss"""
+    return _get_or_build(DETAIL_KEY.format(pk=pk), builder)
+
+
+def cached_list(region, url, builder):
+    """Serialized listing page for a region, keyed by the full request url so every cursor gets its own entry"""
+    generation = get_cache().get_or_set(LIST_GENERATION_KEY, 1, timeout=None)
+    params = hashlib.md5(url.encode()).hexdigest()
+    return _get_or_build(LIST_KEY.format(generation=generation, region=region, params=params), builder)
+
+
+def invalidate_details(accommodation_ids):
+    get_cache().delete_many([DETAIL_KEY.format(pk=pk) for pk in accommodation_ids])
+
+
+def invalidate_lists():
+    """Retire every cached listing page at once by moving to a new list generation"""
+    _increment(LIST_GENERATION_KEY)
+
+
+def get_cache_stats():
+    cache = get_cache()
+    return {"hits": cache.get(HITS_KEY, 0), "misses": cache.get(MISSES_KEY, 0)}
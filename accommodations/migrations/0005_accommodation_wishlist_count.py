@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0004_alter_city_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accommodation',
+            name='wishlist_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of wishlists saving this accommodation'),
+        ),
+        migrations.AddIndex(
+            model_name='accommodation',
+            index=models.Index(fields=['-wishlist_count', '-id'], name='accommodation_popularity_idx'),
+        ),
+    ]
@@ -33,6 +33,11 @@ class Accommodation(models.Model):
     cancellation_policy = models.TextField(null=True, blank=True)
     info = models.TextField(null=True, blank=True)
     amenities = models.ManyToManyField("accommodations.Amenity", related_name="accomodations", null=True, blank=True)
+    # Maintained by wishlists.signals, reconciled by the reconcile_wishlist_counters command
+    wishlist_count = models.PositiveIntegerField(default=0, help_text="Number of wishlists saving this accommodation")
+
+    class Meta:
+        indexes = [models.Index(fields=["-wishlist_count", "-id"], name="accommodation_popularity_idx")]
 
     def __str__(self):
         return self.name
@@ -1,4 +1,4 @@
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import ModelSerializer, SerializerMethodField
 from .models import Accommodation, City, Amenity, AccommodationType
 from room_types.models import RoomType
 from packages.serializers import PackageSerializer
@@ -27,7 +27,21 @@ class AccommodationListSerializer(ModelSerializer):
 
     class Meta:
         model = Accommodation
-        fields = ["name", "type", "location", "city", "description"]
+        fields = ["id", "name", "type", "location", "city", "description", "wishlist_count"]
+
+
+class AccommodationSearchSerializer(ModelSerializer):
+    """Serializer for search results with the cheapest bookable package of each accommodation"""
+
+    city = CitySerializer(read_only=True)
+    cheapest_package = SerializerMethodField()
+
+    class Meta:
+        model = Accommodation
+        fields = ["id", "name", "type", "location", "city", "cheapest_package"]
+
+    def get_cheapest_package(self, obj):
+        return self.context["cheapest"][obj.id]
 
 
 class AccommodationDetailSerializer(ModelSerializer):
@@ -39,6 +53,7 @@ class AccommodationDetailSerializer(ModelSerializer):
     class Meta:
         model = Accommodation
         fields = "__all__"
+        read_only_fields = ["wishlist_count"]
 
 
 class CreateAccommodationSerializer(ModelSerializer):
@@ -47,6 +62,7 @@ class CreateAccommodationSerializer(ModelSerializer):
     class Meta:
         model = Accommodation
         fields = "__all__"
+        read_only_fields = ["wishlist_count"]
 
     # def create(self, validated_data):
     #     # optioanl fields: put a default value if user does not sends
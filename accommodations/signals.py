@@ -0,0 +1,38 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import invalidate_details, invalidate_lists
+from .models import Accommodation, Amenity, City
+
+
+@receiver(post_save, sender=Accommodation)
+@receiver(post_delete, sender=Accommodation)
+def invalidate_accommodation(sender, instance, **kwargs):
+    invalidate_details([instance.pk])
+    invalidate_lists()
+
+
+@receiver(post_save, sender=Amenity)
+@receiver(pre_delete, sender=Amenity)
+def invalidate_amenity(sender, instance, **kwargs):
+    """Amenities only appear in the detail payload of the accommodations that have them"""
+    invalidate_details(instance.accomodations.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=City)
+@receiver(pre_delete, sender=City)
+def invalidate_city(sender, instance, **kwargs):
+    invalidate_details(instance.accommodations.values_list("id", flat=True))
+    invalidate_lists()
+
+
+@receiver(m2m_changed, sender=Accommodation.amenities.through)
+def invalidate_amenities_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        invalidate_details([instance.pk])
+    elif action == "pre_clear":
+        invalidate_details(instance.accomodations.values_list("id", flat=True))
+    else:
+        invalidate_details(pk_set)
@@ -1,16 +1,22 @@
 import pytest
 from rest_framework.test import APIClient
 from datetime import datetime, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from .models import Accommodation, City
+from .cache import get_cache, get_cache_stats
+from .models import Accommodation, Amenity, City
 from room_types.models import RoomType
-from packages.models import Package, PackageDailyAvailability, AvailabilityStatus
+from users.models import User
+from wishlists.models import Wishlist
+from packages.models import Package, PackageDailyAvailability, PackageWeekdayBasePrice, AvailabilityStatus, Weekday
 
 # ----- Constants -----
 BASE_URL = "/api/v1/accommodations/"
 DETAIL_URL = lambda pk: f"{BASE_URL}{pk}"
 ALL_PACKAGES_URL = lambda pk: f"{BASE_URL}{pk}/room-packages"
+SEARCH_URL = f"{BASE_URL}search"
 
 
 def build_available_packages_url(pk, check_in=None, check_out=None):
@@ -29,6 +35,13 @@ def client():
     return APIClient()
 
 
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    get_cache().clear()
+    yield
+    get_cache().clear()
+
+
 @pytest.fixture
 def sample_accommodations(db):
     today = timezone.now().date()
@@ -38,9 +51,11 @@ def sample_accommodations(db):
         name="Hotel A", region="seoul", location="123", city=city, type="hotel"
     )
     room_type = RoomType.objects.create(accommodation=accommodation, name="Deluxe", base_occupancy=2, max_occupancy=3)
-    package = Package.objects.create(room_type=room_type, name="Room Only", price=100000, is_active=True)
-    PackageDailyAvailability.objects.create(package=package, date=today, price=120000, status=AvailabilityStatus.OPEN)
-    inactive_package = Package.objects.create(room_type=room_type, name="Inactive", price=90000, is_active=False)
+    package = Package.objects.create(room_type=room_type, name="Room Only", base_price=100000, is_active=True)
+    PackageDailyAvailability.objects.create(
+        package=package, date=today, retail_price=120000, cost_price=100000, status=AvailabilityStatus.OPEN
+    )
+    inactive_package = Package.objects.create(room_type=room_type, name="Inactive", base_price=90000, is_active=False)
 
     return {
         "accommodation": accommodation,
@@ -69,7 +84,124 @@ def test_get_accommodation_list_with_region_success(client, sample_accommodation
     assert "seoul" in response.data["region"]
 
 
-# Failure: No matching region
+# Success 3: Cursor pagination walks every page without repeating rows
+@pytest.mark.django_db
+def test_get_accommodation_list_cursor_pagination(client, sample_accommodations):
+    city = City.objects.get(name="Seoul")
+    for index in range(4):
+        Accommodation.objects.create(name=f"Hotel {index}", region="seoul", location="123", city=city)
+
+    response = client.get(BASE_URL, {"page_size": 2})
+    ids = [item["id"] for item in response.data["data"]]
+    while response.data["next"]:
+        response = client.get(response.data["next"])
+        ids += [item["id"] for item in response.data["data"]]
+
+    assert response.status_code == 200
+    assert ids == sorted(Accommodation.objects.values_list("id", flat=True))
+
+
+# Success 4: City is loaded with the page instead of once per row
+@pytest.mark.django_db
+def test_get_accommodation_list_query_count(client, sample_accommodations, django_assert_num_queries):
+    city = City.objects.get(name="Seoul")
+    for index in range(10):
+        Accommodation.objects.create(name=f"Hotel {index}", region="seoul", location="123", city=city)
+
+    with django_assert_num_queries(1):
+        response = client.get(BASE_URL)
+
+    assert response.status_code == 200
+    assert response.data["data"][0]["city"]["name"] == "Seoul"
+
+
+# Success 5: Cached listing is refreshed when an accommodation is added
+@pytest.mark.django_db
+def test_get_accommodation_list_cache_invalidated(client, sample_accommodations, django_assert_num_queries):
+    client.get(BASE_URL, {"region": "seoul"})
+    with django_assert_num_queries(0):
+        client.get(BASE_URL, {"region": "seoul"})
+
+    Accommodation.objects.create(name="Hotel B", region="seoul", location="456")
+    response = client.get(BASE_URL, {"region": "seoul"})
+
+    assert len(response.data["data"]) == 2
+
+
+# Success 6: Most saved accommodations first, ties broken by newest id
+@pytest.mark.django_db
+def test_get_accommodation_list_popular(client, sample_accommodations):
+    city = City.objects.get(name="Seoul")
+    quiet = Accommodation.objects.create(name="Hotel B", region="seoul", location="456", city=city)
+    popular = Accommodation.objects.create(name="Hotel C", region="seoul", location="789", city=city)
+    Accommodation.objects.filter(pk=popular.pk).update(wishlist_count=5)
+    Accommodation.objects.filter(pk=sample_accommodations["accommodation"].pk).update(wishlist_count=2)
+
+    response = client.get(BASE_URL, {"ordering": "popular"})
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.data["data"]] == [
+        popular.pk,
+        sample_accommodations["accommodation"].pk,
+        quiet.pk,
+    ]
+    assert response.data["data"][0]["wishlist_count"] == 5
+
+
+# Success 7: Popular pages are keyed on (wishlist_count, id), so ties never fall back to an OFFSET
+@pytest.mark.django_db
+def test_get_accommodation_list_popular_keyset(client, sample_accommodations):
+    city = City.objects.get(name="Seoul")
+    for index in range(6):
+        accommodation = Accommodation.objects.create(name=f"Hotel {index}", region="seoul", location="123", city=city)
+        Accommodation.objects.filter(pk=accommodation.pk).update(wishlist_count=index % 2)
+    expected = list(Accommodation.objects.order_by("-wishlist_count", "-id").values_list("id", flat=True))
+
+    pages = [client.get(BASE_URL, {"ordering": "popular", "page_size": 2})]
+    with CaptureQueriesContext(connection) as queries:
+        while pages[-1].data["next"]:
+            pages.append(client.get(pages[-1].data["next"]))
+    assert [item["id"] for page in pages for item in page.data["data"]] == expected
+    assert not any("OFFSET" in query["sql"] for query in queries.captured_queries)
+
+    # Walking back from the last page returns the same pages
+    previous = pages[-1]
+    for page in reversed(pages[:-1]):
+        previous = client.get(previous.data["previous"])
+        assert previous.data["data"] == page.data["data"]
+    assert previous.data["previous"] is None
+
+
+# Success 8: A new save shows up in the popular listing right away
+@pytest.mark.django_db
+def test_get_accommodation_list_popular_not_cached(client, sample_accommodations):
+    city = City.objects.get(name="Seoul")
+    other = Accommodation.objects.create(name="Hotel B", region="seoul", location="456", city=city)
+    user = User.objects.create(username="saver", phone_number="01055556666")
+    wishlist = Wishlist.objects.create(user=user, name="saved")
+    wishlist.accommodations.add(sample_accommodations["accommodation"])
+    response = client.get(BASE_URL, {"ordering": "popular"})
+    assert [item["id"] for item in response.data["data"]][0] == sample_accommodations["accommodation"].pk
+
+    other_user = User.objects.create(username="saver2", phone_number="01077778888")
+    Wishlist.objects.create(user=other_user, name="saved").accommodations.add(other)
+    wishlist.accommodations.add(other)
+    response = client.get(BASE_URL, {"ordering": "popular"})
+
+    assert [(item["id"], item["wishlist_count"]) for item in response.data["data"]] == [
+        (other.pk, 2),
+        (sample_accommodations["accommodation"].pk, 1),
+    ]
+
+
+# Failure 1: Unknown ordering
+@pytest.mark.django_db
+def test_get_accommodation_list_invalid_ordering(client, sample_accommodations):
+    response = client.get(BASE_URL, {"ordering": "name"})
+    assert response.status_code == 400
+
+
+# Failure 2: No matching region
 @pytest.mark.django_db
 def test_get_accommodation_list_no_match(client, sample_accommodations):
     response = client.get(BASE_URL, {"region": "null"})
@@ -91,6 +223,42 @@ def test_get_accommodation_detail_success(client, sample_accommodations):
     assert response.data["name"] == accommodation.name
 
 
+# Success 2: Second request is served from the cache
+@pytest.mark.django_db
+def test_get_accommodation_detail_cached(client, sample_accommodations, django_assert_num_queries):
+    accommodation = sample_accommodations["accommodation"]
+    client.get(DETAIL_URL(accommodation.id))
+
+    with django_assert_num_queries(0):
+        response = client.get(DETAIL_URL(accommodation.id))
+
+    assert response.status_code == 200
+    assert get_cache_stats() == {"hits": 1, "misses": 1}
+
+
+# Success 3: Changes to the accommodation, its city or amenities invalidate the cached payload
+@pytest.mark.django_db
+def test_get_accommodation_detail_invalidated(client, sample_accommodations):
+    accommodation = sample_accommodations["accommodation"]
+    amenity = Amenity.objects.create(name="Pool")
+    client.get(DETAIL_URL(accommodation.id))
+
+    accommodation.amenities.add(amenity)
+    assert client.get(DETAIL_URL(accommodation.id)).data["amenities"] == [{"name": "Pool", "description": None}]
+
+    amenity.name = "Infinity Pool"
+    amenity.save()
+    assert client.get(DETAIL_URL(accommodation.id)).data["amenities"][0]["name"] == "Infinity Pool"
+
+    accommodation.city.name = "Busan"
+    accommodation.city.save()
+    assert client.get(DETAIL_URL(accommodation.id)).data["city"] == {"name": "Busan"}
+
+    accommodation.name = "Hotel Z"
+    accommodation.save()
+    assert client.get(DETAIL_URL(accommodation.id)).data["name"] == "Hotel Z"
+
+
 # Failure
 @pytest.mark.django_db
 def test_get_accommodation_detail_not_found(client, sample_accommodations):
@@ -186,3 +354,111 @@ def test_get_available_packages_no_availability(client, sample_accommodations):
 
     assert response.status_code == 200
     assert len(response.data) == 0
+
+
+# Failure4: Package open on only some nights of the stay is excluded
+@pytest.mark.django_db
+def test_get_available_packages_partially_open(client, sample_accommodations):
+    accommodation = sample_accommodations["accommodation"]
+    package = sample_accommodations["package"]
+    today = timezone.now().date()
+    PackageDailyAvailability.objects.create(
+        package=package,
+        date=today + timedelta(days=1),
+        retail_price=120000,
+        cost_price=100000,
+        status=AvailabilityStatus.CLOSED,
+    )
+    url = build_available_packages_url(accommodation.id, today, today + timedelta(days=2))
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert len(response.data) == 0
+
+
+# Success 2: Reopening a closed night updates the availability index
+@pytest.mark.django_db
+def test_get_available_packages_after_reopen(client, sample_accommodations):
+    accommodation = sample_accommodations["accommodation"]
+    package = sample_accommodations["package"]
+    today = timezone.now().date()
+    closed_night = PackageDailyAvailability.objects.create(
+        package=package,
+        date=today + timedelta(days=1),
+        retail_price=120000,
+        cost_price=100000,
+        status=AvailabilityStatus.CLOSED,
+    )
+    closed_night.status = AvailabilityStatus.OPEN
+    closed_night.save()
+    url = build_available_packages_url(accommodation.id, today, today + timedelta(days=2))
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert len(response.data) == 1
+    assert len(response.data[0]["daily_prices"]) == 2
+
+
+# Success 3: Daily prices list every night at its effective price, whether or not it has a row
+@pytest.mark.django_db
+def test_get_available_packages_effective_daily_prices(client, sample_accommodations):
+    accommodation = sample_accommodations["accommodation"]
+    package = sample_accommodations["package"]
+    today = timezone.now().date()
+    PackageWeekdayBasePrice.objects.bulk_create(
+        PackageWeekdayBasePrice(package=package, weekday=weekday, retail_price=100000, cost_price=80000, allotment=1)
+        for weekday in Weekday.values
+    )
+    # A row written at booking time carries no price override
+    PackageDailyAvailability.objects.create(
+        package=package, date=today + timedelta(days=1), retail_price=0, cost_price=0
+    )
+    url = build_available_packages_url(accommodation.id, today, today + timedelta(days=3))
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert [night["retail_price"] for night in response.data[0]["daily_prices"]] == [120000, 100000, 100000]
+
+
+# ----- AccommodationSearchView Test -----
+
+
+# Success 1: Returns accommodations with their cheapest bookable package
+@pytest.mark.django_db
+def test_search_accommodations_success(client, sample_accommodations):
+    accommodation = sample_accommodations["accommodation"]
+    room_type = sample_accommodations["room_type"]
+    today = timezone.now().date()
+    cheaper_package = Package.objects.create(room_type=room_type, name="Cheaper", base_price=80000)
+    PackageDailyAvailability.objects.create(package=cheaper_package, date=today, retail_price=90000, cost_price=70000)
+    other = Accommodation.objects.create(name="Hotel B", region="jeju", location="456", type="hotel")
+    other_room = RoomType.objects.create(accommodation=other, name="Standard", base_occupancy=2, max_occupancy=2)
+    other_package = Package.objects.create(room_type=other_room, name="Room Only", base_price=50000)
+    PackageDailyAvailability.objects.create(package=other_package, date=today, retail_price=60000, cost_price=50000)
+
+    response = client.get(
+        SEARCH_URL, {"region": "seoul", "check_in": today, "check_out": today + timedelta(days=1), "guests": 2}
+    )
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.data["data"]] == [accommodation.id]
+    assert response.data["data"][0]["cheapest_package"] == {"id": cheaper_package.id, "total_price": 90000}
+
+
+# Success 2: Guests outside the room type occupancy are not matched
+@pytest.mark.django_db
+def test_search_accommodations_guest_filter(client, sample_accommodations):
+    today = timezone.now().date()
+    response = client.get(SEARCH_URL, {"check_in": today, "check_out": today + timedelta(days=1), "guests": 5})
+
+    assert response.status_code == 200
+    assert response.data["data"] == []
+
+
+# Failure: Invalid guests
+@pytest.mark.django_db
+def test_search_accommodations_invalid_guests(client, sample_accommodations):
+    response = client.get(SEARCH_URL, {"guests": "two"})
+
+    assert response.status_code == 400
+    assert response.data["error"] == "'guests' must be a number"
@@ -5,6 +5,7 @@ from packages.views import RoomPackageListView, AvailableRoomPackagesView
 
 urlpatterns = [
     path("", views.AccommodationCollectionView.as_view()),  # GET, POST
+    path("search", views.AccommodationSearchView.as_view()),
     path("<int:pk>", views.AccommodationDetailView.as_view()),
     path("<int:pk>/room-types", RoomTypeCollectionView.as_view()),
     path("<int:pk>/room-packages", RoomPackageListView.as_view()),
@@ -3,33 +3,62 @@ from rest_framework import status
 from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from .cache import cached_detail, cached_list
 from .models import Accommodation, Amenity, City
 from .serializers import (
     AccommodationListSerializer,
+    AccommodationSearchSerializer,
     AccommodationDetailSerializer,
     CreateAccommodationSerializer,
     AmenitySerializer,
     CitySerializer,
 )
+from common.pagination import IdCursorPagination, PopularityCursorPagination
 from common.permissions import IsStaffUser
+from packages.availability import open_for_stay
+from packages.models import Package
+from packages.quotes import quote_packages
+from packages.views import validate_dates
 
 
 class AccommodationCollectionView(APIView):
     """
-    GET: List all accommodations
+    GET: List accommodations page by page (cursor pagination ordered by id, or most saved first with ?ordering=popular)
     POST: Create accommodation with default values for missing fields
     """
 
+    paginators = {"id": IdCursorPagination, "popular": PopularityCursorPagination}
+
     def get(self, request):
         region = request.query_params.get("region", "all")
-        accommodations = Accommodation.objects.all()
-        if not accommodations.exists():
-            return NotFound("Accommodation not found.")
+        ordering = request.query_params.get("ordering", "id")
+        if ordering not in self.paginators:
+            raise ValidationError({"error": f"'ordering' must be one of: {', '.join(self.paginators)}"})
+        accommodations = Accommodation.objects.select_related("city").only(
+            "id", "name", "type", "location", "description", "wishlist_count", "city__name"
+        )
         if region != "all":
             accommodations = accommodations.filter(region=region)
 
-        serializer = AccommodationListSerializer(accommodations, many=True)
-        return Response({"region": region, "data": serializer.data}, status=status.HTTP_200_OK)
+        def build_page():
+            paginator = self.paginators[ordering]()
+            page = paginator.paginate_queryset(accommodations, request, view=self)
+            if not page and not request.query_params.get(paginator.cursor_query_param):
+                raise NotFound({"error": "No accommodations found"})
+
+            serializer = AccommodationListSerializer(page, many=True)
+            return {
+                "region": region,
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "data": serializer.data,
+            }
+
+        if ordering == "popular":
+            # The ranking moves with every wishlist save, so it is always read live (keyset pages stay cheap)
+            return Response(build_page(), status=status.HTTP_200_OK)
+        payload = cached_list(region, request.build_absolute_uri(), build_page)
+        return Response(payload, status=status.HTTP_200_OK)
 
     def post(self, request):
         required_fields = ["name", "location", "region"]
@@ -44,16 +73,72 @@ class AccommodationCollectionView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class AccommodationSearchView(APIView):
+    """API view to search every accommodation with a bookable package for the given region, city, dates and guests"""
+
+    def get(self, request):
+        region = request.query_params.get("region")
+        city = request.query_params.get("city")
+        check_in, check_out = validate_dates(
+            request.query_params.get("check_in"), request.query_params.get("check_out")
+        )
+        try:
+            guests = int(request.query_params.get("guests", 2))
+        except ValueError:
+            raise ValidationError({"error": "'guests' must be a number"})
+
+        # Every bookable package across all matching accommodations in one query
+        packages = Package.objects.filter(
+            open_for_stay(check_in, check_out),
+            is_active=True,
+            room_type__base_occupancy__lte=guests,
+            room_type__max_occupancy__gte=guests,
+        )
+        if region:
+            packages = packages.filter(room_type__accommodation__region=region)
+        if city:
+            packages = packages.filter(room_type__accommodation__city__name=city)
+        candidates = list(packages.values_list("id", "room_type__accommodation_id"))
+
+        # Price all candidates in one batched pass and keep the cheapest package per accommodation
+        quotes = quote_packages([package_id for package_id, _ in candidates], check_in, check_out)
+        cheapest = {}
+        for package_id, accommodation_id in candidates:
+            quote = quotes[package_id]
+            if not quote["is_priced"]:
+                continue
+            current = cheapest.get(accommodation_id)
+            if current is None or quote["total_retail_price"] < current["total_price"]:
+                cheapest[accommodation_id] = {"id": package_id, "total_price": quote["total_retail_price"]}
+
+        accommodations = (
+            Accommodation.objects.filter(pk__in=packages.values("room_type__accommodation_id"))
+            .select_related("city")
+            .only("id", "name", "type", "location", "city__name")
+        )
+        results = sorted(
+            (accommodation for accommodation in accommodations if accommodation.id in cheapest),
+            key=lambda accommodation: (cheapest[accommodation.id]["total_price"], accommodation.id),
+        )
+        serializer = AccommodationSearchSerializer(results, many=True, context={"cheapest": cheapest})
+        return Response(
+            {"check_in": check_in, "check_out": check_out, "guests": guests, "data": serializer.data},
+            status=status.HTTP_200_OK,
+        )
+
+
 class AccommodationDetailView(APIView):
-    """API view to retrieve detailed info about a specific accommodation"""
+    """API view to retrieve detailed info about a specific accommodation (cached until the accommodation changes)"""
 
     def get(self, request, pk):
-        try:
-            accommodation = Accommodation.objects.get(pk=pk)
-        except Accommodation.DoesNotExist:
-            raise NotFound("Accommodation not found")
-        serializer = AccommodationDetailSerializer(accommodation)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def build_detail():
+            try:
+                accommodation = Accommodation.objects.select_related("city").prefetch_related("amenities").get(pk=pk)
+            except Accommodation.DoesNotExist:
+                raise NotFound("Accommodation not found")
+            return AccommodationDetailSerializer(accommodation).data
+
+        return Response(cached_detail(pk, build_detail), status=status.HTTP_200_OK)
 
 
 class AmenityCollectionView(APIView):
@@ -1,3 +1,13 @@
 from django.contrib import admin
+from .models import DailyRevenueRollup
 
-# Register your models here.
+
+@admin.register(DailyRevenueRollup)
+class DailyRevenueRollupAdmin(admin.ModelAdmin):
+    list_display = ["date", "accommodation", "room_type", "nights_sold", "retail_total", "cost_total"]
+    list_filter = ["date"]
+    list_select_related = ["accommodation", "room_type"]
+    search_fields = ["accommodation__name", "room_type__name"]
+    date_hierarchy = "date"
+    # Maintained by admin_panel.rollups
+    readonly_fields = ["accommodation", "room_type", "date", "nights_sold", "retail_total", "cost_total"]
@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_panel.rollups import rebuild_rollups
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}'. Use 'YYYY-MM-DD'")
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily revenue rollups of a date range from booking line items, in parallel chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", required=True, help="First night to recompute (YYYY-MM-DD)")
+        parser.add_argument("--end", required=True, help="Day after the last night to recompute (YYYY-MM-DD)")
+        parser.add_argument("--workers", type=int, default=1, help="Chunks recomputed at the same time")
+        parser.add_argument("--chunk-days", type=int, default=31, help="Nights per chunk")
+
+    def handle(self, *args, **options):
+        start, end = parse_date(options["start"]), parse_date(options["end"])
+        if start >= end:
+            raise CommandError("--start must be earlier than --end")
+        if options["workers"] < 1 or options["chunk_days"] < 1:
+            raise CommandError("--workers and --chunk-days must be at least 1")
+
+        written = rebuild_rollups(start, end, workers=options["workers"], chunk_days=options["chunk_days"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows for {start} to {end}"))
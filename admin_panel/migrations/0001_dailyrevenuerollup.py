@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accommodations', '0005_accommodation_wishlist_count'),
+        ('room_types', '0008_alter_roomtype_base_occupancy_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('nights_sold', models.PositiveIntegerField(default=0)),
+                ('retail_total', models.PositiveBigIntegerField(default=0)),
+                ('cost_total', models.PositiveBigIntegerField(default=0)),
+                ('accommodation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_rollups', to='accommodations.accommodation')),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_rollups', to='room_types.roomtype')),
+            ],
+            options={
+                'verbose_name': 'Daily Revenue Rollup',
+                'verbose_name_plural': 'Daily Revenue Rollups',
+                'indexes': [models.Index(fields=['accommodation', 'date'], name='rollup_accommodation_date_idx'), models.Index(fields=['date'], name='rollup_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room_type', 'date'), name='rollup_room_type_date_unique')],
+            },
+        ),
+    ]
@@ -1,3 +1,29 @@
 from django.db import models
+from accommodations.models import Accommodation
+from room_types.models import RoomType
 
-# Create your models here.
+
+class DailyRevenueRollup(models.Model):
+    """
+    Nights sold, retail and cost per room type and night, over the bookings that hold inventory.
+    Kept up to date by admin_panel.rollups as bookings change status; rebuilt with rebuild_revenue_rollups.
+    """
+
+    accommodation = models.ForeignKey(Accommodation, on_delete=models.CASCADE, related_name="revenue_rollups")
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name="revenue_rollups")
+    date = models.DateField()
+    nights_sold = models.PositiveIntegerField(default=0)
+    retail_total = models.PositiveBigIntegerField(default=0)
+    cost_total = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Daily Revenue Rollup"
+        verbose_name_plural = "Daily Revenue Rollups"
+        constraints = [models.UniqueConstraint(fields=["room_type", "date"], name="rollup_room_type_date_unique")]
+        indexes = [
+            models.Index(fields=["accommodation", "date"], name="rollup_accommodation_date_idx"),
+            models.Index(fields=["date"], name="rollup_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.room_type} - {self.date}"
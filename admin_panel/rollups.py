@@ -0,0 +1,119 @@
+"""
+Daily revenue rollups for staff dashboards.
+
+DailyRevenueRollup holds one row per room type and night: nights sold, retail and cost over every
+booking that holds inventory (Booking.holds_inventory). bookings.reservations
+keeps the rows in step with the inventory. It adds a booking's nights when the booking is created or
+reinstated, and removes them when the rooms are released. rebuild_rollups() recomputes any date range from the
+line items, in independent date chunks that can run in parallel. Run it while bookings are quiet,
+because an incremental update made to a chunk during its rebuild may be lost.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest
+
+from .models import DailyRevenueRollup
+from bookings.models import BookingLineItem
+from packages.models import Package
+
+INSERT_BATCH_SIZE = 1000
+
+
+def _shift(field, amount):
+    # Greatest keeps a drifted row from failing the positive check on release
+    return Greatest(F(field) + amount, Value(0))
+
+
+def apply_booking(booking, sign, nights=None):
+    """
+    Add (sign=1) or remove (sign=-1) the nights of a booking. Call it inside the transaction that
+    changes the booking. nights ([(date, retail_price, cost_price)]) defaults to the booking's line items.
+    """
+    room_type_id, accommodation_id = (
+        Package.objects.filter(pk=booking.package_id)
+        .values_list("room_type_id", "room_type__accommodation_id")
+        .get()
+    )
+    if nights is None:
+        nights = list(booking.line_items.values_list("daily_availability__date", "retail_price", "cost_price"))
+    rollups = DailyRevenueRollup.objects.filter(room_type_id=room_type_id)
+
+    if sign > 0:
+        DailyRevenueRollup.objects.bulk_create(
+            [
+                DailyRevenueRollup(accommodation_id=accommodation_id, room_type_id=room_type_id, date=day)
+                for day, _, _ in nights
+            ],
+            ignore_conflicts=True,
+        )
+    for day, retail_price, cost_price in nights:
+        rollups.filter(date=day).update(
+            nights_sold=_shift("nights_sold", sign),
+            retail_total=_shift("retail_total", sign * retail_price),
+            cost_total=_shift("cost_total", sign * cost_price),
+        )
+
+
+def rebuild_chunk(start, end):
+    """Recompute the rows of [start, end) from the line items. Returns the number of rows written."""
+    totals = (
+        BookingLineItem.objects.filter(
+            booking__holds_inventory=True,
+            daily_availability__date__gte=start,
+            daily_availability__date__lt=end,
+        )
+        .values(
+            room_type_ref=F("booking__package__room_type_id"),
+            accommodation_ref=F("booking__package__room_type__accommodation_id"),
+            day=F("daily_availability__date"),
+        )
+        .annotate(nights=Count("id"), retail=Sum("retail_price"), cost=Sum("cost_price"))
+        .order_by()
+    )
+    written, batch = 0, []
+    with transaction.atomic():
+        DailyRevenueRollup.objects.filter(date__gte=start, date__lt=end).delete()
+        for total in totals.iterator():
+            batch.append(
+                DailyRevenueRollup(
+                    room_type_id=total["room_type_ref"],
+                    accommodation_id=total["accommodation_ref"],
+                    date=total["day"],
+                    nights_sold=total["nights"],
+                    retail_total=total["retail"],
+                    cost_total=total["cost"],
+                )
+            )
+            if len(batch) >= INSERT_BATCH_SIZE:
+                written += len(DailyRevenueRollup.objects.bulk_create(batch))
+                batch = []
+        written += len(DailyRevenueRollup.objects.bulk_create(batch))
+    return written
+
+
+def _rebuild_chunk_in_thread(chunk):
+    try:
+        return rebuild_chunk(*chunk)
+    finally:
+        # Each worker thread opens its own connection
+        connection.close()
+
+
+def date_chunks(start, end, chunk_days):
+    day = start
+    while day < end:
+        yield day, min(day + timedelta(days=chunk_days), end)
+        day += timedelta(days=chunk_days)
+
+
+def rebuild_rollups(start, end, workers=1, chunk_days=31):
+    """Recompute [start, end) chunk by chunk, on `workers` threads. Returns the number of rows written."""
+    chunks = list(date_chunks(start, end, chunk_days))
+    if workers == 1:
+        return sum(rebuild_chunk(*chunk) for chunk in chunks)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rollup-rebuild") as executor:
+        return sum(executor.map(_rebuild_chunk_in_thread, chunks))
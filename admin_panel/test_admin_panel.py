@@ -0,0 +1,228 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import DailyRevenueRollup
+from .rollups import rebuild_rollups
+from accommodations.models import Accommodation, City
+from bookings.models import Booking, BookingStatusChoices
+from bookings.reservations import create_booking
+from packages.models import Package, PackageDailyAvailability
+from room_types.models import BedConfiguration, RoomType
+from users.models import GuestInfo, User
+
+# ----- Constants -----
+CHANGELIST_URLS = [
+    "/admin/users/guestinfo/",
+    "/admin/bookings/booking/",
+    "/admin/bookings/booking/?status__exact=pending",
+    "/admin/packages/package/",
+    "/admin/packages/packagedailyavailability/",
+    "/admin/room_types/roomtype/",
+    "/admin/room_types/bedconfiguration/",
+]
+
+
+# ----- Fixtures -----
+@pytest.fixture
+def sample_db(db):
+    city = City.objects.create(name="Seoul")
+    accommodation = Accommodation.objects.create(name="Hotel A", region="seoul", location="123", city=city)
+    room_type = RoomType.objects.create(accommodation=accommodation, name="Deluxe", max_occupancy=3)
+    package = Package.objects.create(room_type=room_type, name="Room Only", base_price=100000)
+    check_in = timezone.now().date() + timedelta(days=7)
+    for offset in range(3):
+        PackageDailyAvailability.objects.create(
+            package=package,
+            date=check_in + timedelta(days=offset),
+            retail_price=100000 + offset * 10000,
+            cost_price=80000,
+            allotment=5,
+        )
+    package = Package.objects.select_related("room_type__accommodation").get(pk=package.pk)
+    return {"package": package, "room_type": room_type, "check_in": check_in}
+
+
+@pytest.fixture
+def staff_client(db):
+    staff = User.objects.create_superuser(
+        username="staff",
+        email="staff@gmail.com",
+        first_name="abc",
+        last_name="edf",
+        phone_number="01011112222",
+        password="test123!",
+    )
+    client = APIClient()
+    client.force_login(staff)
+    return client
+
+
+def add_changelist_rows(index):
+    """One accommodation with a room type, package, night, bed, guest and two bookings"""
+    city, _ = City.objects.get_or_create(name="Seoul")
+    accommodation = Accommodation.objects.create(name=f"Hotel {index}", region="seoul", location="123", city=city)
+    room_type = RoomType.objects.create(accommodation=accommodation, name="Deluxe")
+    BedConfiguration.objects.create(room_type=room_type, bed_type="king", count=1)
+    package = Package.objects.create(room_type=room_type, name="Room Only", base_price=100000)
+    PackageDailyAvailability.objects.create(
+        package=package, date=timezone.now().date(), retail_price=100000, cost_price=80000
+    )
+    guest = GuestInfo.objects.create(
+        first_name="guest", last_name=str(index), email=f"guest{index}@gmail.com", phone_number="01012345678"
+    )
+    user = User.objects.create_user(
+        username=f"user{index}",
+        email=f"user{index}@gmail.com",
+        first_name="abc",
+        last_name="edf",
+        phone_number="01011112222",
+        password="test123!",
+    )
+    now = timezone.now()
+    stay = {"package": package, "check_in": now, "check_out": now + timedelta(days=1), "guests": 2}
+    Booking.objects.create(guest_user=guest, **stay)
+    Booking.objects.create(user=user, **stay)
+
+
+def changelist_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+def rollup_rows():
+    rows = DailyRevenueRollup.objects.order_by("date")
+    return list(rows.values_list("date", "nights_sold", "retail_total", "cost_total"))
+
+
+# ----- Incremental update Tests -----
+
+
+# Success 1: Booking adds its nights, cancelling takes them out again
+@pytest.mark.django_db
+def test_rollups_follow_booking_status(sample_db):
+    check_in = sample_db["check_in"]
+    first = create_booking(sample_db["package"], check_in, check_in + timedelta(days=2), 2)
+    create_booking(sample_db["package"], check_in + timedelta(days=1), check_in + timedelta(days=3), 2)
+
+    assert rollup_rows() == [
+        (check_in, 1, 100000, 80000),
+        (check_in + timedelta(days=1), 2, 220000, 160000),
+        (check_in + timedelta(days=2), 1, 120000, 80000),
+    ]
+    assert DailyRevenueRollup.objects.filter(accommodation=sample_db["room_type"].accommodation).count() == 3
+
+    first.status = BookingStatusChoices.CANCELLED
+    first.save()
+
+    assert rollup_rows() == [
+        (check_in, 0, 0, 0),
+        (check_in + timedelta(days=1), 1, 110000, 80000),
+        (check_in + timedelta(days=2), 1, 120000, 80000),
+    ]
+
+
+# Success 2: A reinstated booking adds its nights back, a repeated cancel takes them out once
+@pytest.mark.django_db
+def test_rollups_follow_reinstated_booking(sample_db):
+    check_in = sample_db["check_in"]
+    booking = create_booking(sample_db["package"], check_in, check_in + timedelta(days=1), 2)
+    expected = rollup_rows()
+
+    booking.status = BookingStatusChoices.CANCELLED
+    booking.save()
+    booking.status = BookingStatusChoices.APPROVED
+    booking.save()
+    assert rollup_rows() == expected
+
+    for status in (BookingStatusChoices.CANCELLED, BookingStatusChoices.DENIDED):
+        booking.status = status
+        booking.save()
+    booking.delete()
+    assert rollup_rows() == [(check_in, 0, 0, 0)]
+
+
+# Success 3: Deleting a booking releases its nights
+@pytest.mark.django_db
+def test_rollups_follow_booking_delete(sample_db):
+    check_in = sample_db["check_in"]
+    booking = create_booking(sample_db["package"], check_in, check_in + timedelta(days=1), 2)
+    booking.delete()
+
+    assert rollup_rows() == [(check_in, 0, 0, 0)]
+
+
+# ----- Rebuild Tests -----
+
+
+# Success 1: Rebuild matches the incremental rows and repairs drift, chunk by chunk
+@pytest.mark.django_db
+def test_rebuild_rollups(sample_db):
+    check_in = sample_db["check_in"]
+    create_booking(sample_db["package"], check_in, check_in + timedelta(days=3), 2)
+    expected = rollup_rows()
+    DailyRevenueRollup.objects.filter(date=check_in).update(nights_sold=9)
+    DailyRevenueRollup.objects.filter(date=check_in + timedelta(days=2)).delete()
+
+    written = rebuild_rollups(check_in - timedelta(days=5), check_in + timedelta(days=5), chunk_days=2)
+
+    assert written == 3
+    assert rollup_rows() == expected
+
+
+# Success 2: Rebuild counts the bookings that hold inventory, like the incremental updates
+@pytest.mark.django_db
+def test_rebuild_rollups_follows_held_inventory(sample_db):
+    check_in = sample_db["check_in"]
+    booking = create_booking(sample_db["package"], check_in, check_in + timedelta(days=1), 2)
+    # A booking in a holding status whose rooms were never taken, e.g. from before daily inventory
+    Booking.objects.filter(pk=booking.pk).update(holds_inventory=False)
+
+    rebuild_rollups(check_in, check_in + timedelta(days=1))
+
+    assert rollup_rows() == []
+
+
+# Success 3: Command
+@pytest.mark.django_db
+def test_rebuild_revenue_rollups_command(sample_db):
+    check_in = sample_db["check_in"]
+    create_booking(sample_db["package"], check_in, check_in + timedelta(days=2), 2)
+    DailyRevenueRollup.objects.all().delete()
+
+    out = StringIO()
+    call_command("rebuild_revenue_rollups", start=str(check_in), end=str(check_in + timedelta(days=30)), stdout=out)
+
+    assert "Wrote 2 rollup rows" in out.getvalue()
+    assert len(rollup_rows()) == 2
+
+
+# Failure: Empty range
+@pytest.mark.django_db
+def test_rebuild_revenue_rollups_command_invalid_range(sample_db):
+    with pytest.raises(CommandError):
+        call_command("rebuild_revenue_rollups", start="2025-03-02", end="2025-03-01")
+
+
+# ----- Changelist query count Tests -----
+
+
+# Success: A changelist runs the same number of queries however many rows it shows
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", CHANGELIST_URLS)
+def test_changelist_query_count(staff_client, url):
+    add_changelist_rows(0)
+    baseline = changelist_queries(staff_client, url)
+
+    for index in range(1, 6):
+        add_changelist_rows(index)
+
+    assert changelist_queries(staff_client, url) == baseline
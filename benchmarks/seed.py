@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from accommodations.models import Accommodation, Amenity, City, RegionChioce
+from bookings.reservations import create_booking
+from packages.availability import rebuild_availability_runs
+from packages.models import Package, PackageDailyAvailability, PackageWeekdayBasePrice, Weekday
+from room_types.models import RoomType
+from users.models import GuestInfo, User
+from wishlists.models import Wishlist
+
+# Production-sized volumes, multiplied by the benchmark scale
+VOLUMES = {"accommodations": 5000, "room_types": 50000, "packages": 200000}
+CALENDAR_DAYS = 365
+INSERT_BATCH_SIZE = 5000
+PASSWORD = "Bench-pass-2025!"
+
+
+def scaled_volumes(scale):
+    return {name: max(1, round(volume * scale)) for name, volume in VOLUMES.items()}
+
+
+def _create_user(username, **extra_fields):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@bench.test",
+        first_name="bench",
+        last_name="user",
+        phone_number="01011112222",
+        password=PASSWORD,
+        **extra_fields,
+    )
+
+
+def seed(scale):
+    """Fill the database with a catalogue shaped like production and return the objects the benchmarks use"""
+    volumes = scaled_volumes(scale)
+    today = timezone.now().date()
+    regions = RegionChioce.values
+
+    cities = City.objects.bulk_create(City(name=f"City {index}") for index in range(10))
+    amenities = Amenity.objects.bulk_create(Amenity(name=f"Amenity {index}") for index in range(20))
+    accommodations = Accommodation.objects.bulk_create(
+        Accommodation(
+            name=f"Accommodation {index}",
+            location=f"Street {index}",
+            region=regions[index % len(regions)],
+            city=cities[index % len(cities)],
+            description="A long description " * 20,
+        )
+        for index in range(volumes["accommodations"])
+    )
+    Accommodation.amenities.through.objects.bulk_create(
+        Accommodation.amenities.through(accommodation_id=accommodation.id, amenity_id=amenity.id)
+        for accommodation in accommodations
+        for amenity in amenities[:5]
+    )
+    room_types = RoomType.objects.bulk_create(
+        RoomType(
+            accommodation=accommodations[index % len(accommodations)],
+            name=f"Room type {index}",
+            base_occupancy=2,
+            max_occupancy=2 + index % 3,
+        )
+        for index in range(volumes["room_types"])
+    )
+    packages = Package.objects.bulk_create(
+        Package(room_type=room_types[index % len(room_types)], name=f"Package {index}", base_price=100000)
+        for index in range(volumes["packages"])
+    )
+    PackageWeekdayBasePrice.objects.bulk_create(
+        (
+            PackageWeekdayBasePrice(
+                package=package, weekday=weekday, retail_price=100000 + weekday * 5000, cost_price=80000
+            )
+            for package in packages
+            for weekday in Weekday.values
+        ),
+        batch_size=INSERT_BATCH_SIZE,
+    )
+
+    batch = []
+    for package in packages:
+        for offset in range(CALENDAR_DAYS):
+            batch.append(
+                PackageDailyAvailability(
+                    package=package,
+                    date=today + timedelta(days=offset),
+                    retail_price=0,
+                    cost_price=0,
+                    allotment=1000,
+                )
+            )
+        if len(batch) >= INSERT_BATCH_SIZE:
+            PackageDailyAvailability.objects.bulk_create(batch, batch_size=INSERT_BATCH_SIZE)
+            batch = []
+    PackageDailyAvailability.objects.bulk_create(batch, batch_size=INSERT_BATCH_SIZE)
+    rebuild_availability_runs(package.id for package in packages)
+
+    user = _create_user("bench")
+    staff = _create_user("benchstaff", is_staff=True)
+    newcomer = _create_user("benchnew")
+    wishlist = Wishlist.objects.create(user=user, name="bench wishlist")
+    wishlist.accommodations.set(accommodations[:50])
+
+    package = Package.objects.select_related("room_type__accommodation").get(pk=packages[0].pk)
+    booking = create_booking(package, today + timedelta(days=1), today + timedelta(days=3), 2, user=user)
+    guest = GuestInfo.objects.create(
+        first_name="bench", last_name="guest", email="guest@bench.test", phone_number="01033334444"
+    )
+    for offset in range(5):
+        check_in = today + timedelta(days=10 + offset * 3)
+        create_booking(package, check_in, check_in + timedelta(days=2), 2, guest_user=guest)
+
+    return {
+        "volumes": volumes,
+        "today": today,
+        "accommodation": accommodations[0],
+        "package": package,
+        "user": user,
+        "staff": staff,
+        "newcomer": newcomer,
+        "wishlist": wishlist,
+        "booking": booking,
+        "guest": guest,
+    }
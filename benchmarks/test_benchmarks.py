@@ -0,0 +1,285 @@
+"""
+Query-count, latency and memory benchmarks for every API endpoint.
+
+The database is seeded once per run with a catalogue shaped like production, scaled by BENCHMARK_SCALE
+(1.0 = 5k accommodations, 50k room types, 200k packages and a year of daily availability). Every route
+in config/urls.py is requested BENCHMARK_ITERATIONS times with a cold response cache. The worst query
+count, p50/p95 latency and peak traced memory are compared against benchmarks/budgets.json; the
+per-request database round trips of every session engine are checked against SESSION_QUERY_BUDGETS. Query
+budgets are always enforced; latency and memory budgets only with BENCHMARK_ENFORCE_LATENCY=1, since
+they depend on the machine. Set BENCHMARK_REPORT to a file path to get the measurements as JSON.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from rest_framework.test import APIClient
+
+from .seed import PASSWORD, seed
+from users.tokens import get_cache as get_token_cache, issue_tokens
+
+# ----- Constants -----
+SCALE = float(os.environ.get("BENCHMARK_SCALE", "0.001"))
+ITERATIONS = int(os.environ.get("BENCHMARK_ITERATIONS", "3"))
+ENFORCE_LATENCY = os.environ.get("BENCHMARK_ENFORCE_LATENCY") == "1"
+BUDGETS = json.loads((Path(__file__).parent / "budgets.json").read_text())
+
+# Queries for an authenticated GET /api/v1/users/me, by session engine (see SESSION_ENGINES in settings)
+SESSION_QUERY_BUDGETS = {"db": 2, "cached_db": 1, "signed_cookies": 1}
+
+BenchRequest = namedtuple("BenchRequest", ["method", "url", "data", "user", "expected"], defaults=[None, None, (200,)])
+
+
+def _dates(ctx, nights=2):
+    check_in = ctx["today"] + timedelta(days=7)
+    return check_in, check_in + timedelta(days=nights)
+
+
+def _stay_query(ctx):
+    check_in, check_out = _dates(ctx)
+    return f"check_in={check_in}&check_out={check_out}&guests=2"
+
+
+# One request factory per route: (seeded context, iteration) -> BenchRequest. A route serving more than one
+# method gets a further key per extra method, written "<route> <METHOD>"
+REQUESTS = {
+    "api/v1/users/sign-up": lambda ctx, i: BenchRequest(
+        "post",
+        "/api/v1/users/sign-up",
+        {
+            "username": f"signup{i}",
+            "email": f"signup{i}@bench.test",
+            "first_name": "bench",
+            "last_name": "user",
+            "phone_number": "01011112222",
+            "password": PASSWORD,
+        },
+        expected=(201,),
+    ),
+    "api/v1/users/login": lambda ctx, i: BenchRequest(
+        "post", "/api/v1/users/login", {"username": ctx["user"].username, "password": PASSWORD}
+    ),
+    "api/v1/users/logout": lambda ctx, i: BenchRequest("post", "/api/v1/users/logout", user=ctx["user"]),
+    "api/v1/users/me": lambda ctx, i: BenchRequest("get", "/api/v1/users/me", user=ctx["user"]),
+    "api/v1/users/change-password": lambda ctx, i: BenchRequest(
+        "post",
+        "/api/v1/users/change-password",
+        {"current_password": PASSWORD, "new_password": PASSWORD, "confirm_password": PASSWORD},
+        user=ctx["user"],
+    ),
+    "api/v1/users/token": lambda ctx, i: BenchRequest(
+        "post", "/api/v1/users/token", {"username": ctx["user"].username, "password": PASSWORD}
+    ),
+    "api/v1/users/token/refresh": lambda ctx, i: BenchRequest(
+        "post", "/api/v1/users/token/refresh", {"refresh": issue_tokens(ctx["user"])["refresh"]}
+    ),
+    "api/v1/users/token/revoke": lambda ctx, i: BenchRequest(
+        "post", "/api/v1/users/token/revoke", {"refresh": issue_tokens(ctx["user"])["refresh"]}
+    ),
+    "api/v1/accommodations/": lambda ctx, i: BenchRequest("get", "/api/v1/accommodations/?region=seoul"),
+    "api/v1/accommodations/search": lambda ctx, i: BenchRequest(
+        "get", f"/api/v1/accommodations/search?region=seoul&{_stay_query(ctx)}"
+    ),
+    "api/v1/accommodations/<int:pk>": lambda ctx, i: BenchRequest(
+        "get", f"/api/v1/accommodations/{ctx['accommodation'].id}"
+    ),
+    "api/v1/accommodations/<int:pk>/room-types": lambda ctx, i: BenchRequest(
+        "get", f"/api/v1/accommodations/{ctx['accommodation'].id}/room-types"
+    ),
+    "api/v1/accommodations/<int:pk>/room-packages": lambda ctx, i: BenchRequest(
+        "get", f"/api/v1/accommodations/{ctx['accommodation'].id}/room-packages"
+    ),
+    "api/v1/accommodations/<int:pk>/available-room-packages": lambda ctx, i: BenchRequest(
+        "get", f"/api/v1/accommodations/{ctx['accommodation'].id}/available-room-packages?{_stay_query(ctx)}"
+    ),
+    "api/v1/accommodations/amenities": lambda ctx, i: BenchRequest(
+        "get", "/api/v1/accommodations/amenities", user=ctx["staff"]
+    ),
+    "api/v1/accommodations/cities": lambda ctx, i: BenchRequest(
+        "get", "/api/v1/accommodations/cities", user=ctx["staff"]
+    ),
+    "api/v1/packages/daily-availability/bulk": lambda ctx, i: BenchRequest(
+        "post",
+        "/api/v1/packages/daily-availability/bulk",
+        {
+            "entries": [
+                {
+                    "package": ctx["package"].id,
+                    "start_date": str(ctx["today"] + timedelta(days=30)),
+                    "end_date": str(ctx["today"] + timedelta(days=59)),
+                    "retail_price": 120000 + i,
+                    "cost_price": 90000,
+                }
+            ]
+        },
+        user=ctx["staff"],
+    ),
+    "api/v1/wishlists/create": lambda ctx, i: BenchRequest(
+        "post", "/api/v1/wishlists/create", {"name": "new"}, user=ctx["newcomer"], expected=(201, 400)
+    ),
+    "api/v1/wishlists/<int:pk>": lambda ctx, i: BenchRequest(
+        "get", f"/api/v1/wishlists/{ctx['wishlist'].id}", user=ctx["user"]
+    ),
+    "api/v1/wishlists/<int:pk>/accommodations": lambda ctx, i: BenchRequest(
+        "post",
+        f"/api/v1/wishlists/{ctx['wishlist'].id}/accommodations",
+        {"add": [ctx["accommodation"].id], "remove": [ctx["accommodation"].id + 1]},
+        user=ctx["user"],
+    ),
+    "api/v1/wishlists/<int:pk>/add/<int:accommodation_pk>": lambda ctx, i: BenchRequest(
+        "post", f"/api/v1/wishlists/{ctx['wishlist'].id}/add/{ctx['accommodation'].id}", user=ctx["user"]
+    ),
+    "api/v1/wishlists/<int:pk>/remove/<int:accommodation_pk>": lambda ctx, i: BenchRequest(
+        "delete", f"/api/v1/wishlists/{ctx['wishlist'].id}/remove/{ctx['accommodation'].id}", user=ctx["user"]
+    ),
+    "api/v1/bookings/": lambda ctx, i: BenchRequest(
+        "post",
+        "/api/v1/bookings/",
+        {"package": ctx["package"].id, "check_in": str(_dates(ctx)[0]), "check_out": str(_dates(ctx)[1]), "guests": 2},
+        user=ctx["user"],
+        expected=(201,),
+    ),
+    "api/v1/bookings/ GET": lambda ctx, i: BenchRequest("get", "/api/v1/bookings/", user=ctx["user"]),
+    "api/v1/bookings/guest": lambda ctx, i: BenchRequest(
+        "get", f"/api/v1/bookings/guest?phone={ctx['guest'].phone_number}&email={ctx['guest'].email}"
+    ),
+    "api/v1/bookings/<int:pk>": lambda ctx, i: BenchRequest(
+        "get", f"/api/v1/bookings/{ctx['booking'].id}", user=ctx["user"]
+    ),
+    "api/v1/bookings/<int:pk>/request-cancel": lambda ctx, i: BenchRequest(
+        "post", f"/api/v1/bookings/{ctx['booking'].id}/request-cancel", user=ctx["user"], expected=(200, 400)
+    ),
+    "api/v1/payments/settlements": lambda ctx, i: BenchRequest(
+        "get",
+        f"/api/v1/payments/settlements?start={ctx['today'].replace(day=1)}&end={ctx['today'] + timedelta(days=90)}",
+        user=ctx["staff"],
+    ),
+}
+
+
+def route_of(key):
+    """The route pattern a REQUESTS/budgets key measures"""
+    return key.split(" ", 1)[0]
+
+
+def api_routes(patterns=None, prefix=""):
+    """Every API route pattern reachable from the root urlconf (the Django admin is not an API endpoint)"""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if not route.startswith("admin/"):
+                yield from api_routes(pattern.url_patterns, route)
+        else:
+            yield route
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def send(bench_request):
+    client = APIClient()
+    if bench_request.user:
+        # change-password rotates the stored hash, which a stale instance would carry into the session
+        bench_request.user.refresh_from_db()
+        client.force_login(bench_request.user)
+    caches["default"].clear()
+    get_token_cache().clear()
+    return client, lambda: getattr(client, bench_request.method)(bench_request.url, bench_request.data, format="json")
+
+
+# ----- Fixtures -----
+@pytest.fixture(scope="module")
+def seeded(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        ctx = seed(SCALE)
+        ctx["results"] = {}
+        yield ctx
+        call_command("flush", interactive=False)
+
+    report_path = os.environ.get("BENCHMARK_REPORT")
+    if report_path:
+        Path(report_path).write_text(json.dumps({"volumes": ctx["volumes"], "results": ctx["results"]}, indent=2))
+
+
+# ----- Coverage Test -----
+def test_every_route_has_a_benchmark_and_budget():
+    routes = set(api_routes())
+    assert routes == {route_of(key) for key in REQUESTS}, "Add a request factory for every new route"
+    assert set(REQUESTS) == set(BUDGETS), "Add a budget to benchmarks/budgets.json for every request factory"
+
+
+# ----- Budget Test -----
+@pytest.mark.django_db
+@pytest.mark.parametrize("route", sorted(REQUESTS))
+def test_endpoint_within_budget(route, seeded):
+    budget = BUDGETS[route]
+    query_counts, latencies = [], []
+    for iteration in range(ITERATIONS):
+        bench_request = REQUESTS[route](seeded, iteration)
+        client, call = send(bench_request)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = call()
+            if response.streaming:
+                # Streamed bodies run their queries while being consumed
+                b"".join(response.streaming_content)
+            latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code in bench_request.expected, response.data
+        query_counts.append(len(queries))
+
+    _, call = send(REQUESTS[route](seeded, ITERATIONS))
+    tracemalloc.start()
+    response = call()
+    if response.streaming:
+        b"".join(response.streaming_content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "queries": max(query_counts),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+    seeded["results"][route] = result
+
+    assert result["queries"] <= budget["queries"], f"{route} ran {result['queries']} queries"
+    if ENFORCE_LATENCY:
+        assert result["p95_ms"] <= budget["p95_ms"], f"{route} p95 latency {result['p95_ms']}ms"
+        assert result["peak_kb"] <= budget["peak_kb"], f"{route} peak memory {result['peak_kb']}KB"
+
+
+# ----- Session Engine Test -----
+@pytest.mark.django_db
+@pytest.mark.parametrize("engine", sorted(SESSION_QUERY_BUDGETS))
+def test_session_engine_round_trips(engine, seeded, settings):
+    settings.SESSION_ENGINE = settings.SESSION_ENGINES[engine]
+    client = APIClient()
+    seeded["user"].refresh_from_db()
+    client.force_login(seeded["user"])
+    client.get("/api/v1/users/me")  # warms the session cache for cached_db
+
+    query_counts = []
+    for _ in range(ITERATIONS):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/v1/users/me")
+        assert response.status_code == 200
+        # Nothing changed, so nothing may be written back
+        assert not any(query["sql"].startswith(("UPDATE", "INSERT")) for query in queries.captured_queries)
+        query_counts.append(len(queries))
+
+    seeded["results"][f"session:{engine}"] = {"queries": max(query_counts)}
+    assert max(query_counts) <= SESSION_QUERY_BUDGETS[engine]
@@ -1,15 +1,37 @@
+from django import forms
 from django.contrib import admin
-from .models import Booking
+from .models import INVENTORY_HOLDING_STATUSES, Booking
+from .reservations import has_rooms_to_reclaim
+
+
+class BookingAdminForm(forms.ModelForm):
+    class Meta:
+        model = Booking
+        fields = "__all__"
+
+    def clean(self):
+        """Reinstating a released booking needs a room on every night, checked before the status is saved"""
+        cleaned_data = super().clean()
+        booking = self.instance
+        reinstated = not booking.holds_inventory and cleaned_data.get("status") in INVENTORY_HOLDING_STATUSES
+        if booking.pk and reinstated and not has_rooms_to_reclaim(booking):
+            self.add_error("status", "A night of the booking has no room left")
+        return cleaned_data
 
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
+    form = BookingAdminForm
     list_display = ["user_or_guest", "package", "check_in", "check_out", "status"]
     list_filter = ["status"]
+    # Package.__str__ walks room_type -> accommodation
+    list_select_related = ["user", "guest_user", "package__room_type__accommodation"]
+    show_full_result_count = False
+    # Maintained by bookings.reservations as the status changes; editing it would skip or repeat a release
+    readonly_fields = ["holds_inventory"]
 
+    @admin.display(description="User")
     def user_or_guest(self, obj):
         if obj.guest_user:
             return obj.guest_user.first_name
         return obj.user.username
-
-    user_or_guest.short_description = "User"
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_alter_booking_status'),
+        ('packages', '0011_packagedailyavailability_inventory'),
+        ('users', '0006_guestinfo_phone_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['guest_user', '-created_date', '-id'], name='booking_guest_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_guest_recent_index'),
+        ('packages', '0011_packagedailyavailability_inventory'),
+        ('users', '0006_guestinfo_phone_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', '-created_date', '-id'], name='booking_user_recent_idx'),
+        ),
+    ]
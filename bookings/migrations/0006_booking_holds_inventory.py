@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+# Statuses in which a booking keeps its rooms (bookings.models.INVENTORY_HOLDING_STATUSES at this migration)
+HOLDING_STATUSES = ["pending", "approved", "cancel_requested"]
+
+
+def backfill_holds_inventory(apps, schema_editor):
+    """Bookings already cancelled or denied have released their rooms"""
+    Booking = apps.get_model("bookings", "Booking")
+    Booking.objects.exclude(status__in=HOLDING_STATUSES).update(holds_inventory=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_booking_status_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='holds_inventory',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(backfill_holds_inventory, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def backfill_sold_rooms(apps, schema_editor):
+    """
+    Count the rooms of bookings made before daily inventory existed: every night of a booking that holds
+    inventory takes one room, and the allotment is raised to cover them so sold_within_allotment holds.
+    The availability index is not rebuilt here; run the rebuild_availability_runs command afterwards.
+    """
+    PackageDailyAvailability = apps.get_model("packages", "PackageDailyAvailability")
+    BookingLineItem = apps.get_model("bookings", "BookingLineItem")
+
+    held = BookingLineItem.objects.filter(booking__holds_inventory=True)
+    sold = Coalesce(
+        Subquery(
+            held.filter(daily_availability=OuterRef("pk"))
+            .values("daily_availability")
+            .annotate(total=Count("id"))
+            .values("total")
+        ),
+        0,
+    )
+    PackageDailyAvailability.objects.filter(pk__in=held.values("daily_availability")).update(
+        sold=sold, allotment=Greatest("allotment", sold)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_booking_holds_inventory'),
+        ('packages', '0013_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sold_rooms, migrations.RunPython.noop),
+    ]
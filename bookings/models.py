@@ -13,6 +13,14 @@ class BookingStatusChoices(models.TextChoices):
     CANCELLED = "cancelled", "Cancelled"
 
 
+# Bookings in these statuses keep their rooms out of the daily inventory
+INVENTORY_HOLDING_STATUSES = [
+    BookingStatusChoices.PENDING,
+    BookingStatusChoices.APPROVED,
+    BookingStatusChoices.CANCEL_REQUESTED,
+]
+
+
 class Booking(models.Model):
     """Main Booking model for users. Staff-only payment/refund info is separated into BookingAdminInfo"""
 
@@ -31,6 +39,18 @@ class Booking(models.Model):
     guests = models.PositiveSmallIntegerField()
     # Status visible to customers
     status = models.CharField(max_length=20, choices=BookingStatusChoices.choices, default=BookingStatusChoices.PENDING)
+    # Whether the booking's rooms are currently taken out of the daily inventory (see bookings.reservations)
+    holds_inventory = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            # A user's booking history, newest first
+            models.Index(fields=["user", "-created_date", "-id"], name="booking_user_recent_idx"),
+            # A guest's bookings, newest first (guest self-service listing)
+            models.Index(fields=["guest_user", "-created_date", "-id"], name="booking_guest_recent_idx"),
+            # Admin changelist filtered by status, in its default newest-first order
+            models.Index(fields=["status", "-id"], name="booking_status_idx"),
+        ]
 
     def __str__(self):
         return f"Booking #{self.id}"
@@ -0,0 +1,159 @@
+from datetime import datetime, time
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import INVENTORY_HOLDING_STATUSES, Booking, BookingLineItem
+from admin_panel.rollups import apply_booking
+from packages.availability import materialize_default_nights, rebuild_availability_runs
+from packages.models import AvailabilityStatus, PackageDailyAvailability
+from packages.quotes import quote_packages, stay_nights
+
+
+class StayUnavailable(Exception):
+    """Raised when a package cannot be booked for every night of a stay"""
+
+
+def refresh_runs_after_commit(package_id):
+    """
+    Rebuild a package's availability index once the current transaction commits. The rebuild locks the
+    package row, so running it after commit keeps that lock out of the booking transaction and bookings of
+    different nights of a package do not queue behind each other.
+    """
+    transaction.on_commit(lambda: rebuild_availability_runs([package_id]))
+
+
+def booking_nights(booking):
+    """The (id, sold, allotment) daily rows of a booking's nights, locked in date order"""
+    return (
+        PackageDailyAvailability.objects.select_for_update()
+        .filter(id__in=booking.line_items.values("daily_availability_id"))
+        .order_by("date")
+        .values_list("id", "sold", "allotment")
+    )
+
+
+def create_booking(package, check_in, check_out, guests, user=None, guest_user=None):
+    """
+    Book a package for [check_in, check_out) in one transaction.
+
+    Nights that only exist through the package's weekday defaults get their daily rows written first.
+    The daily availability rows of the stay are locked with SELECT ... FOR UPDATE in date order, so
+    concurrent bookings of the same package lock nights in the same sequence and cannot deadlock, while
+    bookings of other packages or nights are not blocked. One room per night is then taken with a
+    conditional `sold = sold + 1` update that only matches open nights with rooms left; if any night
+    does not match, the whole booking is rolled back. The stay is priced with the quote engine and the
+    booking is written with all its line items in bulk. The availability index only changes when the
+    booking sells a night out, and is then refreshed after commit (see refresh_runs_after_commit).
+    """
+    nights = stay_nights(check_in, check_out)
+    accommodation = package.room_type.accommodation
+
+    stay_rows = (
+        PackageDailyAvailability.objects.select_for_update()
+        .filter(package=package, date__gte=check_in, date__lt=check_out)
+        .order_by("date")
+        .values_list("id", "sold", "allotment")
+    )
+
+    with transaction.atomic():
+        rows = list(stay_rows)
+        if len(rows) != len(nights):
+            materialize_default_nights(package.id, nights)
+            rows = list(stay_rows.all())
+        row_ids = [row_id for row_id, _, _ in rows]
+        taken = PackageDailyAvailability.objects.filter(
+            id__in=row_ids, status=AvailabilityStatus.OPEN, sold__lt=F("allotment")
+        ).update(sold=F("sold") + 1)
+        if len(rows) != len(nights) or taken != len(nights):
+            raise StayUnavailable("The package is not available for every night of the stay")
+
+        quote = quote_packages([package.id], check_in, check_out)[package.id]
+        if not quote["is_priced"]:
+            raise StayUnavailable("The package has no price for every night of the stay")
+
+        booking = Booking.objects.create(
+            user=user,
+            guest_user=guest_user,
+            package=package,
+            check_in=timezone.make_aware(datetime.combine(check_in, accommodation.check_in or time())),
+            check_out=timezone.make_aware(datetime.combine(check_out, accommodation.check_out or time())),
+            guests=guests,
+        )
+        BookingLineItem.objects.bulk_create(
+            BookingLineItem(
+                booking=booking,
+                daily_availability_id=row_id,
+                retail_price=night["retail_price"],
+                cost_price=night["cost_price"],
+            )
+            for row_id, night in zip(row_ids, quote["nights"])
+        )
+        # update() skips model signals, so refresh the availability index explicitly
+        if any(sold + 1 >= allotment for _, sold, allotment in rows):
+            refresh_runs_after_commit(package.id)
+        apply_booking(
+            booking, 1, [(night["date"], night["retail_price"], night["cost_price"]) for night in quote["nights"]]
+        )
+    return booking
+
+
+def release_booking_inventory(booking):
+    """
+    Give the rooms held by a booking back to its nights, and take its nights out of the revenue rollups.
+
+    A booking releases at most once per hold: holds_inventory is cleared with a conditional update, so a
+    repeated cancel, or a delete after a cancel, finds nothing left to release.
+    """
+    with transaction.atomic():
+        if not Booking.objects.filter(pk=booking.pk, holds_inventory=True).update(holds_inventory=False):
+            return
+        booking.holds_inventory = False
+        rows = list(booking_nights(booking))
+        PackageDailyAvailability.objects.filter(id__in=[row_id for row_id, _, _ in rows]).update(sold=F("sold") - 1)
+        if any(sold >= allotment for _, sold, allotment in rows):
+            refresh_runs_after_commit(booking.package_id)
+        apply_booking(booking, -1)
+
+
+def has_rooms_to_reclaim(booking):
+    """Whether every night of a released booking still has a room left for it (see reclaim_booking_inventory)"""
+    return not PackageDailyAvailability.objects.filter(
+        id__in=booking.line_items.values("daily_availability_id"), sold__gte=F("allotment")
+    ).exists()
+
+
+def reclaim_booking_inventory(booking):
+    """
+    Take the rooms of a released booking back when it returns to a holding status (e.g. cancelled -> approved),
+    and add its nights to the revenue rollups again. Raises StayUnavailable if a night has no room left.
+    """
+    with transaction.atomic():
+        if not Booking.objects.filter(pk=booking.pk, holds_inventory=False).update(holds_inventory=True):
+            return
+        booking.holds_inventory = True
+        rows = list(booking_nights(booking))
+        taken = PackageDailyAvailability.objects.filter(
+            id__in=[row_id for row_id, _, _ in rows], sold__lt=F("allotment")
+        ).update(sold=F("sold") + 1)
+        if taken != len(rows):
+            raise StayUnavailable("A night of the booking has no room left")
+        if any(sold + 1 >= allotment for _, sold, allotment in rows):
+            refresh_runs_after_commit(booking.package_id)
+        apply_booking(booking, 1)
+
+
+def sync_booking_inventory(booking):
+    """
+    Make a booking's hold on the inventory follow its status, before the status is saved: leaving the holding
+    statuses releases its rooms and rollup nights, returning to them takes both back.
+    """
+    holding = booking.status in INVENTORY_HOLDING_STATUSES
+    if booking.pk is None:
+        # create_booking takes the rooms itself; bookings created in other statuses hold nothing
+        booking.holds_inventory = holding
+    elif holding and not booking.holds_inventory:
+        reclaim_booking_inventory(booking)
+    elif not holding and booking.holds_inventory:
+        release_booking_inventory(booking)
@@ -1,13 +1,141 @@
+from django.utils import timezone
+from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
-from .models import Booking
-from users.serializers import PrivateUserSerializer
+from .models import Booking, BookingLineItem
+from packages.models import Package
+from payments.models import Payment
+from users.mixins import PhoneNumberValidationMixin
+from users.models import GuestInfo
+
+
+class BookingListSerializer(ModelSerializer):
+    """Serializer for listing bookings with their summary only"""
+
+    class Meta:
+        model = Booking
+        fields = ["id", "package", "check_in", "check_out", "guests", "status", "created_date"]
+
+
+class BookedPackageSerializer(ModelSerializer):
+    """Serializer for the package of a booking with its room type and accommodation names"""
+
+    room_type = serializers.CharField(source="room_type.name")
+    accommodation = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Package
+        fields = ["id", "name", "room_type", "accommodation"]
+
+    def get_accommodation(self, obj):
+        accommodation = obj.room_type.accommodation
+        return {"id": accommodation.id, "name": accommodation.name}
+
+
+class BookingLineItemSerializer(ModelSerializer):
+    """Serializer for the price charged for one night of a booking"""
+
+    date = serializers.DateField(source="daily_availability.date")
+
+    class Meta:
+        model = BookingLineItem
+        fields = ["date", "retail_price"]
+
+
+class BookingPaymentSerializer(ModelSerializer):
+    """Serializer for a payment made for a booking"""
+
+    class Meta:
+        model = Payment
+        fields = ["amount", "method", "status", "created_date"]
+
+
+class BookingHistorySerializer(ModelSerializer):
+    """Serializer for a user's booking history with package, nightly prices and payments"""
+
+    package = BookedPackageSerializer(read_only=True)
+    line_items = BookingLineItemSerializer(many=True, read_only=True)
+    payments = BookingPaymentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Booking
+        fields = [
+            "id",
+            "status",
+            "check_in",
+            "check_out",
+            "guests",
+            "created_date",
+            "package",
+            "line_items",
+            "payments",
+        ]
 
 
 class BookingDetailSerializer(ModelSerializer):
+    """Serializer for a single booking with its stay totals (annotated by booking_detail_queryset)"""
 
-    user = PrivateUserSerializer()
+    package = BookedPackageSerializer(read_only=True)
+    nights = serializers.IntegerField(read_only=True)
+    total_retail_price = serializers.IntegerField(read_only=True)
+    amount_paid = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Booking
-        fields = "__all__"
+        fields = [
+            "id",
+            "status",
+            "check_in",
+            "check_out",
+            "guests",
+            "created_date",
+            "package",
+            "nights",
+            "total_retail_price",
+            "amount_paid",
+        ]
+
+
+class GuestInfoSerializer(PhoneNumberValidationMixin, ModelSerializer):
+    """Serializer for contact details of a guest booking without an account"""
+
+    class Meta:
+        model = GuestInfo
+        fields = ["first_name", "last_name", "email", "phone_number"]
+        # Returning guests reuse their GuestInfo, so the email uniqueness check happens in get_or_create_guest
+        extra_kwargs = {"email": {"validators": []}}
+
+
+class CreateBookingSerializer(serializers.Serializer):
+    """Serializer for validating a booking request. Guest details are required for anonymous users."""
+
+    package = serializers.IntegerField()
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+    guests = serializers.IntegerField(min_value=1)
+    guest = GuestInfoSerializer(required=False)
+
+    def validate_package(self, value):
+        try:
+            return Package.objects.select_related("room_type__accommodation").get(pk=value, is_active=True)
+        except Package.DoesNotExist:
+            raise serializers.ValidationError("Package not found")
+
+    def validate(self, data):
+        if data["check_in"] >= data["check_out"]:
+            raise serializers.ValidationError({"check_out": "'check_in' must be earlier than 'check_out'"})
+        if data["check_in"] < timezone.now().date():
+            raise serializers.ValidationError({"check_in": "'check_in' must not be in the past"})
+        if data["guests"] > data["package"].room_type.max_occupancy:
+            raise serializers.ValidationError({"guests": "Too many guests for this room type"})
+        if not self.context["request"].user.is_authenticated and "guest" not in data:
+            raise serializers.ValidationError({"guest": "Guest details are required to book without an account"})
+        return data
+
+    def get_or_create_guest(self):
+        """Reuse the GuestInfo of a returning guest, as long as the phone number matches"""
+        details = self.validated_data["guest"]
+        guest, created = GuestInfo.objects.get_or_create(email=details["email"], defaults=details)
+        if not created and guest.phone_number != details["phone_number"]:
+            raise serializers.ValidationError({"guest": "This email is registered with another phone number"})
+        return guest
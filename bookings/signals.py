@@ -0,0 +1,17 @@
+from django.db.models.signals import pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Booking
+from .reservations import release_booking_inventory, sync_booking_inventory
+
+
+@receiver(pre_save, sender=Booking)
+def sync_inventory_with_status(sender, instance, **kwargs):
+    """Release rooms once a booking is cancelled or denied, and take them back if it is reinstated"""
+    sync_booking_inventory(instance)
+
+
+@receiver(pre_delete, sender=Booking)
+def release_inventory_on_delete(sender, instance, **kwargs):
+    if instance.holds_inventory:
+        release_booking_inventory(instance)
@@ -0,0 +1,480 @@
+import pytest
+from datetime import timedelta
+from importlib import import_module
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Booking, BookingLineItem, BookingStatusChoices
+from .reservations import StayUnavailable
+from accommodations.models import Accommodation, City
+from packages.models import AvailabilityStatus, Package, PackageDailyAvailability, PackageWeekdayBasePrice, Weekday
+from payments.models import Payment, PaymentMethod, PaymentStatus
+from room_types.models import RoomType
+from users.models import GuestInfo, User
+
+# ----- Constants -----
+BOOKINGS_URL = "/api/v1/bookings/"
+GUEST_BOOKINGS_URL = f"{BOOKINGS_URL}guest"
+BOOKING_ADMIN_URL = lambda pk: f"/admin/bookings/booking/{pk}/change/"
+backfill_sold_rooms = import_module("bookings.migrations.0007_backfill_sold_rooms").backfill_sold_rooms
+
+
+# ----- Fixtures -----
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_payload():
+    return {
+        "username": "test123",
+        "first_name": "abc",
+        "last_name": "edf",
+        "email": "test123@gmail.com",
+        "phone_number": "01011112222",
+        "password": "test123!",
+    }
+
+
+@pytest.fixture
+def guest_payload():
+    return {"first_name": "guest", "last_name": "kim", "email": "guest@gmail.com", "phone_number": "01033334444"}
+
+
+@pytest.fixture
+def sample_db(db, user_payload):
+    user = User.objects.create_user(**user_payload)
+    city = City.objects.create(name="Seoul")
+    accommodation = Accommodation.objects.create(
+        name="Hotel A", region="seoul", location="123", city=city, type="hotel"
+    )
+    room_type = RoomType.objects.create(accommodation=accommodation, name="Deluxe", base_occupancy=2, max_occupancy=3)
+    package = Package.objects.create(room_type=room_type, name="Room Only", base_price=100000)
+    PackageWeekdayBasePrice.objects.bulk_create(
+        PackageWeekdayBasePrice(package=package, weekday=weekday, retail_price=100000, cost_price=80000)
+        for weekday in Weekday.values
+    )
+    check_in = timezone.now().date() + timedelta(days=7)
+    nights = [
+        PackageDailyAvailability.objects.create(
+            package=package, date=check_in + timedelta(days=offset), retail_price=0, cost_price=0, allotment=2
+        )
+        for offset in range(3)
+    ]
+    nights[1].retail_price, nights[1].cost_price = 150000, 120000
+    nights[1].save()
+    return {"user": user, "package": package, "check_in": check_in, "nights": nights}
+
+
+@pytest.fixture
+def superuser_client(db):
+    admin = User.objects.create_superuser(
+        username="admin",
+        email="admin@gmail.com",
+        first_name="abc",
+        last_name="edf",
+        phone_number="01099998888",
+        password="test123!",
+    )
+    client = APIClient()
+    client.force_login(admin)
+    return client
+
+
+@pytest.fixture
+def authenticated_client(client, sample_db):
+    client.force_login(sample_db["user"])
+    return client
+
+
+def booking_payload(sample_db, nights=3, **overrides):
+    payload = {
+        "package": sample_db["package"].id,
+        "check_in": sample_db["check_in"],
+        "check_out": sample_db["check_in"] + timedelta(days=nights),
+        "guests": 2,
+    }
+    payload.update(overrides)
+    return payload
+
+
+# ----- BookingCollectionView Test -----
+
+
+# Success 1: Logged-in user books every night with priced line items
+@pytest.mark.django_db
+def test_create_booking_success(authenticated_client, sample_db):
+    response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db), format="json")
+
+    assert response.status_code == 201
+    assert response.data["nights"] == 3
+    assert response.data["total_retail_price"] == 350000
+    booking = Booking.objects.get(pk=response.data["id"])
+    assert booking.user == sample_db["user"]
+    assert list(booking.line_items.order_by("daily_availability__date").values_list("retail_price", flat=True)) == [
+        100000,
+        150000,
+        100000,
+    ]
+
+
+# Success 2: Guests book with their contact details and reuse them on the next booking
+@pytest.mark.django_db
+def test_create_booking_as_guest(client, sample_db, guest_payload):
+    first = client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1, guest=guest_payload), format="json")
+    second = client.post(BOOKINGS_URL, booking_payload(sample_db, nights=2, guest=guest_payload), format="json")
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert GuestInfo.objects.count() == 1
+    assert Booking.objects.filter(guest_user__email=guest_payload["email"]).count() == 2
+
+
+# Success 3: Nights without a row are booked from the weekday defaults, which writes their rows
+@pytest.mark.django_db
+def test_create_booking_default_nights(authenticated_client, sample_db):
+    sample_db["package"].weekday_base_prices.update(allotment=4)
+    response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db, nights=5), format="json")
+
+    assert response.status_code == 201
+    assert response.data["total_retail_price"] == 550000
+    rows = PackageDailyAvailability.objects.order_by("date").values_list("allotment", "sold")
+    assert list(rows) == [(2, 1), (2, 1), (2, 1), (4, 1), (4, 1)]
+
+
+# Failure 1: A closed night makes the stay unavailable and nothing is written
+@pytest.mark.django_db
+def test_create_booking_closed_night(authenticated_client, sample_db):
+    closed_night = sample_db["nights"][2]
+    closed_night.status = AvailabilityStatus.CLOSED
+    closed_night.save()
+    response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db), format="json")
+
+    assert response.status_code == 409
+    assert response.data["error"] == "The package is not available for every night of the stay"
+    assert not Booking.objects.exists()
+    assert not BookingLineItem.objects.exists()
+
+
+# Failure 2: Nights without a row or a weekday allotment cannot be booked
+@pytest.mark.django_db
+def test_create_booking_missing_night(authenticated_client, sample_db):
+    response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db, nights=4), format="json")
+
+    assert response.status_code == 409
+
+
+# Failure 3: Anonymous users must send guest details
+@pytest.mark.django_db
+def test_create_booking_guest_details_required(client, sample_db):
+    response = client.post(BOOKINGS_URL, booking_payload(sample_db), format="json")
+
+    assert response.status_code == 400
+    assert "guest" in response.data
+
+
+# Failure 4: Too many guests for the room type
+@pytest.mark.django_db
+def test_create_booking_too_many_guests(authenticated_client, sample_db):
+    response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db, guests=4), format="json")
+
+    assert response.status_code == 400
+    assert "guests" in response.data
+
+
+# Failure 5: Returning guest with a different phone number
+@pytest.mark.django_db
+def test_create_booking_guest_phone_mismatch(client, sample_db, guest_payload):
+    client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1, guest=guest_payload), format="json")
+    guest_payload["phone_number"] = "01055556666"
+    response = client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1, guest=guest_payload), format="json")
+
+    assert response.status_code == 400
+    assert Booking.objects.count() == 1
+
+
+# Failure 6: Sold-out nights cannot be oversold
+@pytest.mark.django_db
+def test_create_booking_sold_out(authenticated_client, sample_db, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True) as first:
+        response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db), format="json")
+        assert response.status_code == 201
+    # Nights with rooms left keep their runs, so nothing is rebuilt
+    assert not first
+    with django_capture_on_commit_callbacks(execute=True) as second:
+        response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db), format="json")
+        assert response.status_code == 201
+    assert len(second) == 1
+    response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1), format="json")
+
+    assert response.status_code == 409
+    assert list(PackageDailyAvailability.objects.values_list("sold", flat=True)) == [2, 2, 2]
+    assert not sample_db["package"].availability_runs.exists()
+
+
+# ----- Inventory release Test -----
+
+
+# Success: Cancelling a booking gives its rooms back
+@pytest.mark.django_db
+def test_cancel_booking_releases_inventory(authenticated_client, sample_db):
+    response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db, nights=2), format="json")
+    booking = Booking.objects.get(pk=response.data["id"])
+    assert list(PackageDailyAvailability.objects.order_by("date").values_list("sold", flat=True)) == [1, 1, 0]
+
+    booking.status = BookingStatusChoices.CANCELLED
+    booking.save()
+
+    assert list(PackageDailyAvailability.objects.values_list("sold", flat=True)) == [0, 0, 0]
+
+
+# Failure: A cancelled booking cannot hold or release its rooms a second time
+@pytest.mark.django_db
+def test_cancelled_booking_releases_once(authenticated_client, client, sample_db, guest_payload):
+    night = sample_db["nights"][0]
+    night.allotment = 1
+    night.save()
+    first = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1), format="json")
+    booking = Booking.objects.get(pk=first.data["id"])
+    booking.status = BookingStatusChoices.CANCELLED
+    booking.save()
+    second = client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1, guest=guest_payload), format="json")
+    assert second.status_code == 201
+
+    response = authenticated_client.post(f"{BOOKINGS_URL}{booking.pk}/request-cancel")
+    assert response.status_code == 400
+    booking.refresh_from_db()
+    assert booking.status == BookingStatusChoices.CANCELLED
+    booking.save()
+    booking.delete()
+
+    night.refresh_from_db()
+    assert night.sold == 1
+    response = client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1, guest=guest_payload), format="json")
+    assert response.status_code == 409
+
+
+# Failure: A cancelled booking cannot be reinstated once its night has sold out
+@pytest.mark.django_db
+def test_reinstate_booking_sold_out(authenticated_client, client, sample_db, guest_payload):
+    night = sample_db["nights"][0]
+    night.allotment = 1
+    night.save()
+    first = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1), format="json")
+    booking = Booking.objects.get(pk=first.data["id"])
+    booking.status = BookingStatusChoices.CANCELLED
+    booking.save()
+    client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1, guest=guest_payload), format="json")
+
+    booking.status = BookingStatusChoices.APPROVED
+    with pytest.raises(StayUnavailable):
+        booking.save()
+
+    booking.refresh_from_db()
+    assert (booking.status, booking.holds_inventory) == (BookingStatusChoices.CANCELLED, False)
+    night.refresh_from_db()
+    assert night.sold == 1
+
+
+# Success: Bookings made before daily inventory existed are counted by the backfill migration
+@pytest.mark.django_db
+def test_backfill_sold_rooms(authenticated_client, client, sample_db, guest_payload):
+    night = sample_db["nights"][0]
+    night.allotment = 3
+    night.save()
+    held = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1), format="json")
+    client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1, guest=guest_payload), format="json")
+    cancelled = client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1, guest=guest_payload), format="json")
+    Booking.objects.filter(pk=cancelled.data["id"]).update(
+        status=BookingStatusChoices.CANCELLED, holds_inventory=False
+    )
+    # Rows as the inventory migration left them
+    PackageDailyAvailability.objects.update(sold=0, allotment=1)
+
+    backfill_sold_rooms(apps, None)
+
+    night.refresh_from_db()
+    assert (night.sold, night.allotment) == (2, 2)
+    assert list(PackageDailyAvailability.objects.order_by("date").values_list("sold", "allotment"))[1:] == [
+        (0, 1),
+        (0, 1),
+    ]
+    booking = Booking.objects.get(pk=held.data["id"])
+    booking.status = BookingStatusChoices.CANCELLED
+    booking.save()
+    night.refresh_from_db()
+    assert night.sold == 1
+
+
+# Failure: The inventory flag cannot be edited in the admin
+@pytest.mark.django_db
+def test_admin_holds_inventory_read_only(authenticated_client, superuser_client, sample_db):
+    response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db), format="json")
+
+    response = superuser_client.get(BOOKING_ADMIN_URL(response.data["id"]))
+    assert response.status_code == 200
+    assert 'name="holds_inventory"' not in response.content.decode()
+
+
+# Failure: The admin reports a reinstatement onto a sold-out night instead of failing
+@pytest.mark.django_db
+def test_admin_reinstate_booking_sold_out(authenticated_client, client, superuser_client, sample_db, guest_payload):
+    night = sample_db["nights"][0]
+    night.allotment = 1
+    night.save()
+    response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1), format="json")
+    booking = Booking.objects.get(pk=response.data["id"])
+    booking.status = BookingStatusChoices.CANCELLED
+    booking.save()
+    client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1, guest=guest_payload), format="json")
+
+    check_in, check_out = timezone.localtime(booking.check_in), timezone.localtime(booking.check_out)
+    response = superuser_client.post(
+        BOOKING_ADMIN_URL(booking.pk),
+        {
+            "user": booking.user_id,
+            "guest_user": "",
+            "package": booking.package_id,
+            "check_in_0": check_in.date(),
+            "check_in_1": check_in.time(),
+            "check_out_0": check_out.date(),
+            "check_out_1": check_out.time(),
+            "guests": booking.guests,
+            "status": BookingStatusChoices.APPROVED,
+        },
+    )
+
+    assert response.status_code == 200
+    assert "A night of the booking has no room left" in response.content.decode()
+    booking.refresh_from_db()
+    assert booking.status == BookingStatusChoices.CANCELLED
+
+
+# ----- Guest access Tests -----
+
+
+@pytest.fixture
+def guest_bookings(client, sample_db, guest_payload):
+    ids = []
+    for nights in (1, 2):
+        payload = booking_payload(sample_db, nights=nights, guest=guest_payload)
+        response = client.post(BOOKINGS_URL, payload, format="json")
+        assert response.status_code == 201
+        ids.append(response.data["id"])
+    return ids
+
+
+# Success 1: Booking, guest, package and stay totals are loaded in a single query
+@pytest.mark.django_db
+def test_guest_booking_detail_single_query(client, guest_bookings, guest_payload, django_assert_num_queries):
+    Payment.objects.create(booking_id=guest_bookings[1], amount=100000, method=PaymentMethod.CARD)
+    Payment.objects.create(
+        booking_id=guest_bookings[1], amount=150000, method=PaymentMethod.POINTS, status=PaymentStatus.COMPLETED
+    )
+    url = f"{BOOKINGS_URL}{guest_bookings[1]}?phone={guest_payload['phone_number']}"
+
+    with django_assert_num_queries(1):
+        response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.data["nights"] == 2
+    assert response.data["total_retail_price"] == 250000
+    # Only completed payments count as paid
+    assert response.data["amount_paid"] == 150000
+    assert response.data["package"]["room_type"] == "Deluxe"
+
+
+# Success 2: A guest lists their own bookings newest first
+@pytest.mark.django_db
+def test_guest_booking_list(client, guest_bookings, guest_payload):
+    response = client.get(
+        GUEST_BOOKINGS_URL, {"phone": guest_payload["phone_number"], "email": guest_payload["email"], "page_size": 1}
+    )
+    ids = [item["id"] for item in response.data["data"]]
+    while response.data["next"]:
+        response = client.get(response.data["next"])
+        ids += [item["id"] for item in response.data["data"]]
+
+    assert response.status_code == 200
+    assert ids == guest_bookings[::-1]
+
+
+# Failure 1: Wrong phone number for the booking
+@pytest.mark.django_db
+def test_guest_booking_detail_wrong_phone(client, guest_bookings):
+    response = client.get(f"{BOOKINGS_URL}{guest_bookings[0]}", {"phone": "01099999999"})
+    assert response.status_code == 403
+
+
+# Failure 2: Phone number without the matching email lists nothing
+@pytest.mark.django_db
+def test_guest_booking_list_wrong_email(client, guest_bookings, guest_payload):
+    response = client.get(GUEST_BOOKINGS_URL, {"phone": guest_payload["phone_number"], "email": "other@gmail.com"})
+    assert response.status_code == 403
+
+
+# Failure 3: Both credentials are required
+@pytest.mark.django_db
+def test_guest_booking_list_missing_credentials(client, guest_bookings, guest_payload):
+    response = client.get(GUEST_BOOKINGS_URL, {"phone": guest_payload["phone_number"]})
+    assert response.status_code == 400
+
+
+# ----- Booking history Tests -----
+
+
+# Success 1: Newest first, with a query count that does not grow with the page size
+@pytest.mark.django_db
+def test_booking_history(authenticated_client, sample_db, django_assert_num_queries):
+    ids = []
+    for nights in (1, 2, 1):
+        response = authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db, nights=nights), format="json")
+        ids.append(response.data["id"])
+        PackageDailyAvailability.objects.update(sold=0)
+    Payment.objects.create(booking_id=ids[0], amount=100000, method=PaymentMethod.CARD)
+
+    # session + user, bookings with package/room type/accommodation, line items, payments
+    for page_size in (1, 3):
+        with django_assert_num_queries(5):
+            response = authenticated_client.get(BOOKINGS_URL, {"page_size": page_size})
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.data["data"]] == ids[::-1]
+    oldest = response.data["data"][-1]
+    assert oldest["package"]["accommodation"]["name"] == "Hotel A"
+    assert [night["date"] for night in oldest["line_items"]] == [str(sample_db["check_in"])]
+    assert oldest["payments"][0]["amount"] == 100000
+
+
+# Success 2: Bookings created in the same instant are paged on (created_date, id), without an OFFSET
+@pytest.mark.django_db
+def test_booking_history_keyset(authenticated_client, sample_db):
+    for _ in range(4):
+        authenticated_client.post(BOOKINGS_URL, booking_payload(sample_db, nights=1), format="json")
+        PackageDailyAvailability.objects.update(sold=0)
+    Booking.objects.update(created_date=timezone.now())
+    expected = list(Booking.objects.order_by("-id").values_list("id", flat=True))
+
+    pages = [authenticated_client.get(BOOKINGS_URL, {"page_size": 1})]
+    with CaptureQueriesContext(connection) as queries:
+        while pages[-1].data["next"]:
+            pages.append(authenticated_client.get(pages[-1].data["next"]))
+    assert [item["id"] for page in pages for item in page.data["data"]] == expected
+    assert not any("OFFSET" in query["sql"] for query in queries.captured_queries)
+
+    # Walking back from the last page returns the same pages
+    previous = pages[-1]
+    for page in reversed(pages[:-1]):
+        previous = authenticated_client.get(previous.data["previous"])
+        assert previous.data["data"] == page.data["data"]
+
+
+# Failure: Guests have no history to list
+@pytest.mark.django_db
+def test_booking_history_requires_login(client, sample_db):
+    response = client.get(BOOKINGS_URL)
+    assert response.status_code == 403
@@ -2,6 +2,8 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    path("", views.BookingCollectionView.as_view()),  # GET, POST
+    path("guest", views.GuestBookingListView.as_view()),
     path("<int:pk>", views.BookingDetailView.as_view()),
     path("<int:pk>/request-cancel", views.BookingCancelRequestView.as_view()),
 ]
@@ -1,32 +1,146 @@
+from django.db import transaction
+from django.db.models import Count, OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils.crypto import constant_time_compare
 from rest_framework import generics
 from rest_framework.views import APIView
-from rest_framework.exceptions import PermissionDenied, NotFound
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied, NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Booking, BookingStatusChoices
-from .serializers import BookingDetailSerializer
+from .models import INVENTORY_HOLDING_STATUSES, Booking, BookingLineItem, BookingStatusChoices
+from .reservations import StayUnavailable, create_booking
+from .serializers import (
+    BookingDetailSerializer,
+    BookingHistorySerializer,
+    BookingListSerializer,
+    CreateBookingSerializer,
+)
+from common.pagination import RecentCursorPagination
+from payments.models import Payment, PaymentStatus
+from users.models import GuestInfo
 
 
-def get_booking_for_user_or_guest(request, booking_id):
+def booking_detail_queryset():
+    """Bookings with their package and stay totals (nights, total retail price, amount paid) computed in one query"""
+    line_items = BookingLineItem.objects.filter(booking=OuterRef("pk")).values("booking")
+    payments = Payment.objects.filter(booking=OuterRef("pk"), status=PaymentStatus.COMPLETED).values("booking")
+    # Correlated subqueries, so joining both tables cannot multiply each other's rows
+    return Booking.objects.select_related("guest_user", "package__room_type__accommodation").annotate(
+        nights=Coalesce(Subquery(line_items.annotate(total=Count("id")).values("total")), 0),
+        total_retail_price=Coalesce(Subquery(line_items.annotate(total=Sum("retail_price")).values("total")), 0),
+        amount_paid=Coalesce(Subquery(payments.annotate(total=Sum("amount")).values("total")), 0),
+    )
+
+
+def get_booking_for_user_or_guest(request, booking_id, queryset=None):
     """Retrieve a booking for authenticated users or guest with phone verification"""
+    queryset = Booking.objects.all() if queryset is None else queryset
     try:
-        booking = Booking.objects.get(pk=booking_id)
+        # The guest is loaded with the booking so verifying the phone number costs no extra query
+        booking = queryset.select_related("guest_user").get(pk=booking_id)
     except Booking.DoesNotExist:
         raise NotFound("Booking not found.")
 
     # Logged-in user: can only access their own bookings
     if request.user.is_authenticated:
-        if request.user != booking.user:
+        if request.user.pk != booking.user_id:
             raise PermissionDenied("You do not have permission to view this booking.")
         return booking
 
-    # Guest access: must provide phone number
+    # Guest access: must provide phone number, compared in constant time
     guest_phone = request.query_params.get("phone")
-    if not guest_phone or not booking.guest_user or guest_phone != booking.guest_user.phone_number:
+    guest = booking.guest_user
+    if not guest_phone or not guest or not constant_time_compare(guest_phone, guest.phone_number):
         raise PermissionDenied("Invalid guest credentials")
     return booking
 
 
+def get_guest_ids(phone, email):
+    """Ids of the guests with this phone number (indexed) whose email matches, compared in constant time"""
+    candidates = GuestInfo.objects.filter(phone_number=phone).values_list("id", "email")
+    return [
+        guest_id for guest_id, guest_email in candidates if constant_time_compare(email.lower(), guest_email.lower())
+    ]
+
+
+def booking_history_queryset():
+    """Bookings with everything BookingHistorySerializer reads, loaded in a constant number of queries"""
+    return Booking.objects.select_related("package__room_type__accommodation").prefetch_related(
+        Prefetch(
+            "line_items",
+            queryset=BookingLineItem.objects.select_related("daily_availability").order_by("daily_availability__date"),
+        ),
+        "payments",
+    )
+
+
+class BookingCollectionView(APIView):
+    """
+    GET: List the logged-in user's bookings, newest first, page by page
+    POST: Book a package for a stay (both logged-in and guest users)
+    """
+
+    permission_classes = []  # allow both logged-in and guest users
+
+    def get(self, request):
+        if not request.user.is_authenticated:
+            raise NotAuthenticated()
+
+        paginator = RecentCursorPagination()
+        page = paginator.paginate_queryset(booking_history_queryset().filter(user=request.user), request, view=self)
+        serializer = BookingHistorySerializer(page, many=True)
+        return Response(
+            {"next": paginator.get_next_link(), "previous": paginator.get_previous_link(), "data": serializer.data},
+            status=status.HTTP_200_OK,
+        )
+
+    def post(self, request):
+        serializer = CreateBookingSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        user = request.user if request.user.is_authenticated else None
+        try:
+            with transaction.atomic():
+                guest_user = None if user else serializer.get_or_create_guest()
+                booking = create_booking(
+                    data["package"],
+                    data["check_in"],
+                    data["check_out"],
+                    data["guests"],
+                    user=user,
+                    guest_user=guest_user,
+                )
+        except StayUnavailable as error:
+            return Response({"error": str(error)}, status=status.HTTP_409_CONFLICT)
+        booking = booking_detail_queryset().get(pk=booking.pk)
+        return Response(BookingDetailSerializer(booking).data, status=status.HTTP_201_CREATED)
+
+
+class GuestBookingListView(APIView):
+    """List a guest's own bookings, newest first, page by page. Guests prove ownership with phone number and email."""
+
+    permission_classes = []  # guests have no account
+
+    def get(self, request):
+        phone = request.query_params.get("phone")
+        email = request.query_params.get("email")
+        if not phone or not email:
+            raise ValidationError({"error": "'phone' and 'email' are required"})
+
+        guest_ids = get_guest_ids(phone, email)
+        if not guest_ids:
+            raise PermissionDenied("Invalid guest credentials")
+
+        paginator = RecentCursorPagination()
+        page = paginator.paginate_queryset(Booking.objects.filter(guest_user_id__in=guest_ids), request, view=self)
+        serializer = BookingListSerializer(page, many=True)
+        return Response(
+            {"next": paginator.get_next_link(), "previous": paginator.get_previous_link(), "data": serializer.data},
+            status=status.HTTP_200_OK,
+        )
+
+
 class BookingDetailView(generics.RetrieveAPIView):
     """Retrieve a single booking (both logged-in and guest users)"""
 
@@ -35,7 +149,7 @@ class BookingDetailView(generics.RetrieveAPIView):
     permission_classes = []  # allow both logged-in and guest users
 
     def get_object(self):
-        return get_booking_for_user_or_guest(self.request, self.kwargs["pk"])
+        return get_booking_for_user_or_guest(self.request, self.kwargs["pk"], booking_detail_queryset())
 
 
 class BookingCancelRequestView(APIView):
@@ -48,6 +162,9 @@ class BookingCancelRequestView(APIView):
 
         if booking.status == BookingStatusChoices.CANCEL_REQUESTED:
             return Response({"detail": "Already requested cancellation."}, status=status.HTTP_400_BAD_REQUEST)
+        # A cancelled or denied booking holds no rooms, so it cannot go back to cancel_requested
+        if booking.status not in INVENTORY_HOLDING_STATUSES:
+            return Response({"detail": "Only active bookings can be cancelled."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Change status
         booking.status = BookingStatusChoices.CANCEL_REQUESTED
@@ -0,0 +1,98 @@
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination over the primary key, so deep pages cost the same as the first one"""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "id"
+
+
+class KeysetCursorPagination(IdCursorPagination):
+    """
+    Cursor pagination on every field of the ordering, which must end with a unique field.
+
+    DRF's CursorPagination only filters on the first ordering field and steps over ties with an OFFSET, so
+    an ordering whose first field has few distinct values (most accommodations have 0 saves) degrades to
+    offset pagination. Here the cursor holds the full key of the last row, and a page is a range scan on
+    (a < x) OR (a = x AND b < y), bounded by a <= x so the leading index column is still used.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, position = (self.cursor.reverse, self.cursor.position) if self.cursor else (False, None)
+
+        queryset = queryset.order_by(*(self.reversed_ordering() if reverse else self.ordering))
+        if position is not None:
+            queryset = queryset.filter(self.after(self.decode_position(position), reverse))
+
+        # One extra row tells whether another page follows
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        following = None
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = position is not None, position
+            self.has_previous, self.previous_position = following is not None, following
+        else:
+            self.has_next, self.next_position = following is not None, following
+            self.has_previous, self.previous_position = position is not None, position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def reversed_ordering(self):
+        return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in self.ordering)
+
+    def after(self, values, reverse):
+        """Rows strictly past the key `values` in the direction of the page"""
+        condition, equal = Q(), {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") != reverse else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        first = self.ordering[0]
+        bound = "lte" if first.startswith("-") != reverse else "gte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": values[0]}) & condition
+
+    def decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps([getattr(instance, field.lstrip("-")) for field in ordering], default=str)
+
+
+class PopularityCursorPagination(KeysetCursorPagination):
+    """Most saved first, paged on (wishlist_count, id) so equal counts do not fall back to an OFFSET"""
+
+    ordering = ("-wishlist_count", "-id")
+
+
+class RecentCursorPagination(KeysetCursorPagination):
+    """Newest first, paged on (created_date, id) so rows created in the same instant do not need an OFFSET"""
+
+    ordering = ("-created_date", "-id")
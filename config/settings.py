@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -89,15 +90,81 @@ WSGI_APPLICATION = "config.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# SQLite by default; set DJANGO_DB_ENGINE=django.db.backends.postgresql (needs psycopg) and the
+# DJANGO_DB_* connection variables to run on Postgres
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": os.environ.get("DJANGO_DB_ENGINE", "django.db.backends.sqlite3"),
+        "NAME": os.environ.get("DJANGO_DB_NAME", BASE_DIR / "db.sqlite3"),
+        "USER": os.environ.get("DJANGO_DB_USER", ""),
+        "PASSWORD": os.environ.get("DJANGO_DB_PASSWORD", ""),
+        "HOST": os.environ.get("DJANGO_DB_HOST", ""),
+        "PORT": os.environ.get("DJANGO_DB_PORT", ""),
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory by default; point DJANGO_CACHE_BACKEND/DJANGO_CACHE_LOCATION at any other backend (e.g. redis)
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", "tour-backend"),
+    },
+    # Only used by the cached_db session engine; a file cache works too (FileBasedCache + a directory)
+    "sessions": {
+        "BACKEND": os.environ.get("DJANGO_SESSION_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("DJANGO_SESSION_CACHE_LOCATION", "tour-backend-sessions"),
+    },
+    # Token denylist and authenticated users (users.tokens), kept apart from the public response cache
+    "auth-tokens": {
+        "BACKEND": os.environ.get("DJANGO_AUTH_TOKEN_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("DJANGO_AUTH_TOKEN_CACHE_LOCATION", "tour-backend-auth-tokens"),
+    },
+}
+
+# Serialized accommodation detail/list responses
+ACCOMMODATION_CACHE_ALIAS = "default"
+ACCOMMODATION_CACHE_TIMEOUT = 60 * 60
+
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/#configuring-the-session-engine
+# DJANGO_SESSION_ENGINE: "db" (one session read per authenticated request), "cached_db" (reads served from
+# the "sessions" cache, writes go through to the database) or "signed_cookies" (no server-side storage,
+# so a logout cannot revoke a copied cookie). With a per-process cache such as locmem, cached_db only
+# suits single-process deployments, because a logout only evicts the session from its own process.
+
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get("DJANGO_SESSION_ENGINE", "db")]
+SESSION_CACHE_ALIAS = "sessions"
+# Only write the session when it was modified
+SESSION_SAVE_EVERY_REQUEST = False
+
+# API authentication
+# Session auth stays first so existing clients keep their behaviour; API clients can send
+# "Authorization: Bearer <access token>" from /api/v1/users/token instead (see users.tokens).
+# The token denylist and user cache must live in a cache shared by every worker in production.
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "rest_framework.authentication.SessionAuthentication",
+        "users.authentication.SignedTokenAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+}
+
+AUTH_TOKEN_CACHE_ALIAS = "auth-tokens"
+AUTH_TOKEN_ACCESS_LIFETIME = int(os.environ.get("DJANGO_AUTH_TOKEN_ACCESS_LIFETIME", 5 * 60))
+AUTH_TOKEN_REFRESH_LIFETIME = int(os.environ.get("DJANGO_AUTH_TOKEN_REFRESH_LIFETIME", 14 * 24 * 60 * 60))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -117,6 +184,32 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+# DJANGO_PASSWORD_HASHER picks the hasher for new passwords ("pbkdf2", "scrypt" or "argon2", which needs
+# argon2-cffi); the others stay listed so existing hashes keep verifying and are upgraded after login.
+# Cost parameters default to Django's own and can be lowered per deployment tier.
+
+PASSWORD_HASHER_CLASSES = {
+    "pbkdf2": "users.hashers.TunedPBKDF2PasswordHasher",
+    "scrypt": "users.hashers.TunedScryptPasswordHasher",
+    "argon2": "users.hashers.TunedArgon2PasswordHasher",
+}
+PASSWORD_HASHER = os.environ.get("DJANGO_PASSWORD_HASHER", "pbkdf2")
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + [
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get("DJANGO_PBKDF2_ITERATIONS", 1_000_000))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get("DJANGO_SCRYPT_WORK_FACTOR", 2**14))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get("DJANGO_ARGON2_TIME_COST", 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get("DJANGO_ARGON2_MEMORY_COST", 102400))
+
+# Threads that upgrade outdated hashes after a successful login
+PASSWORD_REHASH_WORKERS = int(os.environ.get("DJANGO_PASSWORD_REHASH_WORKERS", 1))
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -5,6 +5,8 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/v1/users/", include("users.urls")),
     path("api/v1/accommodations/", include("accommodations.urls")),
+    path("api/v1/packages/", include("packages.urls")),
     path("api/v1/wishlists/", include("wishlists.urls")),
     path("api/v1/bookings/", include("bookings.urls")),
+    path("api/v1/payments/", include("payments.urls")),
 ]
@@ -5,11 +5,14 @@ from .models import Package, PackageDailyAvailability
 @admin.register(Package)
 class PackageAdmin(admin.ModelAdmin):
     list_display = ["__str__", "base_price"]
-    list_filter = ["room_type__accommodation__name"]
+    list_filter = ["room_type__accommodation"]
+    list_select_related = ["room_type__accommodation"]
     search_fields = ["name", "room_type__name", "room_type__accommodation__name"]
 
 
 @admin.register(PackageDailyAvailability)
 class PackageDailyAvailabilityAdmin(admin.ModelAdmin):
-    list_display = ["__str__", "retail_price", "cost_price"]
-    search_fields = ["package"]
+    list_display = ["__str__", "retail_price", "cost_price", "allotment", "sold"]
+    list_select_related = ["package__room_type__accommodation"]
+    search_fields = ["package__name", "package__room_type__name", "package__room_type__accommodation__name"]
+    show_full_result_count = False
@@ -0,0 +1,201 @@
+"""
+Sparse daily availability and its run-length search index.
+
+A night of a package is described by its PackageDailyAvailability row when there is one, otherwise by
+the package's weekday defaults (PackageWeekdayBasePrice): the weekday price, open, with the weekday
+allotment. Only overrides, closures and booked nights need rows, so a package priced by weekday keeps
+no rows for the nights nobody touched. Booking a default night writes its row first.
+
+Search never looks at the nights themselves. rebuild_availability_runs() collapses the open nights of a
+package into PackageAvailabilityRun rows, so a stay is one indexed EXISTS whatever the storage. Default
+nights are only expanded up to AVAILABILITY_HORIZON_DAYS ahead, which keeps the index finite. The
+horizon moves with the calendar, so the rebuild_availability_runs command must run daily.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import BooleanField, Exists, ExpressionWrapper, F, OuterRef, Q
+from django.db.models.functions import ExtractWeekDay
+from django.utils import timezone
+
+from .models import (
+    AvailabilityStatus,
+    Package,
+    PackageAvailabilityRun,
+    PackageDailyAvailability,
+    PackageWeekdayBasePrice,
+    Weekday,
+)
+
+# Keeps `id__in` lookups below SQLite's bound-parameter limit
+REBUILD_CHUNK_SIZE = 500
+# How far ahead nights without a row are offered from the weekday defaults
+AVAILABILITY_HORIZON_DAYS = 365
+
+IS_OPEN = ExpressionWrapper(Q(status=AvailabilityStatus.OPEN, sold__lt=F("allotment")), output_field=BooleanField())
+
+
+def availability_horizon():
+    """The [start, end) window in which nights without a row are open on their weekday defaults"""
+    today = timezone.localdate()
+    return today, today + timedelta(days=AVAILABILITY_HORIZON_DAYS)
+
+
+def build_open_runs(open_dates):
+    """Collapse sorted open nights into [start, end) runs"""
+    runs = []
+    for day in open_dates:
+        if runs and runs[-1][1] == day:
+            runs[-1][1] = day + timedelta(days=1)
+        else:
+            runs.append([day, day + timedelta(days=1)])
+    return runs
+
+
+def open_nights(row_nights, open_weekdays, horizon):
+    """
+    Sorted open nights of one package: nights whose row is open, plus the nights of the horizon that have
+    no row and fall on a weekday with a default allotment. row_nights maps each night with a row to
+    whether that row is open.
+    """
+    nights = {day for day, is_open in row_nights.items() if is_open}
+    if open_weekdays:
+        day, end = horizon
+        while day < end:
+            if day not in row_nights and Weekday.from_date(day) in open_weekdays:
+                nights.add(day)
+            day += timedelta(days=1)
+    return sorted(nights)
+
+
+def open_rows_beyond_horizon(package_ids, horizon):
+    """Daily rows outside the horizon that are open with rooms left, scanned through daily_open_night_idx"""
+    return PackageDailyAvailability.objects.filter(
+        Q(date__lt=horizon[0]) | Q(date__gte=horizon[1]),
+        package_id__in=package_ids,
+        status=AvailabilityStatus.OPEN,
+        sold__lt=F("allotment"),
+    )
+
+
+def horizon_rows(package_ids, horizon):
+    """Every daily row of the horizon, open or not, since closed rows there mask the weekday defaults"""
+    return PackageDailyAvailability.objects.filter(
+        package_id__in=package_ids, date__gte=horizon[0], date__lt=horizon[1]
+    )
+
+
+def rebuild_availability_runs(package_ids):
+    """
+    Recompute the run-length availability index of the given packages from their daily rows and weekday defaults.
+
+    A night with a row counts as open when its status is open and it still has rooms left. The package rows are
+    locked while their runs are replaced, so concurrent rebuilds of the same package cannot interleave.
+    """
+    package_ids = sorted(set(package_ids))
+    horizon = availability_horizon()
+    for start in range(0, len(package_ids), REBUILD_CHUNK_SIZE):
+        chunk = package_ids[start : start + REBUILD_CHUNK_SIZE]
+        with transaction.atomic():
+            list(Package.objects.select_for_update().filter(id__in=chunk).order_by("id").values_list("id"))
+
+            open_weekdays = defaultdict(set)
+            defaults = PackageWeekdayBasePrice.objects.filter(package_id__in=chunk, allotment__gt=0)
+            for package_id, weekday in defaults.values_list("package_id", "weekday"):
+                open_weekdays[package_id].add(weekday)
+
+            # Two queries rather than one OR, so each is served by an index
+            row_nights = defaultdict(dict)
+            for package_id, day in open_rows_beyond_horizon(chunk, horizon).values_list("package_id", "date"):
+                row_nights[package_id][day] = True
+            for package_id, day, is_open in horizon_rows(chunk, horizon).values_list("package_id", "date", IS_OPEN):
+                row_nights[package_id][day] = is_open
+
+            runs = [
+                PackageAvailabilityRun(package_id=package_id, start_date=run_start, end_date=run_end)
+                for package_id in chunk
+                for run_start, run_end in build_open_runs(
+                    open_nights(row_nights[package_id], open_weekdays[package_id], horizon)
+                )
+            ]
+            PackageAvailabilityRun.objects.filter(package_id__in=chunk).delete()
+            PackageAvailabilityRun.objects.bulk_create(runs, batch_size=1000)
+
+
+def open_for_stay(check_in, check_out):
+    """Subquery expression matching packages that are open on every night in [check_in, check_out)"""
+    return Exists(
+        PackageAvailabilityRun.objects.filter(
+            package=OuterRef("pk"),
+            start_date__lte=check_in,
+            end_date__gte=check_out,
+        )
+    )
+
+
+def materialize_default_nights(package_id, nights):
+    """
+    Write the daily rows of nights that exist only through the package's weekday defaults, so they can be
+    locked and booked. The rows carry no price override and the weekday allotment. Nights outside the
+    horizon, or on a weekday without a default allotment, stay without a row.
+    """
+    horizon_start, horizon_end = availability_horizon()
+    allotments = dict(
+        PackageWeekdayBasePrice.objects.filter(package_id=package_id, allotment__gt=0).values_list(
+            "weekday", "allotment"
+        )
+    )
+    PackageDailyAvailability.objects.bulk_create(
+        [
+            PackageDailyAvailability(
+                package_id=package_id,
+                date=day,
+                retail_price=0,
+                cost_price=0,
+                allotment=allotments[Weekday.from_date(day)],
+            )
+            for day in nights
+            if horizon_start <= day < horizon_end and Weekday.from_date(day) in allotments
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def redundant_daily_rows():
+    """
+    Daily rows of the horizon, or before it, that say nothing their weekday defaults do not: open, nothing
+    sold, no booking line items, the weekday allotment and no price override (or the weekday prices).
+    """
+    defaults = PackageWeekdayBasePrice.objects.filter(
+        package=OuterRef("package"), weekday=OuterRef("weekday"), allotment=OuterRef("allotment")
+    )
+    return (
+        PackageDailyAvailability.objects.filter(
+            status=AvailabilityStatus.OPEN,
+            sold=0,
+            date__lt=availability_horizon()[1],
+            bookinglineitem__isnull=True,
+        )
+        # ExtractWeekDay counts from 1 = Sunday, Weekday from 0 = Sunday
+        .annotate(weekday=ExtractWeekDay("date") - 1)
+        .filter(Exists(defaults))
+        .filter(
+            # Either price at zero means "use the weekday prices"
+            Q(retail_price=0)
+            | Q(cost_price=0)
+            | Exists(defaults.filter(retail_price=OuterRef("retail_price"), cost_price=OuterRef("cost_price")))
+        )
+    )
+
+
+def prune_redundant_rows(batch_size=REBUILD_CHUNK_SIZE):
+    """Delete redundant_daily_rows() in batches and refresh the touched packages. Returns the number deleted."""
+    deleted, touched = 0, set()
+    while batch := list(redundant_daily_rows().order_by("id").values_list("id", "package_id")[:batch_size]):
+        with transaction.atomic():
+            deleted += PackageDailyAvailability.objects.filter(id__in=[row_id for row_id, _ in batch]).delete()[0]
+        touched.update(package_id for _, package_id in batch)
+    rebuild_availability_runs(touched)
+    return deleted
@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+from django.db import transaction
+
+from .availability import rebuild_availability_runs
+from .models import PackageDailyAvailability, PackageWeekdayBasePrice, Weekday
+
+UPSERT_BATCH_SIZE = 2000
+# allotment is optional in updates: rows without it keep their current room count
+UPDATE_FIELDS = ["retail_price", "cost_price", "status", "allotment"]
+# allotment is optional here too: weekday records without it keep the current default room count
+WEEKDAY_UPDATE_FIELDS = ["retail_price", "cost_price", "allotment"]
+
+
+class AllotmentBelowSold(Exception):
+    """Raised when an update would leave fewer rooms for sale than have already been booked"""
+
+
+def expand_calendar_entries(entries):
+    """Yield one daily row per night of each entry's inclusive [start_date, end_date] range"""
+    for entry in entries:
+        day = entry["start_date"]
+        while day <= entry["end_date"]:
+            row = {
+                "package_id": entry["package"],
+                "date": day,
+                "retail_price": entry["retail_price"],
+                "cost_price": entry["cost_price"],
+                "status": entry["status"],
+            }
+            if "allotment" in entry:
+                row["allotment"] = entry["allotment"]
+            yield row
+            day += timedelta(days=1)
+
+
+def write_daily_batch(batch, counts):
+    """
+    Write one batch of daily rows keyed by (package_id, date), tally them and return the touched package ids.
+    A new row without an allotment takes the weekday allotment of its night, so a price-only edit of a default
+    night keeps its rooms; the model default only applies on weekdays without one.
+    """
+    package_ids = {package_id for package_id, _ in batch}
+    dates = [day for _, day in batch]
+    existing = {
+        (row.package_id, row.date): row
+        for row in PackageDailyAvailability.objects.filter(
+            package_id__in=package_ids, date__gte=min(dates), date__lte=max(dates)
+        ).only("id", "package_id", "date", "sold", *UPDATE_FIELDS)
+    }
+
+    weekday_allotments = {}
+    if any(key not in existing and "allotment" not in values for key, values in batch.items()):
+        weekday_allotments = {
+            (package_id, weekday): allotment
+            for package_id, weekday, allotment in PackageWeekdayBasePrice.objects.filter(
+                package_id__in=package_ids, allotment__gt=0
+            ).values_list("package_id", "weekday", "allotment")
+        }
+
+    to_create, to_update = [], []
+    for key, values in batch.items():
+        row = existing.get(key)
+        if row is None:
+            row = PackageDailyAvailability(package_id=key[0], date=key[1], **values)
+            if "allotment" not in values:
+                row.allotment = weekday_allotments.get((key[0], Weekday.from_date(key[1])), row.allotment)
+            to_create.append(row)
+        elif values.get("allotment", row.allotment) < row.sold:
+            raise AllotmentBelowSold(f"Package {key[0]} already has {row.sold} rooms booked on {key[1]}")
+        elif any(getattr(row, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(row, field, value)
+            to_update.append(row)
+        else:
+            counts["unchanged"] += 1
+
+    PackageDailyAvailability.objects.bulk_create(to_create, batch_size=UPSERT_BATCH_SIZE)
+    PackageDailyAvailability.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=UPSERT_BATCH_SIZE)
+    counts["inserted"] += len(to_create)
+    counts["updated"] += len(to_update)
+    return {row.package_id for row in to_create} | {row.package_id for row in to_update}
+
+
+def upsert_daily_availability(rows, batch_size=UPSERT_BATCH_SIZE):
+    """
+    Insert or update daily availability rows on the (package, date) unique key.
+
+    Everything runs in one transaction. Rows are written in batches: each batch reads its existing rows
+    with one query, then inserts and updates with bulk_create/bulk_update. Later rows win when the same
+    night appears twice. Bulk writes skip model signals, so the availability index of every touched
+    package is rebuilt once at the end. Returns counts of inserted, updated and unchanged rows.
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    touched = set()
+
+    with transaction.atomic():
+        batch = {}
+        for row in rows:
+            key = (row["package_id"], row["date"])
+            if key not in batch and len(batch) >= batch_size:
+                touched.update(write_daily_batch(batch, counts))
+                batch = {}
+            batch[key] = {field: row[field] for field in UPDATE_FIELDS if field in row}
+        if batch:
+            touched.update(write_daily_batch(batch, counts))
+        rebuild_availability_runs(touched)
+    return counts
+
+
+def write_weekday_batch(batch, counts):
+    """Write one batch of weekday base prices keyed by (package_id, weekday), tally them and return the touched ids"""
+    existing = {
+        (row.package_id, row.weekday): row
+        for row in PackageWeekdayBasePrice.objects.filter(package_id__in={package_id for package_id, _ in batch})
+    }
+
+    to_create, to_update = [], []
+    for key, values in batch.items():
+        row = existing.get(key)
+        if row is None:
+            to_create.append(PackageWeekdayBasePrice(package_id=key[0], weekday=key[1], **values))
+        elif any(getattr(row, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(row, field, value)
+            to_update.append(row)
+        else:
+            counts["unchanged"] += 1
+
+    PackageWeekdayBasePrice.objects.bulk_create(to_create, batch_size=UPSERT_BATCH_SIZE)
+    PackageWeekdayBasePrice.objects.bulk_update(to_update, WEEKDAY_UPDATE_FIELDS, batch_size=UPSERT_BATCH_SIZE)
+    counts["inserted"] += len(to_create)
+    counts["updated"] += len(to_update)
+    return {row.package_id for row in to_create} | {row.package_id for row in to_update}
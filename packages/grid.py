@@ -0,0 +1,144 @@
+"""
+Month x package availability grid for the staff calendar.
+
+A grid covers the packages of one room type over one calendar month. Each cell is one night of one
+package: its daily row when there is one, otherwise nothing but the package's weekday defaults
+(PackageWeekdayBasePrice), which the grid shows as placeholders. Such a night shows as closed when its
+weekday has no allotment. Loading a grid costs a constant three queries (packages, weekday prices, daily
+rows) whatever its size. Saving compares the posted cells with the loaded ones and hands only the changed
+cells to upsert_daily_availability, so a whole grid is written as one batch and nights that staff did not
+touch still have no daily row.
+"""
+
+from datetime import date, timedelta
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .bulk import upsert_daily_availability
+from .models import AvailabilityStatus, Package, PackageDailyAvailability, PackageWeekdayBasePrice, Weekday
+
+# Form fields posted per cell. A blank price means "use the weekday base price".
+GRID_FIELDS = ["retail_price", "cost_price", "status", "allotment"]
+# A month of 4-field cells for this many packages stays under DATA_UPLOAD_MAX_NUMBER_FIELDS (1000)
+PACKAGES_PER_GRID = 8
+
+_price_field = forms.IntegerField(min_value=0, required=False)
+_allotment_field = forms.IntegerField(min_value=0, required=False)
+_status_field = forms.ChoiceField(choices=AvailabilityStatus.choices)
+
+
+def month_days(month):
+    """Every day of the month that starts on `month` (a date on the 1st)"""
+    next_month = (month + timedelta(days=32)).replace(day=1)
+    return [month + timedelta(days=offset) for offset in range((next_month - month).days)]
+
+
+def cell_field_name(package_id, day, field):
+    return f"{package_id}_{day.isoformat()}_{field}"
+
+
+def load_grid(room_type_id, month, page=1):
+    """
+    Build the grid of a room type for one month, PACKAGES_PER_GRID packages per page.
+    Returns the packages, one row per day with a cell per package, and whether a next page exists.
+    """
+    offset = (page - 1) * PACKAGES_PER_GRID
+    packages = list(
+        Package.objects.filter(room_type_id=room_type_id)
+        .order_by("id")
+        .only("id", "name")[offset : offset + PACKAGES_PER_GRID + 1]
+    )
+    has_next = len(packages) > PACKAGES_PER_GRID
+    packages = packages[:PACKAGES_PER_GRID]
+    package_ids = [package.id for package in packages]
+    days = month_days(month)
+
+    defaults = {
+        (package_id, weekday): values
+        for package_id, weekday, *values in PackageWeekdayBasePrice.objects.filter(
+            package_id__in=package_ids
+        ).values_list("package_id", "weekday", "retail_price", "cost_price", "allotment")
+    }
+    daily_rows = {
+        (row["package_id"], row["date"]): row
+        for row in PackageDailyAvailability.objects.filter(
+            package_id__in=package_ids, date__gte=days[0], date__lte=days[-1]
+        ).values("package_id", "date", "retail_price", "cost_price", "status", "allotment", "sold")
+    }
+
+    rows = []
+    for day in days:
+        weekday = Weekday.from_date(day)
+        cells = []
+        for package_id in package_ids:
+            row = daily_rows.get((package_id, day))
+            default_retail, default_cost, default_allotment = defaults.get((package_id, weekday), (None, None, 0))
+            default_status = AvailabilityStatus.OPEN if default_allotment else AvailabilityStatus.CLOSED
+            cells.append(
+                {
+                    "package_id": package_id,
+                    "date": day,
+                    "has_row": row is not None,
+                    "retail_price": row["retail_price"] if row else 0,
+                    "cost_price": row["cost_price"] if row else 0,
+                    "status": row["status"] if row else default_status,
+                    "allotment": row["allotment"] if row else None,
+                    "sold": row["sold"] if row else 0,
+                    "default_retail_price": default_retail,
+                    "default_cost_price": default_cost,
+                    "default_allotment": default_allotment,
+                    "names": {field: cell_field_name(package_id, day, field) for field in GRID_FIELDS},
+                }
+            )
+        rows.append({"date": day, "weekday": weekday, "cells": cells})
+    return {"packages": packages, "rows": rows, "has_next": has_next}
+
+
+def _posted_cell(cell, data):
+    names = cell["names"]
+    try:
+        return {
+            # Zero and blank both mean "no override"; a cell missing from the form keeps its values
+            "retail_price": _price_field.clean(data.get(names["retail_price"], cell["retail_price"])) or 0,
+            "cost_price": _price_field.clean(data.get(names["cost_price"], cell["cost_price"])) or 0,
+            "status": _status_field.clean(data.get(names["status"], cell["status"])),
+            "allotment": _allotment_field.clean(data.get(names["allotment"], "")),
+        }
+    except ValidationError as error:
+        raise ValidationError(f"Package {cell['package_id']} on {cell['date']}: {error.messages[0]}")
+
+
+def grid_changes(grid, data):
+    """Daily rows for the cells whose posted values differ from the loaded grid"""
+    changes = []
+    for row in grid["rows"]:
+        for cell in row["cells"]:
+            posted = _posted_cell(cell, data)
+            if posted["allotment"] is None:
+                # A blank allotment keeps the current room count (or the weekday allotment on a new row)
+                del posted["allotment"]
+            if all(posted[field] == cell[field] for field in posted):
+                continue
+            changes.append({"package_id": cell["package_id"], "date": cell["date"], **posted})
+    return changes
+
+
+def save_grid(grid, data):
+    """
+    Write the changed cells of a posted grid in one batch. Returns the upsert counts.
+    Raises ValidationError for malformed cells and AllotmentBelowSold like upsert_daily_availability.
+    """
+    changes = grid_changes(grid, data)
+    if not changes:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+    return upsert_daily_availability(changes)
+
+
+def parse_month(value):
+    """The first day of a 'YYYY-MM' month, or of the current month when value is missing or malformed"""
+    try:
+        return date.fromisoformat(f"{value}-01")
+    except (TypeError, ValueError):
+        return timezone.localdate().replace(day=1)
@@ -0,0 +1,125 @@
+import csv
+import json
+from datetime import date
+from itertools import islice
+
+from django.db import transaction
+
+from .availability import rebuild_availability_runs
+from .bulk import AllotmentBelowSold, write_daily_batch, write_weekday_batch
+from .models import AvailabilityStatus, Package, Weekday
+
+IMPORT_BATCH_SIZE = 5000
+
+
+class RateSheetError(Exception):
+    """Raised when a rate sheet line cannot be imported"""
+
+    def __init__(self, line_number, message):
+        super().__init__(f"Line {line_number}: {message}")
+        self.line_number = line_number
+
+
+def read_records(file, file_format, start_after=0):
+    """Yield (line_number, record) pairs from a CSV or NDJSON stream, skipping lines up to `start_after`"""
+    if file_format == "csv":
+        reader = csv.DictReader(file)
+        for record in reader:
+            if reader.line_num > start_after:
+                yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(file, start=1):
+        if line_number <= start_after or not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            raise RateSheetError(line_number, "invalid JSON")
+
+
+def parse_weekday(value):
+    """Accept Weekday numbers (Sunday = 0) or names"""
+    if value in (None, ""):
+        raise ValueError("either 'date' or 'weekday' is required")
+    if str(value).isdigit():
+        return Weekday(int(value))
+    try:
+        return Weekday[str(value).upper()]
+    except KeyError:
+        raise ValueError(f"unknown weekday '{value}'")
+
+
+def parse_record(line_number, record):
+    """
+    Turn one rate sheet record into ("daily" | "weekday", key, values).
+
+    Records with a `date` column update PackageDailyAvailability, records with a `weekday` column update
+    PackageWeekdayBasePrice. Both may carry an `allotment`.
+    """
+    try:
+        package_id = int(record["package"])
+        retail_price = int(record.get("retail_price") or 0)
+        cost_price = int(record.get("cost_price") or 0)
+        if retail_price < 0 or cost_price < 0:
+            raise ValueError("prices must not be negative")
+
+        if record.get("date"):
+            day = date.fromisoformat(str(record["date"]))
+            status = record.get("status") or AvailabilityStatus.OPEN
+            if status not in AvailabilityStatus.values:
+                raise ValueError(f"unknown status '{status}'")
+            values = {"retail_price": retail_price, "cost_price": cost_price, "status": status}
+            kind, key = "daily", (package_id, day)
+        else:
+            weekday = parse_weekday(record.get("weekday"))
+            if not retail_price or not cost_price:
+                raise ValueError("weekday base prices require 'retail_price' and 'cost_price'")
+            values = {"retail_price": retail_price, "cost_price": cost_price}
+            kind, key = "weekday", (package_id, weekday)
+
+        if record.get("allotment") not in (None, ""):
+            values["allotment"] = int(record["allotment"])
+            if values["allotment"] < 0:
+                raise ValueError("allotment must not be negative")
+        return kind, key, values
+    except KeyError as error:
+        raise RateSheetError(line_number, f"missing column {error}")
+    except (TypeError, ValueError) as error:
+        raise RateSheetError(line_number, str(error))
+
+
+def import_rate_sheet(records, batch_size=IMPORT_BATCH_SIZE, on_checkpoint=None):
+    """
+    Stream (line_number, record) pairs into the database with bounded memory.
+
+    Records are consumed `batch_size` at a time. Every batch is validated, written with bulk upserts and
+    committed on its own, after which `on_checkpoint(last_line_number)` is called so an interrupted
+    import can resume from the last committed line. Returns counts of inserted, updated and unchanged rows.
+    """
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    records = iter(records)
+    while chunk := list(islice(records, batch_size)):
+        daily, weekday, first_lines = {}, {}, {}
+        for line_number, record in chunk:
+            kind, key, values = parse_record(line_number, record)
+            (daily if kind == "daily" else weekday)[key] = values
+            first_lines.setdefault(key[0], line_number)
+
+        known = set(Package.objects.filter(id__in=first_lines).values_list("id", flat=True))
+        missing = [package_id for package_id in first_lines if package_id not in known]
+        if missing:
+            raise RateSheetError(first_lines[missing[0]], f"package {missing[0]} does not exist")
+
+        try:
+            with transaction.atomic():
+                touched = write_daily_batch(daily, counts) if daily else set()
+                if weekday:
+                    touched |= write_weekday_batch(weekday, counts)
+                rebuild_availability_runs(touched)
+        except AllotmentBelowSold as error:
+            raise RateSheetError(chunk[0][0], f"batch rejected, {error}")
+
+        if on_checkpoint:
+            on_checkpoint(chunk[-1][0])
+    return counts
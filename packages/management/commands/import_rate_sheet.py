@@ -0,0 +1,57 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from packages.imports import IMPORT_BATCH_SIZE, RateSheetError, import_rate_sheet, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a partner rate sheet (CSV or NDJSON) into weekday base prices and daily availability. "
+        "Columns: package, date or weekday, retail_price, cost_price, status, allotment"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Rate sheet file")
+        parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--checkpoint", help="Checkpoint file (defaults to <path>.checkpoint)")
+        parser.add_argument("--resume", action="store_true", help="Skip lines committed by a previous run")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("csv" if path.endswith(".csv") else "ndjson")
+        checkpoint_path = options["checkpoint"] or f"{path}.checkpoint"
+
+        start_after = 0
+        if options["resume"] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as file:
+                start_after = json.load(file)["line"]
+            self.stdout.write(f"Resuming after line {start_after}")
+
+        def save_checkpoint(line_number):
+            # Write-then-rename so a crash never leaves a truncated checkpoint behind
+            with open(f"{checkpoint_path}.tmp", "w") as file:
+                json.dump({"line": line_number}, file)
+            os.replace(f"{checkpoint_path}.tmp", checkpoint_path)
+
+        try:
+            with open(path, newline="") as file:
+                counts = import_rate_sheet(
+                    read_records(file, file_format, start_after=start_after),
+                    batch_size=options["batch_size"],
+                    on_checkpoint=save_checkpoint,
+                )
+        except OSError as error:
+            raise CommandError(f"Could not read rate sheet: {error}")
+        except RateSheetError as error:
+            raise CommandError(f"{error}. Fix the line and rerun with --resume to continue.")
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Inserted {counts['inserted']}, updated {counts['updated']}, unchanged {counts['unchanged']} rows"
+            )
+        )
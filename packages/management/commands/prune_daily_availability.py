@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from packages.availability import prune_redundant_rows, redundant_daily_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete daily availability rows that only repeat their weekday defaults (open, nothing sold, "
+        "no price override and the weekday allotment). Search, quotes and bookings treat those nights the same"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows deleted per statement")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would be deleted")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        if options["dry_run"]:
+            self.stdout.write(f"{redundant_daily_rows().count()} redundant daily rows")
+            return
+        deleted = prune_redundant_rows(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} redundant daily rows"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from packages.availability import AVAILABILITY_HORIZON_DAYS, rebuild_availability_runs
+from packages.models import Package
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the availability index of packages. Run it daily: nights without a daily row are only "
+        f"indexed {AVAILABILITY_HORIZON_DAYS} days ahead, and that horizon moves with the calendar"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--package", type=int, action="append", dest="packages", help="Limit to these packages (default: all)"
+        )
+
+    def handle(self, *args, **options):
+        package_ids = options["packages"] or list(Package.objects.values_list("id", flat=True))
+        rebuild_availability_runs(package_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the availability index of {len(package_ids)} packages"))
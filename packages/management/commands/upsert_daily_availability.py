@@ -0,0 +1,41 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from packages.bulk import AllotmentBelowSold, expand_calendar_entries, upsert_daily_availability
+from packages.serializers import BulkCalendarSerializer
+
+
+class Command(BaseCommand):
+    help = "Upsert package daily prices and open/close status from a JSON calendar file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help='JSON file shaped like the bulk API payload: {"entries": [...]}. Use "-" to read from stdin.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options["path"] == "-":
+                payload = json.load(sys.stdin)
+            else:
+                with open(options["path"]) as file:
+                    payload = json.load(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Could not read calendar file: {error}")
+
+        serializer = BulkCalendarSerializer(data=payload)
+        if not serializer.is_valid():
+            raise CommandError(json.dumps(serializer.errors))
+
+        try:
+            counts = upsert_daily_availability(expand_calendar_entries(serializer.validated_data["entries"]))
+        except AllotmentBelowSold as error:
+            raise CommandError(str(error))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Inserted {counts['inserted']}, updated {counts['updated']}, unchanged {counts['unchanged']} rows"
+            )
+        )
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:00
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_availability_runs(apps, schema_editor):
+    PackageDailyAvailability = apps.get_model("packages", "PackageDailyAvailability")
+    PackageAvailabilityRun = apps.get_model("packages", "PackageAvailabilityRun")
+
+    runs = []
+    rows = (
+        PackageDailyAvailability.objects.filter(status="open")
+        .order_by("package_id", "date")
+        .values_list("package_id", "date")
+    )
+    for package_id, day in rows.iterator():
+        last = runs[-1] if runs else None
+        if last and last.package_id == package_id and last.end_date == day:
+            last.end_date = day + timedelta(days=1)
+        else:
+            runs.append(PackageAvailabilityRun(package_id=package_id, start_date=day, end_date=day + timedelta(days=1)))
+    PackageAvailabilityRun.objects.bulk_create(runs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0009_remove_package_price_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackageAvailabilityRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(help_text='First open night of the run')),
+                ('end_date', models.DateField(help_text='Day after the last open night of the run (exclusive)')),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_runs', to='packages.package')),
+            ],
+            options={
+                'verbose_name': 'Package Availability Run',
+                'verbose_name_plural': 'Package Availability Runs',
+                'indexes': [models.Index(fields=['package', 'start_date', 'end_date'], name='package_run_lookup_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_availability_runs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0010_packageavailabilityrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='packagedailyavailability',
+            name='allotment',
+            field=models.PositiveIntegerField(default=1, help_text='Number of rooms for sale on this date'),
+        ),
+        migrations.AddField(
+            model_name='packagedailyavailability',
+            name='sold',
+            field=models.PositiveIntegerField(default=0, help_text='Number of rooms already booked on this date'),
+        ),
+        migrations.AddConstraint(
+            model_name='packagedailyavailability',
+            constraint=models.CheckConstraint(condition=models.Q(('sold__lte', models.F('allotment'))), name='sold_within_allotment'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0011_packagedailyavailability_inventory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='packageweekdaybaseprice',
+            name='allotment',
+            field=models.PositiveIntegerField(default=0, help_text='Rooms for sale on nights without a daily row (0 keeps those nights closed)'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0012_packageweekdaybaseprice_allotment'),
+        ('room_types', '0009_room_type_occupancy_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['room_type'], name='package_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packagedailyavailability',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['package', 'date'], name='daily_open_night_idx'),
+        ),
+    ]
@@ -11,6 +11,12 @@ class Package(models.Model):
     description = models.TextField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Only active packages are ever searched
+            models.Index(fields=["room_type"], condition=models.Q(is_active=True), name="package_active_idx"),
+        ]
+
     def __str__(self):
         return f"{self.room_type} - {self.name}"
 
@@ -29,12 +35,20 @@ class Weekday(models.IntegerChoices):
     FRIDAY = 5, "Friday"
     SATURDAY = 6, "Saturday"
 
+    @classmethod
+    def from_date(cls, day):
+        """Return the weekday of a date (date.weekday() starts on Monday, these choices on Sunday)"""
+        return cls(day.isoweekday() % 7)
+
 
 class PackageWeekdayBasePrice(models.Model):
     package = models.ForeignKey("packages.Package", on_delete=models.CASCADE, related_name="weekday_base_prices")
     weekday = models.IntegerField(choices=Weekday.choices)
     retail_price = models.PositiveIntegerField(help_text="Default selling price in KRW")
     cost_price = models.PositiveIntegerField(help_text="Internal coast price in KRW")
+    allotment = models.PositiveIntegerField(
+        default=0, help_text="Rooms for sale on nights without a daily row (0 keeps those nights closed)"
+    )
 
     class Meta:
         unique_together = ("package", "weekday")
@@ -46,7 +60,7 @@ class PackageWeekdayBasePrice(models.Model):
 
 
 class PackageDailyAvailability(models.Model):
-    """Daily availability and price for a package"""
+    """Daily override of a package's weekday defaults (price, status, allotment). Nights without a row use them"""
 
     package = models.ForeignKey("packages.Package", on_delete=models.CASCADE, related_name="daily_prices")
     date = models.DateField()
@@ -58,18 +72,35 @@ class PackageDailyAvailability(models.Model):
         default=AvailabilityStatus.OPEN,
         help_text="Availability status of the package on a specific date",
     )
+    allotment = models.PositiveIntegerField(default=1, help_text="Number of rooms for sale on this date")
+    sold = models.PositiveIntegerField(default=0, help_text="Number of rooms already booked on this date")
 
     class Meta:
         unique_together = ("package", "date")
+        indexes = [
+            # Open nights of many packages outside the default horizon (availability index rebuilds)
+            models.Index(
+                fields=["package", "date"],
+                condition=models.Q(status=AvailabilityStatus.OPEN),
+                name="daily_open_night_idx",
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(sold__lte=models.F("allotment")), name="sold_within_allotment")
+        ]
         verbose_name = "Package Daily Availability"
         verbose_name_plural = "Package Daily Availabilities"
 
+    @property
+    def remaining(self):
+        return self.allotment - self.sold
+
     def get_effective_prices(self):
         """Return daily retail and cost price, falling back to weekday base price"""
         if self.retail_price and self.cost_price:
             return self.retail_price, self.cost_price
 
-        weekday = self.date.weekday()
+        weekday = Weekday.from_date(self.date)
         try:
             base = self.package.weekday_base_prices.get(weekday=weekday)
             return base.retail_price, base.cost_price
@@ -78,3 +109,19 @@ class PackageDailyAvailability(models.Model):
 
     def __str__(self):
         return f"{self.package.room_type}-{self.package.name} | {self.date} : {self.status}"
+
+
+class PackageAvailabilityRun(models.Model):
+    """Run-length index of consecutive open nights for a package, derived from its daily rows and weekday defaults"""
+
+    package = models.ForeignKey("packages.Package", on_delete=models.CASCADE, related_name="availability_runs")
+    start_date = models.DateField(help_text="First open night of the run")
+    end_date = models.DateField(help_text="Day after the last open night of the run (exclusive)")
+
+    class Meta:
+        indexes = [models.Index(fields=["package", "start_date", "end_date"], name="package_run_lookup_idx")]
+        verbose_name = "Package Availability Run"
+        verbose_name_plural = "Package Availability Runs"
+
+    def __str__(self):
+        return f"{self.package.name} | {self.start_date} ~ {self.end_date}"
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from .availability import availability_horizon
+from .models import AvailabilityStatus, PackageDailyAvailability, PackageWeekdayBasePrice, Weekday
+
+# Keeps `id__in` lookups below SQLite's bound-parameter limit
+QUOTE_CHUNK_SIZE = 500
+
+
+def stay_nights(check_in, check_out):
+    """Return every night in [check_in, check_out)"""
+    return [check_in + timedelta(days=offset) for offset in range((check_out - check_in).days)]
+
+
+def quote_packages(package_ids, check_in, check_out):
+    """
+    Price a stay for many packages at once.
+
+    Each package gets one retail and one cost array with a slot per night. The arrays are first filled
+    from the package's weekday base price table and then overwritten by daily overrides, so the whole
+    package x night matrix costs two queries per chunk of packages regardless of the stay length.
+    Daily rows are sparse: a night without one is open when it lies within the availability horizon and
+    its weekday default has rooms for sale.
+    Returns a dict keyed by package id.
+    """
+    package_ids = sorted(set(package_ids))
+    nights = stay_nights(check_in, check_out)
+    night_index = {day: index for index, day in enumerate(nights)}
+    night_weekdays = [Weekday.from_date(day) for day in nights]
+    horizon_start, horizon_end = availability_horizon()
+    beyond_horizon = [not horizon_start <= day < horizon_end for day in nights]
+
+    quotes = {}
+    for start in range(0, len(package_ids), QUOTE_CHUNK_SIZE):
+        chunk = package_ids[start : start + QUOTE_CHUNK_SIZE]
+
+        # 7-slot weekday tables per package
+        weekday_retail = {package_id: [None] * 7 for package_id in chunk}
+        weekday_cost = {package_id: [None] * 7 for package_id in chunk}
+        weekday_closed = {package_id: [True] * 7 for package_id in chunk}
+        base_prices = PackageWeekdayBasePrice.objects.filter(package_id__in=chunk).values_list(
+            "package_id", "weekday", "retail_price", "cost_price", "allotment"
+        )
+        for package_id, weekday, retail_price, cost_price, allotment in base_prices:
+            weekday_retail[package_id][weekday] = retail_price
+            weekday_cost[package_id][weekday] = cost_price
+            weekday_closed[package_id][weekday] = not allotment
+
+        # Broadcast the weekday tables over the stay
+        retail = {
+            package_id: [weekday_retail[package_id][weekday] for weekday in night_weekdays] for package_id in chunk
+        }
+        cost = {package_id: [weekday_cost[package_id][weekday] for weekday in night_weekdays] for package_id in chunk}
+        closed = {
+            package_id: [
+                weekday_closed[package_id][weekday] or beyond
+                for weekday, beyond in zip(night_weekdays, beyond_horizon)
+            ]
+            for package_id in chunk
+        }
+
+        # Apply daily overrides, closures and sold-out nights
+        daily_rows = PackageDailyAvailability.objects.filter(
+            package_id__in=chunk, date__gte=check_in, date__lt=check_out
+        ).values_list("package_id", "date", "retail_price", "cost_price", "status", "allotment", "sold")
+        for package_id, day, retail_price, cost_price, status, allotment, sold in daily_rows:
+            index = night_index[day]
+            if retail_price and cost_price:
+                retail[package_id][index] = retail_price
+                cost[package_id][index] = cost_price
+            closed[package_id][index] = status != AvailabilityStatus.OPEN or sold >= allotment
+
+        for package_id in chunk:
+            quotes[package_id] = build_quote(nights, retail[package_id], cost[package_id], any(closed[package_id]))
+    return quotes
+
+
+def build_quote(nights, retail, cost, closed):
+    """Summarize the per-night price arrays of a single package"""
+    is_priced = bool(nights) and None not in retail and None not in cost
+    return {
+        "is_priced": is_priced,
+        "is_open": not closed,
+        "nights": [
+            {"date": day, "retail_price": retail_price, "cost_price": cost_price}
+            for day, retail_price, cost_price in zip(nights, retail, cost)
+        ],
+        "total_retail_price": sum(retail) if is_priced else None,
+        "total_cost_price": sum(cost) if is_priced else None,
+        "min_price": min(retail) if is_priced else None,
+        "max_price": max(retail) if is_priced else None,
+    }
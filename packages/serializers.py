@@ -1,6 +1,18 @@
-from rest_framework.serializers import ModelSerializer, StringRelatedField
+from rest_framework.serializers import (
+    ChoiceField,
+    DateField,
+    IntegerField,
+    ModelSerializer,
+    Serializer,
+    SerializerMethodField,
+    StringRelatedField,
+    ValidationError,
+)
 from packages.models import Package
-from .models import Package, PackageDailyAvailability
+from .models import AvailabilityStatus, Package, PackageDailyAvailability
+
+# Longest date range a single calendar entry may cover
+MAX_CALENDAR_RANGE_DAYS = 366
 
 
 class PackageDailyAvailabilitySerializer(ModelSerializer):
@@ -8,7 +20,7 @@ class PackageDailyAvailabilitySerializer(ModelSerializer):
 
     class Meta:
         model = PackageDailyAvailability
-        fields = ["date", "price", "status"]
+        fields = ["date", "retail_price", "status"]
 
 
 class PackageSerializer(ModelSerializer):
@@ -18,15 +30,71 @@ class PackageSerializer(ModelSerializer):
 
     class Meta:
         model = Package
-        fields = ["id", "name", "description", "price", "is_active", "daily_prices"]
+        fields = ["id", "name", "description", "is_active", "daily_prices"]
 
 
 class FilteredPackageSerializer(ModelSerializer):
     """Serializer for available package combinations with daily prices"""
 
     room_type = StringRelatedField()
-    daily_prices = PackageDailyAvailabilitySerializer(many=True, read_only=True)
+    daily_prices = SerializerMethodField()
+    quote = SerializerMethodField()
 
     class Meta:
         model = Package
-        fields = ["id", "name", "room_type", "description", "daily_prices"]
+        fields = ["id", "name", "room_type", "description", "daily_prices", "quote"]
+
+    def get_daily_prices(self, obj):
+        """Effective price of every night of the stay, including nights priced by the weekday defaults"""
+        quote = self.context.get("quotes", {}).get(obj.id)
+        if not quote:
+            return []
+        return [
+            {"date": night["date"], "retail_price": night["retail_price"], "status": AvailabilityStatus.OPEN}
+            for night in quote["nights"]
+        ]
+
+    def get_quote(self, obj):
+        """Customer-facing part of the stay quote passed in through the `quotes` context"""
+        quote = self.context.get("quotes", {}).get(obj.id)
+        if not quote:
+            return None
+        return {
+            "total_price": quote["total_retail_price"],
+            "min_price": quote["min_price"],
+            "max_price": quote["max_price"],
+            "nights": [{"date": night["date"], "price": night["retail_price"]} for night in quote["nights"]],
+        }
+
+
+class CalendarEntrySerializer(Serializer):
+    """Serializer for one package date range of a bulk calendar update (end_date is inclusive)"""
+
+    package = IntegerField(min_value=1)
+    start_date = DateField()
+    end_date = DateField()
+    retail_price = IntegerField(min_value=0, default=0)
+    cost_price = IntegerField(min_value=0, default=0)
+    status = ChoiceField(choices=AvailabilityStatus.choices, default=AvailabilityStatus.OPEN)
+    allotment = IntegerField(min_value=0, required=False)
+
+    def validate(self, data):
+        if data["start_date"] > data["end_date"]:
+            raise ValidationError({"end_date": "'end_date' must not be earlier than 'start_date'"})
+        if (data["end_date"] - data["start_date"]).days >= MAX_CALENDAR_RANGE_DAYS:
+            raise ValidationError({"end_date": f"A range may cover at most {MAX_CALENDAR_RANGE_DAYS} days"})
+        return data
+
+
+class BulkCalendarSerializer(Serializer):
+    """Serializer for validating a bulk calendar update against existing packages"""
+
+    entries = CalendarEntrySerializer(many=True, allow_empty=False)
+
+    def validate_entries(self, entries):
+        package_ids = {entry["package"] for entry in entries}
+        found = set(Package.objects.filter(id__in=package_ids).values_list("id", flat=True))
+        missing = sorted(package_ids - found)
+        if missing:
+            raise ValidationError(f"Packages not found: {missing}")
+        return entries
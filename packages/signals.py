@@ -0,0 +1,18 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .availability import rebuild_availability_runs
+from .models import PackageDailyAvailability, PackageWeekdayBasePrice
+
+
+@receiver(post_save, sender=PackageDailyAvailability)
+@receiver(post_delete, sender=PackageDailyAvailability)
+@receiver(post_save, sender=PackageWeekdayBasePrice)
+@receiver(post_delete, sender=PackageWeekdayBasePrice)
+def refresh_availability_runs(sender, instance, origin=None, **kwargs):
+    """Keep the availability index of a package in sync with its daily rows and weekday defaults"""
+    if isinstance(origin, QuerySet):
+        # Like bulk_create/bulk_update, queryset deletes leave the rebuild to the caller
+        return
+    rebuild_availability_runs([instance.package_id])
@@ -0,0 +1,550 @@
+import json
+import pytest
+from datetime import date, timedelta
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Package, PackageDailyAvailability, PackageWeekdayBasePrice, AvailabilityStatus, Weekday
+from .availability import (
+    AVAILABILITY_HORIZON_DAYS,
+    IS_OPEN,
+    availability_horizon,
+    horizon_rows,
+    open_for_stay,
+    open_rows_beyond_horizon,
+)
+from .grid import cell_field_name, load_grid, save_grid
+from .quotes import quote_packages
+from accommodations.models import Accommodation, City
+from room_types.models import RoomType
+from users.models import User
+
+# ----- Constants -----
+CHECK_IN = date(2025, 8, 3)  # Sunday
+BULK_AVAILABILITY_URL = "/api/v1/packages/daily-availability/bulk"
+MONTH = date(2025, 8, 1)
+
+
+# ----- Fixtures -----
+@pytest.fixture
+def sample_packages(db):
+    city = City.objects.create(name="Seoul")
+    accommodation = Accommodation.objects.create(
+        name="Hotel A", region="seoul", location="123", city=city, type="hotel"
+    )
+    room_type = RoomType.objects.create(accommodation=accommodation, name="Deluxe", base_occupancy=2, max_occupancy=3)
+    packages = []
+    for index in range(3):
+        package = Package.objects.create(room_type=room_type, name=f"Package {index}", base_price=100000)
+        PackageWeekdayBasePrice.objects.bulk_create(
+            PackageWeekdayBasePrice(
+                package=package,
+                weekday=weekday,
+                retail_price=100000 + weekday * 1000,
+                cost_price=80000 + weekday * 1000,
+            )
+            for weekday in Weekday.values
+        )
+        packages.append(package)
+    return packages
+
+
+@pytest.fixture
+def staff_client(db):
+    staff = User.objects.create_user(
+        username="staff",
+        email="staff@gmail.com",
+        first_name="abc",
+        last_name="edf",
+        phone_number="01011112222",
+        password="test123!",
+        is_staff=True,
+    )
+    client = APIClient()
+    client.force_login(staff)
+    return client
+
+
+# ----- Weekday Test -----
+def test_weekday_from_date_starts_on_sunday():
+    assert Weekday.from_date(CHECK_IN) == Weekday.SUNDAY
+    assert Weekday.from_date(CHECK_IN + timedelta(days=6)) == Weekday.SATURDAY
+
+
+# ----- quote_packages Test -----
+
+
+# Success 1: Nights without overrides fall back to weekday base prices
+@pytest.mark.django_db
+def test_quote_uses_weekday_base_prices(sample_packages):
+    package = sample_packages[0]
+    quotes = quote_packages([package.id], CHECK_IN, CHECK_IN + timedelta(days=7))
+    quote = quotes[package.id]
+
+    assert quote["is_priced"]
+    assert [night["retail_price"] for night in quote["nights"]] == [100000 + weekday * 1000 for weekday in range(7)]
+    assert quote["total_retail_price"] == sum(100000 + weekday * 1000 for weekday in range(7))
+    assert quote["min_price"] == 100000
+    assert quote["max_price"] == 106000
+
+
+# Success 2: Daily overrides and closures take precedence
+@pytest.mark.django_db
+def test_quote_applies_daily_overrides(sample_packages):
+    package = sample_packages[0]
+    PackageDailyAvailability.objects.create(
+        package=package, date=CHECK_IN + timedelta(days=1), retail_price=150000, cost_price=120000
+    )
+    PackageDailyAvailability.objects.create(
+        package=package,
+        date=CHECK_IN + timedelta(days=2),
+        retail_price=0,
+        cost_price=0,
+        status=AvailabilityStatus.CLOSED,
+    )
+    quote = quote_packages([package.id], CHECK_IN, CHECK_IN + timedelta(days=3))[package.id]
+
+    assert [night["retail_price"] for night in quote["nights"]] == [100000, 150000, 102000]
+    assert quote["total_cost_price"] == 80000 + 120000 + 82000
+    assert not quote["is_open"]
+
+
+# Success 3: Missing weekday prices leave the package unpriced
+@pytest.mark.django_db
+def test_quote_without_base_price(sample_packages):
+    package = sample_packages[0]
+    package.weekday_base_prices.filter(weekday=Weekday.MONDAY).delete()
+    quote = quote_packages([package.id], CHECK_IN, CHECK_IN + timedelta(days=2))[package.id]
+
+    assert not quote["is_priced"]
+    assert quote["total_retail_price"] is None
+
+
+# Success 4: Query count does not grow with packages or nights
+@pytest.mark.django_db
+def test_quote_query_count_is_constant(sample_packages):
+    package_ids = [package.id for package in sample_packages]
+    with CaptureQueriesContext(connection) as queries:
+        quotes = quote_packages(package_ids, CHECK_IN, CHECK_IN + timedelta(days=30))
+
+    assert len(quotes) == len(sample_packages)
+    assert len(queries) == 2
+
+
+# ----- BulkDailyAvailabilityView Test -----
+
+
+# Success: Reports inserted, updated and unchanged rows and refreshes the availability index
+@pytest.mark.django_db
+def test_bulk_upsert_daily_availability(staff_client, sample_packages):
+    package = sample_packages[0]
+    PackageDailyAvailability.objects.create(package=package, date=CHECK_IN, retail_price=1000, cost_price=900)
+    PackageDailyAvailability.objects.create(
+        package=package, date=CHECK_IN + timedelta(days=1), retail_price=150000, cost_price=120000
+    )
+    payload = {
+        "entries": [
+            {
+                "package": package.id,
+                "start_date": CHECK_IN,
+                "end_date": CHECK_IN + timedelta(days=4),
+                "retail_price": 150000,
+                "cost_price": 120000,
+            },
+            {
+                "package": package.id,
+                "start_date": CHECK_IN + timedelta(days=3),
+                "end_date": CHECK_IN + timedelta(days=3),
+                "status": AvailabilityStatus.CLOSED,
+            },
+        ]
+    }
+    response = staff_client.post(BULK_AVAILABILITY_URL, payload, format="json")
+
+    assert response.status_code == 200
+    assert response.data == {"inserted": 3, "updated": 1, "unchanged": 1}
+    assert PackageDailyAvailability.objects.filter(package=package).count() == 5
+    closed = PackageDailyAvailability.objects.get(package=package, date=CHECK_IN + timedelta(days=3))
+    assert closed.status == AvailabilityStatus.CLOSED
+    assert list(package.availability_runs.values_list("start_date", "end_date")) == [
+        (CHECK_IN, CHECK_IN + timedelta(days=3)),
+        (CHECK_IN + timedelta(days=4), CHECK_IN + timedelta(days=5)),
+    ]
+
+
+# Success 2: New rows without an allotment keep the weekday allotment of their night
+@pytest.mark.django_db
+def test_bulk_upsert_keeps_weekday_allotment(staff_client, sample_packages):
+    package = sample_packages[0]
+    PackageWeekdayBasePrice.objects.filter(package=package, weekday=Weekday.SUNDAY).update(allotment=10)
+    payload = {
+        "entries": [
+            {
+                "package": package.id,
+                "start_date": CHECK_IN,
+                "end_date": CHECK_IN + timedelta(days=1),
+                "retail_price": 150000,
+                "cost_price": 120000,
+            }
+        ]
+    }
+    response = staff_client.post(BULK_AVAILABILITY_URL, payload, format="json")
+
+    assert response.status_code == 200
+    # Sunday takes its weekday allotment, Monday has none and gets the model default
+    assert list(package.daily_prices.order_by("date").values_list("allotment", flat=True)) == [10, 1]
+
+
+# Failure 1: Unknown packages are rejected before anything is written
+@pytest.mark.django_db
+def test_bulk_upsert_unknown_package(staff_client, sample_packages):
+    payload = {"entries": [{"package": 999999, "start_date": CHECK_IN, "end_date": CHECK_IN}]}
+    response = staff_client.post(BULK_AVAILABILITY_URL, payload, format="json")
+
+    assert response.status_code == 400
+    assert "entries" in response.data
+    assert not PackageDailyAvailability.objects.exists()
+
+
+# Failure 2: Staff only
+@pytest.mark.django_db
+def test_bulk_upsert_requires_staff(sample_packages):
+    payload = {"entries": [{"package": sample_packages[0].id, "start_date": CHECK_IN, "end_date": CHECK_IN}]}
+    response = APIClient().post(BULK_AVAILABILITY_URL, payload, format="json")
+
+    assert response.status_code == 403
+
+
+# ----- upsert_daily_availability command Test -----
+@pytest.mark.django_db
+def test_upsert_daily_availability_command(tmp_path, sample_packages, capsys):
+    package = sample_packages[1]
+    calendar = tmp_path / "calendar.json"
+    calendar.write_text(
+        json.dumps(
+            {
+                "entries": [
+                    {
+                        "package": package.id,
+                        "start_date": str(CHECK_IN),
+                        "end_date": str(CHECK_IN + timedelta(days=364)),
+                        "retail_price": 130000,
+                        "cost_price": 110000,
+                    }
+                ]
+            }
+        )
+    )
+    call_command("upsert_daily_availability", str(calendar))
+
+    assert "Inserted 365, updated 0, unchanged 0 rows" in capsys.readouterr().out
+    assert package.availability_runs.count() == 1
+
+
+# ----- import_rate_sheet command Test -----
+
+
+# Success 1: CSV rows update weekday base prices and daily availability
+@pytest.mark.django_db
+def test_import_rate_sheet_csv(tmp_path, sample_packages, capsys):
+    package = sample_packages[0]
+    rate_sheet = tmp_path / "rates.csv"
+    rate_sheet.write_text(
+        "package,date,weekday,retail_price,cost_price,status\n"
+        f"{package.id},,monday,110000,90000,\n"
+        f"{package.id},{CHECK_IN},,130000,100000,open\n"
+        f"{package.id},{CHECK_IN + timedelta(days=1)},,0,0,close\n"
+    )
+    call_command("import_rate_sheet", str(rate_sheet), "--batch-size", "2")
+
+    assert "Inserted 2, updated 1, unchanged 0 rows" in capsys.readouterr().out
+    assert package.weekday_base_prices.get(weekday=Weekday.MONDAY).retail_price == 110000
+    assert package.daily_prices.get(date=CHECK_IN + timedelta(days=1)).status == AvailabilityStatus.CLOSED
+    assert not (tmp_path / "rates.csv.checkpoint").exists()
+
+
+# Success 2: A failed import resumes after the last committed batch
+@pytest.mark.django_db
+def test_import_rate_sheet_resume(tmp_path, sample_packages, capsys):
+    package = sample_packages[0]
+    lines = [
+        {"package": package.id, "date": str(CHECK_IN + timedelta(days=offset)), "retail_price": 1, "cost_price": 1}
+        for offset in range(4)
+    ]
+    rate_sheet = tmp_path / "rates.ndjson"
+    rate_sheet.write_text("\n".join(json.dumps(line) for line in lines[:2]) + "\n{broken\n")
+
+    with pytest.raises(CommandError, match="Line 3: invalid JSON"):
+        call_command("import_rate_sheet", str(rate_sheet), "--batch-size", "2")
+    assert json.loads((tmp_path / "rates.ndjson.checkpoint").read_text()) == {"line": 2}
+
+    rate_sheet.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+    call_command("import_rate_sheet", str(rate_sheet), "--batch-size", "2", "--resume")
+
+    assert "Resuming after line 2" in capsys.readouterr().out
+    assert package.daily_prices.count() == 4
+
+
+# Failure: Unknown packages stop the import at their line
+@pytest.mark.django_db
+def test_import_rate_sheet_unknown_package(tmp_path, sample_packages):
+    rate_sheet = tmp_path / "rates.csv"
+    rate_sheet.write_text("package,date,retail_price,cost_price\n999999,2025-08-03,1,1\n")
+
+    with pytest.raises(CommandError, match="Line 2: package 999999 does not exist"):
+        call_command("import_rate_sheet", str(rate_sheet))
+
+
+# Failure 3: Allotment cannot drop below the rooms already sold
+@pytest.mark.django_db
+def test_bulk_upsert_allotment_below_sold(staff_client, sample_packages):
+    package = sample_packages[0]
+    PackageDailyAvailability.objects.create(
+        package=package, date=CHECK_IN, retail_price=0, cost_price=0, allotment=3, sold=2
+    )
+    payload = {"entries": [{"package": package.id, "start_date": CHECK_IN, "end_date": CHECK_IN, "allotment": 1}]}
+    response = staff_client.post(BULK_AVAILABILITY_URL, payload, format="json")
+
+    assert response.status_code == 409
+    assert package.daily_prices.get().allotment == 3
+
+
+# ----- Calendar grid Test -----
+
+
+def grid_post(grid, **cells):
+    """Form data of a grid as rendered, with `cells` ({field name: value}) changed"""
+    data = {}
+    for row in grid["rows"]:
+        for cell in row["cells"]:
+            data[cell["names"]["retail_price"]] = cell["retail_price"] or ""
+            data[cell["names"]["cost_price"]] = cell["cost_price"] or ""
+            data[cell["names"]["status"]] = cell["status"]
+            data[cell["names"]["allotment"]] = "" if cell["allotment"] is None else cell["allotment"]
+    return {**data, **cells}
+
+
+# Success 1: Untouched nights show weekday defaults without rows, in a constant number of queries
+@pytest.mark.django_db
+def test_load_grid(sample_packages):
+    package = sample_packages[0]
+    PackageDailyAvailability.objects.create(package=package, date=CHECK_IN, retail_price=150000, cost_price=120000)
+    PackageWeekdayBasePrice.objects.filter(package=sample_packages[1], weekday=Weekday.SUNDAY).update(allotment=2)
+
+    with CaptureQueriesContext(connection) as queries:
+        grid = load_grid(package.room_type_id, MONTH)
+
+    assert len(queries) == 3
+    assert len(grid["rows"]) == 31
+    assert [cell["package_id"] for cell in grid["rows"][0]["cells"]] == [package.id for package in sample_packages]
+    override = grid["rows"][CHECK_IN.day - 1]["cells"][0]
+    assert (override["has_row"], override["retail_price"], override["default_retail_price"]) == (True, 150000, 100000)
+    untouched = grid["rows"][CHECK_IN.day]["cells"][0]  # Monday
+    assert (untouched["has_row"], untouched["retail_price"], untouched["default_retail_price"]) == (False, 0, 101000)
+    # Untouched nights are only open on weekdays with an allotment
+    assert untouched["status"] == AvailabilityStatus.CLOSED
+    assert grid["rows"][CHECK_IN.day - 1]["cells"][1]["status"] == AvailabilityStatus.OPEN
+
+
+# Success 2: Only changed cells are written, in one batch
+@pytest.mark.django_db
+def test_save_grid_writes_changed_cells(sample_packages):
+    package = sample_packages[0]
+    PackageDailyAvailability.objects.create(package=package, date=CHECK_IN, retail_price=150000, cost_price=120000)
+    PackageWeekdayBasePrice.objects.filter(package=package, weekday=Weekday.MONDAY).update(allotment=10)
+    grid = load_grid(package.room_type_id, MONTH)
+    monday = CHECK_IN + timedelta(days=1)
+    data = grid_post(
+        grid,
+        **{
+            cell_field_name(package.id, CHECK_IN, "retail_price"): "160000",
+            cell_field_name(package.id, monday, "status"): AvailabilityStatus.CLOSED,
+            cell_field_name(sample_packages[1].id, monday, "allotment"): "4",
+        },
+    )
+
+    assert save_grid(grid, data) == {"inserted": 2, "updated": 1, "unchanged": 0}
+    assert PackageDailyAvailability.objects.count() == 3
+    assert PackageDailyAvailability.objects.get(package=package, date=CHECK_IN).retail_price == 160000
+    new_row = PackageDailyAvailability.objects.get(package=sample_packages[1], date=monday)
+    assert (new_row.retail_price, new_row.allotment) == (0, 4)
+    closed = PackageDailyAvailability.objects.get(package=package, date=monday)
+    assert (closed.status, closed.allotment) == (AvailabilityStatus.CLOSED, 10)
+
+
+# Success 3: Admin calendar view renders the grid and saves a posted month
+@pytest.mark.django_db
+def test_room_type_calendar_admin(sample_packages):
+    admin = User.objects.create_superuser(
+        username="admin",
+        email="admin@gmail.com",
+        first_name="abc",
+        last_name="edf",
+        phone_number="01011112222",
+        password="test123!",
+    )
+    client = APIClient()
+    client.force_login(admin)
+    package = sample_packages[0]
+    url = f"/admin/room_types/roomtype/{package.room_type_id}/calendar/?month=2025-08"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert cell_field_name(package.id, CHECK_IN, "retail_price") in response.content.decode()
+
+    data = grid_post(
+        load_grid(package.room_type_id, MONTH),
+        **{
+            cell_field_name(package.id, CHECK_IN, "status"): AvailabilityStatus.OPEN,
+            cell_field_name(package.id, CHECK_IN, "allotment"): "5",
+        },
+    )
+    response = client.post(url, data)
+    assert response.status_code == 302
+    assert package.daily_prices.get().allotment == 5
+    assert package.availability_runs.count() == 1
+
+
+# Failure 1: Malformed cells are reported and nothing is written
+@pytest.mark.django_db
+def test_save_grid_rejects_invalid_cell(sample_packages):
+    package = sample_packages[0]
+    grid = load_grid(package.room_type_id, MONTH)
+    data = grid_post(
+        grid,
+        **{
+            cell_field_name(package.id, CHECK_IN, "allotment"): "3",
+            cell_field_name(package.id, CHECK_IN + timedelta(days=1), "retail_price"): "-1",
+        },
+    )
+
+    with pytest.raises(ValidationError, match=f"Package {package.id} on 2025-08-04"):
+        save_grid(grid, data)
+    assert not PackageDailyAvailability.objects.exists()
+
+
+# Failure 2: Staff without availability permissions cannot open the calendar
+@pytest.mark.django_db
+def test_room_type_calendar_admin_requires_permission(staff_client, sample_packages):
+    response = staff_client.get(f"/admin/room_types/roomtype/{sample_packages[0].room_type_id}/calendar/")
+    assert response.status_code == 403
+
+
+# ----- Sparse availability Test -----
+
+
+def open_package_ids(check_in, check_out):
+    return set(Package.objects.filter(open_for_stay(check_in, check_out)).values_list("id", flat=True))
+
+
+# Success 1: Nights without rows are open on weekday allotments up to the horizon, closures still apply
+@pytest.mark.django_db
+def test_runs_use_weekday_defaults(sample_packages):
+    package = sample_packages[0]
+    today = timezone.localdate()
+    package.weekday_base_prices.exclude(weekday=Weekday.from_date(today + timedelta(days=10))).update(allotment=2)
+    PackageDailyAvailability.objects.create(
+        package=package,
+        date=today + timedelta(days=3),
+        retail_price=0,
+        cost_price=0,
+        status=AvailabilityStatus.CLOSED,
+    )
+
+    assert open_package_ids(today, today + timedelta(days=3)) == {package.id}
+    assert open_package_ids(today + timedelta(days=2), today + timedelta(days=4)) == set()
+    # The weekday without an allotment, and the nights beyond the horizon, stay closed
+    assert open_package_ids(today + timedelta(days=9), today + timedelta(days=11)) == set()
+    horizon_end = today + timedelta(days=AVAILABILITY_HORIZON_DAYS)
+    assert open_package_ids(horizon_end - timedelta(days=1), horizon_end + timedelta(days=1)) == set()
+
+    quote = quote_packages([package.id], today + timedelta(days=4), today + timedelta(days=6))[package.id]
+    assert (quote["is_open"], quote["is_priced"]) == (True, True)
+    quote = quote_packages([package.id], today + timedelta(days=9), today + timedelta(days=11))[package.id]
+    assert not quote["is_open"]
+
+
+# Success 2: Pruning drops rows that repeat the weekday defaults and keeps the rest
+@pytest.mark.django_db
+def test_prune_daily_availability_command(sample_packages, capsys):
+    package = sample_packages[0]
+    today = timezone.localdate()
+    package.weekday_base_prices.update(allotment=2)
+    nights = [today + timedelta(days=offset) for offset in range(5)]
+    weekday = Weekday.from_date(nights[1])
+    rows = [
+        {"retail_price": 0, "cost_price": 0},  # No override
+        {"retail_price": 100000 + weekday * 1000, "cost_price": 80000 + weekday * 1000},  # Same as the weekday
+        {"retail_price": 150000, "cost_price": 120000},
+        {"retail_price": 0, "cost_price": 0, "status": AvailabilityStatus.CLOSED},
+        {"retail_price": 0, "cost_price": 0, "allotment": 5},
+    ]
+    for day, values in zip(nights, rows):
+        PackageDailyAvailability.objects.create(package=package, date=day, **{"allotment": 2, **values})
+    runs_before = list(package.availability_runs.values_list("start_date", "end_date"))
+
+    call_command("prune_daily_availability", "--dry-run")
+    assert "2 redundant daily rows" in capsys.readouterr().out
+    call_command("prune_daily_availability", "--batch-size", "1")
+
+    assert "Deleted 2 redundant daily rows" in capsys.readouterr().out
+    assert list(package.daily_prices.order_by("date").values_list("date", flat=True)) == nights[2:]
+    assert list(package.availability_runs.values_list("start_date", "end_date")) == runs_before
+
+
+# ----- Query plan Test -----
+
+
+def query_plan(queryset):
+    """EXPLAIN output of a queryset on SQLite or Postgres"""
+    if connection.vendor == "postgresql":
+        # Test tables are tiny, so Postgres would rather scan them sequentially
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+def search_packages_query(packages):
+    """Packages of an accommodation open for a two-night stay of two guests (AvailableRoomPackagesView)"""
+    return Package.objects.filter(
+        open_for_stay(CHECK_IN, CHECK_IN + timedelta(days=2)),
+        is_active=True,
+        room_type__accommodation_id=packages[0].room_type.accommodation_id,
+        room_type__base_occupancy__lte=2,
+        room_type__max_occupancy__gte=2,
+    )
+
+
+def rebuild_open_rows_query(packages):
+    """Open rows outside the horizon, as read by rebuild_availability_runs"""
+    return open_rows_beyond_horizon([package.id for package in packages], availability_horizon()).values_list(
+        "package_id", "date"
+    )
+
+
+def rebuild_horizon_rows_query(packages):
+    """Rows of the horizon, as read by rebuild_availability_runs"""
+    return horizon_rows([package.id for package in packages], availability_horizon()).values_list(
+        "package_id", "date", IS_OPEN
+    )
+
+
+# Success: Search queries are served by their indexes
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "build_query, indexes",
+    [
+        (search_packages_query, ["room_type_occupancy_idx", "package_active_idx", "package_run_lookup_idx"]),
+        (rebuild_open_rows_query, ["daily_open_night_idx"]),
+        (rebuild_horizon_rows_query, ["packages_packagedailyavailability_package_id_date_684ce2c7_uniq"]),
+    ],
+)
+def test_search_query_plans_use_indexes(sample_packages, build_query, indexes):
+    plan = query_plan(build_query(sample_packages))
+
+    for index in indexes:
+        assert index in plan
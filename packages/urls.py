@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("daily-availability/bulk", views.BulkDailyAvailabilityView.as_view()),  # POST
+]
@@ -7,10 +7,14 @@ from django.db.models import Prefetch
 from django.utils import timezone
 from datetime import datetime, timedelta
 
-from .models import Package, PackageDailyAvailability, AvailabilityStatus
-from .serializers import FilteredPackageSerializer
+from .availability import open_for_stay
+from .bulk import AllotmentBelowSold, expand_calendar_entries, upsert_daily_availability
+from .models import Package
+from .quotes import quote_packages
+from .serializers import BulkCalendarSerializer, FilteredPackageSerializer
 from accommodations.models import Accommodation
 from accommodations.serializers import AllRoomPackagesSerializer
+from common.permissions import IsStaffUser
 from room_types.models import RoomType
 
 
@@ -43,7 +47,7 @@ class RoomPackageListView(APIView):
         if not Accommodation.objects.filter(pk=pk).exists():
             raise NotFound("Accommodation not found")
         room_types = RoomType.objects.filter(accommodation_id=pk).prefetch_related(
-            Prefetch("packages", queryset=Package.objects.filter(is_active=True))
+            Prefetch("packages", queryset=Package.objects.filter(is_active=True).prefetch_related("daily_prices"))
         )
         serializer = AllRoomPackagesSerializer(room_types, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -62,22 +66,36 @@ class AvailableRoomPackagesView(APIView):
         # Validate dates
         check_in, check_out = validate_dates(check_in_str, check_out_str)
 
-        # Fetching data with given conditions
-        packages = Package.objects.filter(
-            is_active=True,
-            room_type__accommodation_id=pk,
-            room_type__base_occupancy__lte=guests,
-            room_type__max_occupancy__gte=guests,
-        ).prefetch_related(
-            Prefetch(
-                "daily_prices",
-                queryset=PackageDailyAvailability.objects.filter(
-                    status=AvailabilityStatus.OPEN, date__gte=check_in, date__lt=check_out
-                ),
+        # Only packages whose availability index covers every night of the stay
+        packages = (
+            Package.objects.filter(
+                open_for_stay(check_in, check_out),
+                is_active=True,
+                room_type__accommodation_id=pk,
+                room_type__base_occupancy__lte=guests,
+                room_type__max_occupancy__gte=guests,
             )
+            .select_related("room_type__accommodation")
         )
-        # Filter out packages without daily_prices or room_type
-        available_packages = [pkg for pkg in packages if pkg.room_type and pkg.daily_prices.all()]
 
-        serializer = FilteredPackageSerializer(available_packages, many=True)
+        # Price every candidate package in one batched pass and drop those without a full price
+        quotes = quote_packages([package.id for package in packages], check_in, check_out)
+        available_packages = [package for package in packages if quotes[package.id]["is_priced"]]
+
+        serializer = FilteredPackageSerializer(available_packages, many=True, context={"quotes": quotes})
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class BulkDailyAvailabilityView(APIView):
+    """Staff API view to upsert daily prices and open/close status for many packages and date ranges at once"""
+
+    permission_classes = [IsStaffUser]
+
+    def post(self, request):
+        serializer = BulkCalendarSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            counts = upsert_daily_availability(expand_calendar_entries(serializer.validated_data["entries"]))
+        except AllotmentBelowSold as error:
+            return Response({"error": str(error)}, status=status.HTTP_409_CONFLICT)
+        return Response(counts, status=status.HTTP_200_OK)
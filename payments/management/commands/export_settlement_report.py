@@ -0,0 +1,44 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.settlement import csv_lines, mark_settled, report_rows
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}'. Use 'YYYY-MM-DD'")
+
+
+class Command(BaseCommand):
+    help = "Write the partner settlement report (per accommodation and month) for a period as CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", required=True, help="First check-in date of the period (YYYY-MM-DD)")
+        parser.add_argument("--end", required=True, help="Day after the last check-in date (YYYY-MM-DD)")
+        parser.add_argument(
+            "--accommodation", type=int, action="append", dest="accommodations", help="Limit to these accommodations"
+        )
+        parser.add_argument("--output", default="-", help='CSV file to write, "-" for stdout')
+        parser.add_argument(
+            "--mark-settled", action="store_true", help="Mark the completed payments of the report as settled"
+        )
+
+    def handle(self, *args, **options):
+        start, end = parse_date(options["start"]), parse_date(options["end"])
+        if start >= end:
+            raise CommandError("--start must be earlier than --end")
+
+        lines = csv_lines(report_rows(start, end, options["accommodations"]))
+        if options["output"] == "-":
+            for line in lines:
+                self.stdout.write(line, ending="")
+        else:
+            with open(options["output"], "w", newline="") as file:
+                file.writelines(lines)
+
+        if options["mark_settled"]:
+            settled = mark_settled(start, end, options["accommodations"])
+            self.stderr.write(self.style.SUCCESS(f"Marked {settled} payments settled"))
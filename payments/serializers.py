@@ -0,0 +1,14 @@
+from rest_framework import serializers
+
+
+class SettlementPeriodSerializer(serializers.Serializer):
+    """Serializer for validating the period (end exclusive) and optional accommodations of a settlement report"""
+
+    start = serializers.DateField()
+    end = serializers.DateField()
+    accommodations = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+
+    def validate(self, data):
+        if data["start"] >= data["end"]:
+            raise serializers.ValidationError({"end": "'start' must be earlier than 'end'"})
+        return data
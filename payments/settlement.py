@@ -0,0 +1,146 @@
+"""
+Partner settlement reports.
+
+A report has one row per accommodation and month, for the approved bookings that check in during the
+requested period. Nights, retail and cost totals are grouped over BookingLineItem, and paid amounts
+over completed Payments. Both groupings run in the database and come back ordered by the same key,
+so they can be merged while streaming. Memory therefore stays bounded by one row, not by the number
+of line items. Joining the two tables in one query would multiply line items by payments.
+"""
+
+import csv
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from bookings.models import BookingLineItem, BookingStatusChoices
+from .models import Payment, PaymentAdminInfo, PaymentStatus, SettlementStatus
+
+# Only stays that went ahead are owed to partners
+SETTLEABLE_BOOKING_STATUSES = [BookingStatusChoices.APPROVED]
+
+REPORT_COLUMNS = [
+    "accommodation_id",
+    "accommodation",
+    "period",
+    "bookings",
+    "nights",
+    "retail_total",
+    "cost_total",
+    "margin",
+    "paid_total",
+    "settlement_status",
+]
+
+SETTLE_BATCH_SIZE = 1000
+
+
+def _scope(start, end, accommodation_ids=None, prefix=""):
+    """Filters selecting the rows of approved bookings checking in between start and end (exclusive)"""
+    filters = {
+        f"{prefix}status__in": SETTLEABLE_BOOKING_STATUSES,
+        f"{prefix}check_in__date__gte": start,
+        f"{prefix}check_in__date__lt": end,
+    }
+    if accommodation_ids:
+        filters[f"{prefix}package__room_type__accommodation_id__in"] = accommodation_ids
+    return filters
+
+
+def _group_keys(prefix):
+    return {
+        "accommodation_id": F(f"{prefix}package__room_type__accommodation_id"),
+        "period": TruncMonth(f"{prefix}check_in"),
+    }
+
+
+def settlement_payments(start, end, accommodation_ids=None):
+    """Completed payments of the bookings a report covers"""
+    return Payment.objects.filter(status=PaymentStatus.COMPLETED, **_scope(start, end, accommodation_ids, "booking__"))
+
+
+def _settlement_status(payments, settled):
+    if payments and settled == payments:
+        return SettlementStatus.SETTLED
+    if settled:
+        return SettlementStatus.PARTIALLY_SETTLED
+    return SettlementStatus.NOT_SETTLED
+
+
+def report_rows(start, end, accommodation_ids=None):
+    """Yield one dict per accommodation and month, in accommodation and period order"""
+    stays = (
+        BookingLineItem.objects.filter(**_scope(start, end, accommodation_ids, "booking__"))
+        .values(**_group_keys("booking__"), accommodation=F("booking__package__room_type__accommodation__name"))
+        .annotate(
+            bookings=Count("booking", distinct=True),
+            nights=Count("id"),
+            retail_total=Sum("retail_price"),
+            cost_total=Sum("cost_price"),
+        )
+        .order_by("accommodation_id", "period")
+    )
+    paid = iter(
+        settlement_payments(start, end, accommodation_ids)
+        .values(**_group_keys("booking__"))
+        .annotate(
+            paid_total=Sum("amount"),
+            payments=Count("id"),
+            settled=Count("id", filter=Q(admin_info__settlement_status=SettlementStatus.SETTLED)),
+        )
+        .order_by("accommodation_id", "period")
+        .iterator()
+    )
+
+    payment = next(paid, None)
+    for row in stays.iterator():
+        key = (row["accommodation_id"], row["period"])
+        # Payments of bookings without line items have no stay row to attach to
+        while payment and (payment["accommodation_id"], payment["period"]) < key:
+            payment = next(paid, None)
+        matched = payment if payment and (payment["accommodation_id"], payment["period"]) == key else None
+        yield {
+            **row,
+            "period": row["period"].strftime("%Y-%m"),
+            "margin": row["retail_total"] - row["cost_total"],
+            "paid_total": matched["paid_total"] if matched else 0,
+            "settlement_status": _settlement_status(
+                matched["payments"] if matched else 0, matched["settled"] if matched else 0
+            ).value,
+        }
+
+
+class _Echo:
+    """File-like object whose write returns the line, so csv.writer can feed a generator"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """Yield the report as CSV text, one line at a time"""
+    writer = csv.DictWriter(_Echo(), fieldnames=REPORT_COLUMNS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def mark_settled(start, end, accommodation_ids=None):
+    """Mark every completed payment a report covers as settled. Returns the number of payments changed."""
+    payments = settlement_payments(start, end, accommodation_ids)
+    with transaction.atomic():
+        updated = (
+            PaymentAdminInfo.objects.filter(payment__in=payments.values("id"))
+            .exclude(settlement_status=SettlementStatus.SETTLED)
+            .update(settlement_status=SettlementStatus.SETTLED)
+        )
+        # Payments without admin info yet; each batch drops out of the next query once created
+        missing = payments.filter(admin_info__isnull=True).order_by("id").values_list("id", flat=True)
+        while batch := list(missing[:SETTLE_BATCH_SIZE]):
+            PaymentAdminInfo.objects.bulk_create(
+                PaymentAdminInfo(payment_id=payment_id, settlement_status=SettlementStatus.SETTLED)
+                for payment_id in batch
+            )
+            updated += len(batch)
+    return updated
@@ -0,0 +1,160 @@
+import csv
+import io
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from .models import Payment, PaymentAdminInfo, PaymentMethod, PaymentStatus, SettlementStatus
+from accommodations.models import Accommodation, City
+from bookings.models import Booking, BookingLineItem, BookingStatusChoices
+from packages.models import Package, PackageDailyAvailability
+from room_types.models import RoomType
+from users.models import User
+
+# ----- Constants -----
+SETTLEMENTS_URL = "/api/v1/payments/settlements"
+PERIOD = {"start": "2025-03-01", "end": "2025-05-01"}
+
+
+# ----- Fixtures -----
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def staff_client(client, db):
+    staff = User.objects.create_user(
+        username="staff",
+        email="staff@gmail.com",
+        first_name="abc",
+        last_name="edf",
+        phone_number="01011112222",
+        password="test123!",
+        is_staff=True,
+    )
+    client.force_login(staff)
+    return client
+
+
+def add_booking(package, check_in, nights, status=BookingStatusChoices.APPROVED, payments=()):
+    booking = Booking.objects.create(
+        package=package,
+        check_in=datetime.combine(check_in, datetime.min.time(), dt_timezone.utc),
+        check_out=datetime.combine(check_in + timedelta(days=nights), datetime.min.time(), dt_timezone.utc),
+        guests=2,
+        status=status,
+    )
+    for offset in range(nights):
+        night, _ = PackageDailyAvailability.objects.get_or_create(
+            package=package,
+            date=check_in + timedelta(days=offset),
+            defaults={"retail_price": 100000, "cost_price": 80000, "allotment": 10},
+        )
+        BookingLineItem.objects.create(booking=booking, daily_availability=night, retail_price=100000, cost_price=80000)
+    for amount, payment_status in payments:
+        Payment.objects.create(booking=booking, amount=amount, method=PaymentMethod.CARD, status=payment_status)
+    return booking
+
+
+@pytest.fixture
+def sample_db(db):
+    city = City.objects.create(name="Seoul")
+    packages = []
+    for name in ("Hotel A", "Hotel B"):
+        accommodation = Accommodation.objects.create(name=name, region="seoul", location="123", city=city)
+        room_type = RoomType.objects.create(accommodation=accommodation, name="Deluxe")
+        packages.append(Package.objects.create(room_type=room_type, name="Room Only", base_price=100000))
+
+    completed, pending = PaymentStatus.COMPLETED, PaymentStatus.PENDING
+    add_booking(packages[0], date(2025, 3, 10), 2, payments=[(150000, completed), (50000, completed)])
+    add_booking(packages[0], date(2025, 3, 20), 1, payments=[(100000, pending)])
+    add_booking(packages[0], date(2025, 4, 5), 3, payments=[(300000, completed)])
+    add_booking(packages[1], date(2025, 3, 15), 1)
+    # Outside the report: cancelled, or checking in after the period
+    add_booking(packages[0], date(2025, 3, 12), 2, status=BookingStatusChoices.CANCELLED)
+    add_booking(packages[1], date(2025, 5, 1), 1, payments=[(100000, completed)])
+    return {"accommodations": [package.room_type.accommodation for package in packages]}
+
+
+def read_csv(content):
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+# ----- SettlementReportView Tests -----
+
+
+# Success 1: One row per accommodation and month, streamed as CSV
+@pytest.mark.django_db
+def test_settlement_report(staff_client, sample_db):
+    response = staff_client.get(SETTLEMENTS_URL, PERIOD)
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv"
+    rows = read_csv(b"".join(response.streaming_content).decode())
+    hotel_a, hotel_b = sample_db["accommodations"]
+    assert [(row["accommodation"], row["period"]) for row in rows] == [
+        ("Hotel A", "2025-03"),
+        ("Hotel A", "2025-04"),
+        ("Hotel B", "2025-03"),
+    ]
+    march = rows[0]
+    assert march["accommodation_id"] == str(hotel_a.id)
+    assert (march["bookings"], march["nights"]) == ("2", "3")
+    assert (march["retail_total"], march["cost_total"], march["margin"]) == ("300000", "240000", "60000")
+    # Pending payments are not counted as paid
+    assert march["paid_total"] == "200000"
+    assert march["settlement_status"] == SettlementStatus.NOT_SETTLED
+    assert rows[2]["paid_total"] == "0"
+
+
+# Success 2: Marking a report settled covers only its completed payments
+@pytest.mark.django_db
+def test_settlement_mark_settled(staff_client, sample_db):
+    hotel_a = sample_db["accommodations"][0]
+    march_payment = Payment.objects.filter(status=PaymentStatus.COMPLETED).order_by("id").first()
+    PaymentAdminInfo.objects.create(payment=march_payment)
+
+    response = staff_client.post(
+        SETTLEMENTS_URL, {"start": "2025-03-01", "end": "2025-04-01", "accommodations": [hotel_a.id]}, format="json"
+    )
+
+    assert response.status_code == 200
+    assert response.data["settled"] == 2
+    assert PaymentAdminInfo.objects.filter(settlement_status=SettlementStatus.SETTLED).count() == 2
+    rows = read_csv(b"".join(staff_client.get(SETTLEMENTS_URL, PERIOD).streaming_content).decode())
+    assert [row["settlement_status"] for row in rows] == [
+        SettlementStatus.SETTLED,
+        SettlementStatus.NOT_SETTLED,
+        SettlementStatus.NOT_SETTLED,
+    ]
+
+
+# Failure 1: Staff only
+@pytest.mark.django_db
+def test_settlement_report_staff_only(client, sample_db):
+    response = client.get(SETTLEMENTS_URL, PERIOD)
+    assert response.status_code == 403
+
+
+# Failure 2: Invalid period
+@pytest.mark.django_db
+def test_settlement_report_invalid_period(staff_client, sample_db):
+    response = staff_client.get(SETTLEMENTS_URL, {"start": "2025-05-01", "end": "2025-03-01"})
+    assert response.status_code == 400
+
+
+# ----- export_settlement_report command Tests -----
+
+
+@pytest.mark.django_db
+def test_export_settlement_report_command(sample_db, tmp_path):
+    output = tmp_path / "report.csv"
+    err = io.StringIO()
+    call_command("export_settlement_report", output=str(output), mark_settled=True, stderr=err, **PERIOD)
+
+    rows = read_csv(output.read_text())
+    assert len(rows) == 3
+    assert "Marked 3 payments settled" in err.getvalue()
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("settlements", views.SettlementReportView.as_view()),  # GET (CSV), POST (mark settled)
+]
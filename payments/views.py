@@ -1,3 +1,43 @@
-from django.shortcuts import render
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from .serializers import SettlementPeriodSerializer
+from .settlement import csv_lines, mark_settled, report_rows
+from common.permissions import IsStaffUser
+
+
+class SettlementReportView(APIView):
+    """
+    GET: Stream the partner settlement report for a period as CSV (?start=&end=&accommodation=)
+    POST: Mark every completed payment the report covers as settled
+    """
+
+    permission_classes = [IsStaffUser]
+
+    def get(self, request):
+        serializer = SettlementPeriodSerializer(
+            data={
+                "start": request.query_params.get("start"),
+                "end": request.query_params.get("end"),
+                "accommodations": request.query_params.getlist("accommodation"),
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        period = serializer.validated_data
+
+        response = StreamingHttpResponse(
+            csv_lines(report_rows(period["start"], period["end"], period.get("accommodations"))),
+            content_type="text/csv",
+        )
+        response["Content-Disposition"] = f'attachment; filename="settlement-{period["start"]}-{period["end"]}.csv"'
+        return response
+
+    def post(self, request):
+        serializer = SettlementPeriodSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        period = serializer.validated_data
+
+        settled = mark_settled(period["start"], period["end"], period.get("accommodations"))
+        return Response({"settled": settled}, status=status.HTTP_200_OK)
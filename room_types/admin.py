@@ -1,5 +1,15 @@
-from django.contrib import admin
+from datetime import timedelta
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
 from .models import RoomType, BedConfiguration
+from packages.bulk import AllotmentBelowSold
+from packages.grid import load_grid, parse_month, save_grid
+from packages.models import AvailabilityStatus
 
 
 class BedConfigurationInline(admin.TabularInline):
@@ -9,18 +19,72 @@ class BedConfigurationInline(admin.TabularInline):
 
 @admin.register(RoomType)
 class RoomTypeAdmin(admin.ModelAdmin):
-    list_display = ["accommodation", "name", "base_occupancy", "max_occupancy"]
+    list_display = ["accommodation", "name", "base_occupancy", "max_occupancy", "calendar_link"]
     fieldsets = [
         (("Info"), {"fields": ["accommodation", "name", "base_occupancy", "max_occupancy", "description"]}),
         (("Number of rooms"), {"fields": ["num_living_room", "num_bedrooms", "num_bathrooms"]}),
     ]
-    list_filter = ["accommodation__name"]
+    list_filter = ["accommodation"]
+    list_select_related = ["accommodation"]
     search_fields = ["name", "accommodation__name"]
     inlines = [BedConfigurationInline]
 
+    def get_urls(self):
+        urls = [
+            path(
+                "<int:object_id>/calendar/",
+                self.admin_site.admin_view(self.calendar_view),
+                name="room_types_roomtype_calendar",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    @admin.display(description="Calendar")
+    def calendar_link(self, obj):
+        return format_html('<a href="{}">Calendar</a>', reverse("admin:room_types_roomtype_calendar", args=[obj.pk]))
+
+    def calendar_view(self, request, object_id):
+        """Month x package grid of the daily prices and status of a room type, saved as one batch"""
+        if not request.user.has_perm("packages.change_packagedailyavailability"):
+            raise PermissionDenied
+        room_type = get_object_or_404(RoomType.objects.select_related("accommodation"), pk=object_id)
+        month = parse_month(request.GET.get("month"))
+        try:
+            page = max(int(request.GET.get("page", 1)), 1)
+        except ValueError:
+            page = 1
+        grid = load_grid(room_type.pk, month, page)
+
+        if request.method == "POST":
+            try:
+                counts = save_grid(grid, request.POST)
+            except ValidationError as error:
+                self.message_user(request, error.messages[0], messages.ERROR)
+            except AllotmentBelowSold as error:
+                self.message_user(request, str(error), messages.ERROR)
+            else:
+                self.message_user(request, f"Saved {counts['inserted']} new and {counts['updated']} changed nights")
+                return redirect(request.get_full_path())
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "original": room_type,
+            "title": f"{room_type} calendar",
+            "month": month,
+            "previous_month": (month - timedelta(days=1)).replace(day=1),
+            "next_month": (month + timedelta(days=32)).replace(day=1),
+            "page": page,
+            "grid": grid,
+            "status_choices": AvailabilityStatus.choices,
+        }
+        return TemplateResponse(request, "admin/room_types/roomtype/calendar.html", context)
+
 
 @admin.register(BedConfiguration)
 class BedConfigureAdmin(admin.ModelAdmin):
     list_display = ["room_type", "bed_type", "count"]
-    list_filter = ["room_type__accommodation__name"]
+    list_filter = ["room_type__accommodation"]
+    # RoomType.__str__ walks accommodation
+    list_select_related = ["room_type__accommodation"]
     search_fields = ["room_type__name", "room_type__accommodation__name"]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0005_accommodation_wishlist_count'),
+        ('room_types', '0008_alter_roomtype_base_occupancy_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='roomtype',
+            index=models.Index(fields=['accommodation', 'base_occupancy', 'max_occupancy'], name='room_type_occupancy_idx'),
+        ),
+    ]
@@ -38,5 +38,11 @@ class RoomType(models.Model):
     num_bedrooms = models.PositiveSmallIntegerField(default=0, help_text="침실 수")
     num_bathrooms = models.PositiveSmallIntegerField(default=0, help_text="화장실 수")
 
+    class Meta:
+        indexes = [
+            # Room types of an accommodation that fit a party (package search)
+            models.Index(fields=["accommodation", "base_occupancy", "max_occupancy"], name="room_type_occupancy_idx"),
+        ]
+
     def __str__(self):
         return f"{self.accommodation} - {self.name}"
@@ -3,6 +3,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.forms import ReadOnlyPasswordHashField
 from django.core.exceptions import ValidationError
+from django.db.models import Count
 from .models import User, GuestInfo
 
 
@@ -85,6 +86,13 @@ class UserAdmin(UserAdmin):
 @admin.register(GuestInfo)
 class GuestUserAdmin(admin.ModelAdmin):
     list_display = ["first_name", "last_name", "phone_number", "num_of_bookings"]
+    # phone_number is indexed (guest_phone_idx); an exact match can use it
+    search_fields = ["=phone_number"]
+    show_full_result_count = False
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(booking_count=Count("bookings"))
+
+    @admin.display(description="Bookings", ordering="booking_count")
     def num_of_bookings(self, obj):
-        return obj.bookings.count()
+        return obj.booking_count
@@ -0,0 +1,29 @@
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .tokens import ACCESS, InvalidToken, get_user, read_token
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authenticate "Authorization: Bearer <access token>" headers issued by users.tokens.
+    request.auth is the token payload. Requests without the header fall through to the next class.
+    """
+
+    keyword = b"bearer"
+
+    def authenticate(self, request):
+        header = get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword:
+            return None
+        if len(header) != 2:
+            raise AuthenticationFailed("Invalid token header")
+
+        try:
+            payload = read_token(header[1].decode(), ACCESS)
+            return get_user(payload), payload
+        except (InvalidToken, UnicodeError) as error:
+            raise AuthenticationFailed(str(error))
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
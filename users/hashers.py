@@ -0,0 +1,87 @@
+"""
+Password hashing policy.
+
+The tuned hashers keep Django's algorithm names, so hashes made with other cost parameters still
+verify; their cost is read from settings on every call, which lets each deployment tier pick its
+own trade-off (see the "Password hashing" block in settings).
+
+When a login verifies against an outdated hash, User.check_password hands the upgrade to
+schedule_rehash() instead of re-hashing inline: the new hash is computed on a small thread pool
+after the request's transaction commits, so the login response only pays for one verification.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+    make_password,
+)
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with settings.PASSWORD_PBKDF2_ITERATIONS iterations"""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with settings.PASSWORD_SCRYPT_WORK_FACTOR as N"""
+
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with the time and memory cost from settings"""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_REHASH_WORKERS, thread_name_prefix="password-rehash"
+        )
+    return _executor
+
+
+def rehash_password(user_pk, encoded, raw_password):
+    """Store a hash made with the preferred hasher, unless the password changed since it was verified"""
+    from .models import User
+
+    return User.objects.filter(pk=user_pk, password=encoded).update(password=make_password(raw_password)) == 1
+
+
+def _run_rehash(user_pk, encoded, raw_password):
+    try:
+        rehash_password(user_pk, encoded, raw_password)
+    except Exception:
+        logger.exception("Could not upgrade the password hash of user %s", user_pk)
+    finally:
+        # Worker threads keep their own connection; do not leave it open between jobs
+        connection.close()
+
+
+def schedule_rehash(user_pk, encoded, raw_password):
+    """Upgrade the hash in the background once the current transaction commits"""
+    transaction.on_commit(lambda: get_executor().submit(_run_rehash, user_pk, encoded, raw_password))
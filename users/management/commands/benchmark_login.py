@@ -0,0 +1,48 @@
+from time import perf_counter
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+PASSWORD = "Bench-pass-2025!"
+
+
+class Command(BaseCommand):
+    help = (
+        "Report password verifications per second on one core (the CPU cost of a login) "
+        "for a baseline hasher and the configured hashing policy"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=20, help="Verifications per hasher")
+        parser.add_argument(
+            "--baseline",
+            default="django.contrib.auth.hashers.PBKDF2PasswordHasher",
+            help="Dotted path of the hasher to compare against (Django's default by default)",
+        )
+
+    def handle(self, *args, **options):
+        if options["rounds"] < 1:
+            raise CommandError("--rounds must be at least 1")
+        try:
+            baseline = import_string(options["baseline"])()
+        except ImportError as error:
+            raise CommandError(str(error))
+
+        results = []
+        for label, hasher in (("before", baseline), ("after", get_hasher("default"))):
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+            start = perf_counter()
+            for _ in range(options["rounds"]):
+                hasher.verify(PASSWORD, encoded)
+            rate = options["rounds"] / (perf_counter() - start)
+            results.append(rate)
+
+            # Only the cost parameters, not the salt or hash
+            summary = {
+                key: value for key, value in hasher.safe_summary(encoded).items() if key not in ("salt", "hash")
+            }
+            params = ", ".join(f"{key}={value}" for key, value in summary.items())
+            self.stdout.write(f"{label:<6} {params}: {rate:.1f} logins/s/core")
+
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {results[1] / results[0]:.2f}x"))
@@ -0,0 +1,35 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions in small batches, so a large django_session table is never "
+        "locked by one long DELETE (a batched clearsessions)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Sessions deleted per statement")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, "get_model_class"):
+            # Cookie sessions have nothing stored server-side
+            self.stdout.write(f"Session engine '{settings.SESSION_ENGINE}' stores no sessions to purge")
+            return
+
+        expired = store.get_model_class().objects.filter(expire_date__lt=timezone.now())
+        deleted = 0
+        while True:
+            keys = list(expired.values_list("session_key", flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted += store.get_model_class().objects.filter(session_key__in=keys).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired sessions"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_guestinfo_alter_user_email_alter_user_first_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='credentials_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
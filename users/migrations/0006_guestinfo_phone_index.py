@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_credentials_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='guestinfo',
+            index=models.Index(fields=['phone_number'], name='guest_phone_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.contrib.auth.hashers import verify_password
 from django.contrib.auth.models import AbstractUser
+from django.utils.crypto import salted_hmac
 from django.core.validators import RegexValidator
 from django.core.validators import EmailValidator
+from .hashers import schedule_rehash
 
 
 class CustomBaseUser(models.Model):
@@ -29,10 +32,36 @@ class User(AbstractUser, CustomBaseUser):
 
     avatar = models.ImageField(null=True, blank=True)
     points = models.PositiveIntegerField(default=0)
+    # Bumped whenever the password is set; background rehashes leave it alone
+    credentials_version = models.PositiveIntegerField(default=0)
+
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        self.credentials_version += 1
+
+    def _get_session_auth_hash(self, secret=None):
+        """Derived from credentials_version so a background rehash does not log the user out everywhere"""
+        return salted_hmac(
+            "users.User.get_session_auth_hash",
+            f"{self.pk}:{self.credentials_version}",
+            secret=secret,
+            algorithm="sha256",
+        ).hexdigest()
+
+    def check_password(self, raw_password):
+        """Outdated hashes are upgraded in the background (users.hashers) instead of during the request"""
+        is_correct, must_update = verify_password(raw_password, self.password)
+        if is_correct and must_update and self.pk:
+            schedule_rehash(self.pk, self.password, raw_password)
+        return is_correct
 
 
 class GuestInfo(CustomBaseUser):
     """Stores guest information for non-register bookings."""
 
+    class Meta:
+        # Guest self-service looks bookings up by phone number
+        indexes = [models.Index(fields=["phone_number"], name="guest_phone_idx")]
+
     def __str__(self):
         return f"Guest: {self.first_name} {self.last_name}_{self.phone_number}"
@@ -1,6 +1,14 @@
 import pytest
+from datetime import timedelta
+from io import StringIO
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.utils import timezone
+
+from .hashers import rehash_password
+from .tokens import ACCESS, get_cache as get_token_cache, get_user, read_token
 
 # ----- Constants -----
 User = get_user_model()
@@ -9,6 +17,9 @@ LOGIN_URL = "/api/v1/users/login"
 LOGOUT_URL = "/api/v1/users/logout"
 PROFILE_URL = "/api/v1/users/me"
 CHANGE_PASSWORD_URL = "/api/v1/users/change-password"
+TOKEN_URL = "/api/v1/users/token"
+TOKEN_REFRESH_URL = "/api/v1/users/token/refresh"
+TOKEN_REVOKE_URL = "/api/v1/users/token/revoke"
 
 
 # ----- Fixtures -----
@@ -146,6 +157,50 @@ def test_login_success(client, base_payload):
     assert response.status_code == 200
 
 
+# Success 2. an outdated hash is upgraded after commit, not during the request
+@pytest.mark.django_db
+def test_login_rehash_deferred(client, base_payload, settings, django_capture_on_commit_callbacks):
+    settings.PASSWORD_PBKDF2_ITERATIONS = 1000
+    user = User.objects.create_user(**base_payload)
+    settings.PASSWORD_PBKDF2_ITERATIONS = 2000
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = post_login(client)
+    user.refresh_from_db()
+
+    assert response.status_code == 200
+    assert user.password.startswith("pbkdf2_sha256$1000$")
+    assert len(callbacks) == 1
+
+
+# Success 3. the background upgrade does not overwrite a password changed in the meantime
+@pytest.mark.django_db
+def test_rehash_password(base_payload, settings):
+    settings.PASSWORD_PBKDF2_ITERATIONS = 1000
+    user = User.objects.create_user(**base_payload)
+    settings.PASSWORD_PBKDF2_ITERATIONS = 2000
+
+    assert rehash_password(user.pk, "stale-hash", base_payload["password"]) is False
+    assert rehash_password(user.pk, user.password, base_payload["password"]) is True
+    user.refresh_from_db()
+    assert user.password.startswith("pbkdf2_sha256$2000$")
+    assert user.check_password(base_payload["password"])
+
+
+# Success 4. the session opened by the login survives the background upgrade
+@pytest.mark.django_db
+def test_login_session_survives_rehash(client, base_payload, settings):
+    settings.PASSWORD_PBKDF2_ITERATIONS = 1000
+    user = User.objects.create_user(**base_payload)
+    settings.PASSWORD_PBKDF2_ITERATIONS = 2000
+    post_login(client)
+
+    rehash_password(user.pk, user.password, base_payload["password"])
+    response = client.get(PROFILE_URL)
+
+    assert response.status_code == 200
+
+
 # Failure 1. missing required field(s)
 @pytest.mark.parametrize("missing_fields", ["username", "password"])
 @pytest.mark.django_db
@@ -332,3 +387,140 @@ def test_change_password_password_mismatch(authenticated_client):
 def test_change_password_invalid_format(authenticated_client):
     response = post_change_password(authenticated_client, {"new_password": "123", "confirm_password": "123"})
     assert response.status_code == 400
+
+
+# ----- benchmark_login command Tests -----
+
+
+@pytest.mark.django_db
+def test_benchmark_login_command(settings):
+    settings.PASSWORD_PBKDF2_ITERATIONS = 1000
+    out = StringIO()
+    call_command("benchmark_login", rounds=1, baseline="users.hashers.TunedPBKDF2PasswordHasher", stdout=out)
+
+    assert "iterations=1000" in out.getvalue()
+    assert "logins/s/core" in out.getvalue()
+
+
+# ----- Token authentication Tests -----
+
+
+@pytest.fixture
+def tokens(client, base_payload):
+    get_token_cache().clear()
+    User.objects.create_user(**base_payload)
+    response = client.post(TOKEN_URL, {"username": base_payload["username"], "password": base_payload["password"]})
+    assert response.status_code == 200
+    yield response.data
+    get_token_cache().clear()
+
+
+# Session auth comes first in DEFAULT_AUTHENTICATION_CLASSES, so failures are 403 as elsewhere in the API
+def bearer(token):
+    return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+# Success 1. a warm token request does no authentication queries
+@pytest.mark.django_db
+def test_token_profile_without_auth_queries(tokens, django_assert_num_queries):
+    client = APIClient()
+    client.get(PROFILE_URL, **bearer(tokens["access"]))
+
+    with django_assert_num_queries(0):
+        response = client.get(PROFILE_URL, **bearer(tokens["access"]))
+
+    assert response.status_code == 200
+    assert response.data["username"] == "test123"
+
+
+# Success 2. a refresh token is exchanged once for a new pair
+@pytest.mark.django_db
+def test_token_refresh_rotates(client, tokens):
+    response = client.post(TOKEN_REFRESH_URL, {"refresh": tokens["refresh"]})
+    assert response.status_code == 200
+    assert client.get(PROFILE_URL, **bearer(response.data["access"])).status_code == 200
+
+    reused = client.post(TOKEN_REFRESH_URL, {"refresh": tokens["refresh"]})
+    assert reused.status_code == 403
+
+
+# Success 3. revoking denies both the refresh token and the access token used for the call
+@pytest.mark.django_db
+def test_token_revoke(client, tokens):
+    response = client.post(TOKEN_REVOKE_URL, {"refresh": tokens["refresh"]}, **bearer(tokens["access"]))
+    assert response.status_code == 200
+
+    assert client.get(PROFILE_URL, **bearer(tokens["access"])).status_code == 403
+    assert client.post(TOKEN_REFRESH_URL, {"refresh": tokens["refresh"]}).status_code == 403
+
+
+# Success 4. the cached user carries no password hash, yet password checks still work
+@pytest.mark.django_db
+def test_token_cached_user_without_password(client, tokens, base_payload):
+    user = User.objects.get(username="test123")
+    client.get(PROFILE_URL, **bearer(tokens["access"]))
+
+    cached = get_user(read_token(tokens["access"], ACCESS))
+    assert "password" in cached.get_deferred_fields()
+    assert cached.check_password(base_payload["password"])
+    assert "password" not in get_token_cache().get(f"auth-token:user:{user.pk}").__dict__
+
+
+# Failure 1. setting a new password invalidates every token of the user
+@pytest.mark.django_db
+def test_token_invalid_after_password_change(client, tokens):
+    user = User.objects.get(username="test123")
+    user.set_password("another456@")
+    user.save()
+
+    assert client.get(PROFILE_URL, **bearer(tokens["access"])).status_code == 403
+    assert client.post(TOKEN_REFRESH_URL, {"refresh": tokens["refresh"]}).status_code == 403
+
+
+# Failure 2. expired, tampered and wrong-kind tokens are rejected
+@pytest.mark.django_db
+def test_token_rejected(client, tokens, settings):
+    assert client.get(PROFILE_URL, **bearer(tokens["refresh"])).status_code == 403
+    assert client.get(PROFILE_URL, **bearer(tokens["access"] + "x")).status_code == 403
+
+    settings.AUTH_TOKEN_ACCESS_LIFETIME = -1
+    response = client.get(PROFILE_URL, **bearer(tokens["access"]))
+    assert response.status_code == 403
+    assert response.data["detail"] == "Token has expired"
+
+
+# Failure 3. wrong credentials
+@pytest.mark.django_db
+def test_token_wrong_password(client, base_payload):
+    User.objects.create_user(**base_payload)
+    response = client.post(TOKEN_URL, {"username": base_payload["username"], "password": "wrong_password"})
+    assert response.status_code == 403
+
+
+# ----- purge_sessions command Tests -----
+
+
+@pytest.mark.django_db
+def test_purge_sessions_in_batches(settings):
+    settings.SESSION_ENGINE = "django.contrib.sessions.backends.db"
+    now = timezone.now()
+    expired = now - timedelta(days=1)
+    Session.objects.bulk_create(
+        [Session(session_key=f"expired{index}", session_data="", expire_date=expired) for index in range(5)]
+        + [Session(session_key="active", session_data="", expire_date=now + timedelta(days=1))]
+    )
+
+    out = StringIO()
+    call_command("purge_sessions", batch_size=2, stdout=out)
+
+    assert "Purged 5 expired sessions" in out.getvalue()
+    assert list(Session.objects.values_list("session_key", flat=True)) == ["active"]
+
+
+@pytest.mark.django_db
+def test_purge_sessions_cookie_engine(settings):
+    settings.SESSION_ENGINE = "django.contrib.sessions.backends.signed_cookies"
+    out = StringIO()
+    call_command("purge_sessions", stdout=out)
+
+    assert "stores no sessions to purge" in out.getvalue()
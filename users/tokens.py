@@ -0,0 +1,103 @@
+"""
+Stateless signed tokens for API clients.
+
+Tokens are django.core.signing payloads ({"uid", "jti", "ver"}) with a timestamp, so verifying one
+needs no storage. Access tokens are short-lived; a refresh token is exchanged exactly once for a new
+pair. Revocation stores only the token id in the cache until the token would have expired anyway,
+and "ver" (User.credentials_version) invalidates every token of a user whose password is set again.
+Users are read through the cache, so a request with a warm cache does no authentication queries; the
+cached user is loaded without its password hash, which is only read from the database when needed.
+The denylist and user cache live in settings.AUTH_TOKEN_CACHE_ALIAS, which must be shared by all
+workers (e.g. redis) for revocation to apply everywhere.
+"""
+
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+class InvalidToken(Exception):
+    """Raised when a token is malformed, expired, revoked or no longer matches its user"""
+
+
+def get_cache():
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def lifetime(kind):
+    return settings.AUTH_TOKEN_ACCESS_LIFETIME if kind == ACCESS else settings.AUTH_TOKEN_REFRESH_LIFETIME
+
+
+def _salt(kind):
+    return f"users.tokens.{kind}"
+
+
+def _denied_key(jti):
+    return f"auth-token:denied:{jti}"
+
+
+def _user_key(user_pk):
+    return f"auth-token:user:{user_pk}"
+
+
+def issue_tokens(user):
+    """A fresh access/refresh pair for the user"""
+    tokens = {
+        kind: signing.dumps(
+            {"uid": user.pk, "jti": uuid4().hex, "ver": user.credentials_version}, salt=_salt(kind), compress=True
+        )
+        for kind in (ACCESS, REFRESH)
+    }
+    tokens["expires_in"] = settings.AUTH_TOKEN_ACCESS_LIFETIME
+    return tokens
+
+
+def read_token(token, kind):
+    """Verify signature, age and denylist, and return the payload"""
+    try:
+        payload = signing.loads(token, salt=_salt(kind), max_age=lifetime(kind))
+    except signing.SignatureExpired:
+        raise InvalidToken("Token has expired")
+    except signing.BadSignature:
+        raise InvalidToken("Invalid token")
+    if get_cache().get(_denied_key(payload["jti"])):
+        raise InvalidToken("Token has been revoked")
+    return payload
+
+
+def revoke(payload, kind):
+    """Deny the token until it expires. Returns False if it was already revoked."""
+    return get_cache().add(_denied_key(payload["jti"]), 1, timeout=lifetime(kind))
+
+
+def get_user(payload):
+    """The active user the token was issued to, from the cache when possible"""
+    cache = get_cache()
+    user = cache.get(_user_key(payload["uid"]))
+    if user is None:
+        user = get_user_model().objects.defer("password").filter(pk=payload["uid"], is_active=True).first()
+        if user is None:
+            raise InvalidToken("User not found")
+        cache.set(_user_key(user.pk), user, timeout=settings.AUTH_TOKEN_ACCESS_LIFETIME)
+    if user.credentials_version != payload["ver"]:
+        raise InvalidToken("Token is no longer valid")
+    return user
+
+
+def forget_user(user_pk):
+    get_cache().delete(_user_key(user_pk))
+
+
+def refresh_tokens(refresh_token):
+    """Exchange a refresh token for a new pair; each refresh token can be used once"""
+    payload = read_token(refresh_token, REFRESH)
+    user = get_user(payload)
+    if not revoke(payload, REFRESH):
+        raise InvalidToken("Token has been revoked")
+    return issue_tokens(user)
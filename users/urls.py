@@ -7,4 +7,7 @@ urlpatterns = [
     path("login", views.LogInView.as_view()),
     path("me", views.PrivateUserView.as_view()),
     path("change-password", views.ChangePasswordView.as_view()),
+    path("token", views.TokenObtainView.as_view()),
+    path("token/refresh", views.TokenRefreshView.as_view()),
+    path("token/revoke", views.TokenRevokeView.as_view()),
 ]
@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from .serializers import SignUpSeriailzer, PrivateUserSerializer, ChangePasswordSerializer
+from .tokens import ACCESS, REFRESH, InvalidToken, issue_tokens, read_token, refresh_tokens, revoke
 
 
 class SignUpView(APIView):
@@ -59,6 +60,51 @@ class LogInView(APIView):
             raise AuthenticationFailed("Invalid username or password")
 
 
+class TokenObtainView(APIView):
+    """API view to exchange username and password for an access/refresh token pair"""
+
+    def post(self, request):
+        username = request.data.get("username")
+        password = request.data.get("password")
+
+        if not username or not password:
+            raise ValidationError("Username and password are required")
+        user = authenticate(request, username=username, password=password)
+        if not user:
+            raise AuthenticationFailed("Invalid username or password")
+        return Response(issue_tokens(user), status=status.HTTP_200_OK)
+
+
+class TokenRefreshView(APIView):
+    """API view to exchange a refresh token for a new token pair. Each refresh token works once."""
+
+    def post(self, request):
+        refresh = request.data.get("refresh")
+        if not refresh:
+            raise ValidationError("Refresh token is required")
+        try:
+            tokens = refresh_tokens(refresh)
+        except InvalidToken as error:
+            raise AuthenticationFailed(str(error))
+        return Response(tokens, status=status.HTTP_200_OK)
+
+
+class TokenRevokeView(APIView):
+    """API view to revoke a refresh token, and the access token the request was made with if any"""
+
+    def post(self, request):
+        refresh = request.data.get("refresh")
+        if not refresh:
+            raise ValidationError("Refresh token is required")
+        try:
+            revoke(read_token(refresh, REFRESH), REFRESH)
+        except InvalidToken as error:
+            raise AuthenticationFailed(str(error))
+        if isinstance(request.auth, dict):
+            revoke(request.auth, ACCESS)
+        return Response({"success": "Token revoked"}, status=status.HTTP_200_OK)
+
+
 class PrivateUserView(APIView):
     """API view to retrieve and update authenticated user's profile information"""
 
@@ -7,3 +7,4 @@ class WishlistAdmin(admin.ModelAdmin):
     list_display = ["__str__", "user", "num_of_accommodations"]
     list_filter = ["user", "accommodations"]
     search_fields = ["accommodations__name", "user__username"]
+    readonly_fields = ["accommodation_count"]
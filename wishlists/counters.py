@@ -0,0 +1,68 @@
+"""
+Denormalized wishlist counters.
+
+Accommodation.wishlist_count (how many wishlists saved it) and Wishlist.accommodation_count
+(how many accommodations it holds) are kept in step with the wishlist M2M by wishlists.signals.
+Every change is a single UPDATE with an F() expression, so concurrent saves never lose increments.
+The cached detail of every accommodation whose count moved is dropped, since it serves wishlist_count.
+reconcile_counters() recomputes both from the through table to repair any drift, e.g. after raw SQL
+or bulk deletes that bypass signals.
+"""
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from accommodations.cache import invalidate_details
+from accommodations.models import Accommodation
+from .models import Wishlist
+
+Through = Wishlist.accommodations.through
+
+
+def _shift(queryset, field, delta):
+    # Greatest keeps a drifted counter from failing the positive check on decrement
+    return queryset.update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def apply_change(wishlist_ids, accommodation_ids, delta):
+    """Shift both counters for links between every given wishlist and every given accommodation"""
+    wishlist_ids, accommodation_ids = list(wishlist_ids), list(accommodation_ids)
+    if not wishlist_ids or not accommodation_ids:
+        return
+    _shift(Wishlist.objects.filter(pk__in=wishlist_ids), "accommodation_count", delta * len(accommodation_ids))
+    _shift(Accommodation.objects.filter(pk__in=accommodation_ids), "wishlist_count", delta * len(wishlist_ids))
+    invalidate_details(accommodation_ids)
+
+
+def linked_ids(instance, reverse, pk_set=None):
+    """Ids on the other side of the M2M that are currently linked to instance (restricted to pk_set if given)"""
+    own, other = ("accommodation_id", "wishlist_id") if reverse else ("wishlist_id", "accommodation_id")
+    links = Through.objects.filter(**{own: instance.pk})
+    if pk_set is not None:
+        links = links.filter(**{f"{other}__in": pk_set})
+    return set(links.values_list(other, flat=True))
+
+
+def _actual_count(field):
+    return Coalesce(
+        Subquery(
+            Through.objects.filter(**{field: OuterRef("pk")}).values(field).annotate(total=Count("id")).values("total")
+        ),
+        0,
+    )
+
+
+def reconcile_counters():
+    """Recompute both counters from the through table, touching only drifted rows. Returns the fixed row counts."""
+    fixed = {}
+    for model, counter, field in (
+        (Accommodation, "wishlist_count", "accommodation_id"),
+        (Wishlist, "accommodation_count", "wishlist_id"),
+    ):
+        drifted = model.objects.alias(actual=_actual_count(field)).exclude(**{counter: F("actual")})
+        if model is Accommodation:
+            drifted_ids = list(drifted.values_list("pk", flat=True))
+            drifted = model.objects.filter(pk__in=drifted_ids)
+            invalidate_details(drifted_ids)
+        fixed[model._meta.model_name] = drifted.update(**{counter: _actual_count(field)})
+    return fixed
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from wishlists.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute accommodation and wishlist save counters from the wishlist memberships"
+
+    def handle(self, *args, **options):
+        fixed = reconcile_counters()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fixed {fixed['accommodation']} accommodation and {fixed['wishlist']} wishlist counters"
+            )
+        )
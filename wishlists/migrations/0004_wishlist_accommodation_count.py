@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Wishlist = apps.get_model("wishlists", "Wishlist")
+    Accommodation = apps.get_model("accommodations", "Accommodation")
+    Through = Wishlist.accommodations.through
+
+    def count_of(field):
+        return Coalesce(
+            Subquery(
+                Through.objects.filter(**{field: OuterRef("pk")})
+                .values(field)
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            0,
+        )
+
+    Wishlist.objects.update(accommodation_count=count_of("wishlist_id"))
+    Accommodation.objects.update(wishlist_count=count_of("accommodation_id"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0005_accommodation_wishlist_count'),
+        ('wishlists', '0003_alter_wishlist_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wishlist',
+            name='accommodation_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
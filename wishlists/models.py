@@ -7,9 +7,11 @@ class Wishlist(models.Model):
     name = models.CharField(max_length=40, default="")
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="wishlists")
     accommodations = models.ManyToManyField(Accommodation, related_name="wishlists", blank=True)
+    # Maintained by wishlists.signals, reconciled by the reconcile_wishlist_counters command
+    accommodation_count = models.PositiveIntegerField(default=0)
 
     def num_of_accommodations(self):
-        return self.accommodations.count()
+        return self.accommodation_count
 
     def __str__(self):
         return self.name
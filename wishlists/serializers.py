@@ -1,4 +1,4 @@
-from rest_framework.serializers import ModelSerializer, CharField, ValidationError
+from rest_framework.serializers import ModelSerializer, CharField, IntegerField, ListField, Serializer, ValidationError
 from accommodations.serializers import AccommodationListSerializer
 from .models import Wishlist
 
@@ -22,3 +22,17 @@ class WishlistDetailSerializer(ModelSerializer):
         model = Wishlist
         fields = ["name", "username", "accommodations"]
         read_only_fields = ["username", "accommodations"]
+
+
+class WishlistBatchSerializer(Serializer):
+    """Serializer for validating accommodation ids to add to and remove from a wishlist in one request"""
+
+    add = ListField(child=IntegerField(min_value=1), required=False, default=list, max_length=500)
+    remove = ListField(child=IntegerField(min_value=1), required=False, default=list, max_length=500)
+
+    def validate(self, data):
+        if not data["add"] and not data["remove"]:
+            raise ValidationError({"error": "Provide accommodation ids to 'add' and/or 'remove'"})
+        if set(data["add"]) & set(data["remove"]):
+            raise ValidationError({"error": "The same accommodation cannot be added and removed"})
+        return data
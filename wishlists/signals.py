@@ -0,0 +1,36 @@
+from django.db.models.signals import m2m_changed, pre_delete
+from django.dispatch import receiver
+
+from accommodations.models import Accommodation
+from .counters import apply_change, linked_ids
+from .models import Wishlist
+
+
+@receiver(m2m_changed, sender=Wishlist.accommodations.through)
+def update_wishlist_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    # post_add only receives the ids that were actually inserted, but remove() reports every
+    # requested id, so capture the ones that are really linked before the rows go away
+    if action in ("pre_remove", "pre_clear"):
+        instance._wishlist_unlinked_ids = linked_ids(instance, reverse, pk_set if action == "pre_remove" else None)
+        return
+    if action == "post_add":
+        changed, delta = pk_set, 1
+    elif action in ("post_remove", "post_clear"):
+        changed, delta = instance.__dict__.pop("_wishlist_unlinked_ids", set()), -1
+    else:
+        return
+    if reverse:
+        apply_change(changed, [instance.pk], delta)
+    else:
+        apply_change([instance.pk], changed, delta)
+
+
+@receiver(pre_delete, sender=Wishlist)
+def release_wishlist_counters(sender, instance, **kwargs):
+    """The cascade on the through table does not send m2m_changed"""
+    apply_change([instance.pk], linked_ids(instance, reverse=False), -1)
+
+
+@receiver(pre_delete, sender=Accommodation)
+def release_accommodation_counters(sender, instance, **kwargs):
+    apply_change(linked_ids(instance, reverse=True), [instance.pk], -1)
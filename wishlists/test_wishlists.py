@@ -1,8 +1,11 @@
 import pytest
+from io import StringIO
+from django.core.management import call_command
 from rest_framework.test import APIClient
 
 from .models import Wishlist
 from users.models import User
+from accommodations.cache import get_cache
 from accommodations.models import Accommodation, City
 
 # ----- Constraints ----
@@ -11,6 +14,7 @@ CREATE_WISHLIST_URL = f"/api/v1/wishlists/create"
 ADD_ACC_TO_WISHLIST_URL = (
     lambda wishlist_pk, accommodation_pk: f"/api/v1/wishlists/{wishlist_pk}/add/{accommodation_pk}"
 )
+BATCH_UPDATE_WISHLIST_URL = lambda wishlist_pk: f"/api/v1/wishlists/{wishlist_pk}/accommodations"
 REMOVE_ACC_FROM_WISHLIST_URL = (
     lambda wishlist_pk, accommodation_pk: f"/api/v1/wishlists/{wishlist_pk}/remove/{accommodation_pk}"
 )
@@ -71,6 +75,24 @@ def test_get_wishlist_detail_success(authenticated_client, sample_db):
     assert response.data["name"] == wishlist.name
 
 
+# Success 2: Query count does not grow with the number of accommodations
+@pytest.mark.django_db
+def test_get_wishlist_detail_query_count(authenticated_client, sample_db, django_assert_num_queries):
+    wishlist = sample_db["wishlist"]
+    for index in range(10):
+        city = City.objects.create(name=f"City {index}")
+        wishlist.accommodations.add(
+            Accommodation.objects.create(name=f"Hotel {index}", region="seoul", location="123", city=city)
+        )
+
+    # session + user, wishlist with its owner, accommodations with their cities
+    with django_assert_num_queries(4):
+        response = authenticated_client.get(WISHLIST_DETAIL_URL(wishlist.pk))
+
+    assert len(response.data["accommodations"]) == 11
+    assert {item["city"]["name"] for item in response.data["accommodations"]} >= {"Seoul", "City 9"}
+
+
 # Failure 1
 @pytest.mark.django_db
 def test_get_wishlist_detail_not_found(authenticated_client):
@@ -173,6 +195,16 @@ def test_add_acc_to_wishlist_success(authenticated_client, sample_db, new_accomm
     assert wishlist.accommodations.count() == initial_num + 1
 
 
+# Success 2: Delta response skips re-serializing the wishlist
+@pytest.mark.django_db
+def test_add_acc_to_wishlist_delta(authenticated_client, sample_db, new_accommodation):
+    wishlist = sample_db["wishlist"]
+    response = authenticated_client.post(f"{ADD_ACC_TO_WISHLIST_URL(wishlist.pk, new_accommodation.pk)}?delta=true")
+
+    assert response.status_code == 200
+    assert response.data == {"success": "Accommodation added", "added": new_accommodation.pk, "count": 2}
+
+
 # Failure 1: Wishlist does not exist
 @pytest.mark.django_db
 def test_add_acc_to_wishlist_wishlist_not_found(authenticated_client, new_accommodation):
@@ -224,6 +256,17 @@ def test_remove_acc_from_wishlist_success(authenticated_client, sample_db):
     assert wishlist.accommodations.count() == initial_num - 1
 
 
+# Success 2: Delta response skips re-serializing the wishlist
+@pytest.mark.django_db
+def test_remove_acc_from_wishlist_delta(authenticated_client, sample_db):
+    wishlist = sample_db["wishlist"]
+    accommodation = sample_db["accommodation"]
+    response = authenticated_client.delete(f"{REMOVE_ACC_FROM_WISHLIST_URL(wishlist.pk, accommodation.pk)}?delta=true")
+
+    assert response.status_code == 200
+    assert response.data == {"success": "Accommodation removed", "removed": accommodation.pk, "count": 0}
+
+
 # Failure 1: Wishlist does not exist
 @pytest.mark.django_db
 def test_remove_acc_from_wishlist_wishlist_not_found(authenticated_client, sample_db):
@@ -256,3 +299,154 @@ def test_remove_acc_from_wishlist_acc_not_found(authenticated_client, sample_db)
     response = authenticated_client.delete(REMOVE_ACC_FROM_WISHLIST_URL(wishlist.pk, non_existent_accommodation_pk))
     assert response.status_code == 404
     assert response.data["error"] == "Accommodation not found"
+
+
+# ----- BatchUpdateWishlistView Test -----
+
+
+# Success 1: Adds and removes many accommodations at once
+@pytest.mark.django_db
+def test_batch_update_wishlist_success(authenticated_client, sample_db, django_assert_max_num_queries):
+    wishlist = sample_db["wishlist"]
+    city = City.objects.create(name="Busan")
+    new_ids = [
+        Accommodation.objects.create(name=f"Resort {index}", region="busan", location="test", city=city).pk
+        for index in range(5)
+    ]
+    payload = {"add": new_ids, "remove": [sample_db["accommodation"].pk]}
+
+    # Counter upkeep adds a constant 5 statements: linked-id lookup and two UPDATEs per direction
+    with django_assert_max_num_queries(17):
+        response = authenticated_client.post(BATCH_UPDATE_WISHLIST_URL(wishlist.pk), payload, format="json")
+
+    assert response.status_code == 200
+    assert sorted(item["id"] for item in response.data["accommodations"]) == new_ids
+    assert sorted(wishlist.accommodations.values_list("id", flat=True)) == new_ids
+
+
+# Success 2: Delta response
+@pytest.mark.django_db
+def test_batch_update_wishlist_delta(authenticated_client, sample_db, new_accommodation):
+    wishlist = sample_db["wishlist"]
+    payload = {"add": [new_accommodation.pk, sample_db["accommodation"].pk]}
+    response = authenticated_client.post(f"{BATCH_UPDATE_WISHLIST_URL(wishlist.pk)}?delta=true", payload, format="json")
+
+    assert response.status_code == 200
+    assert response.data["count"] == 2
+
+
+# Failure 1: Unknown ids are reported and nothing changes
+@pytest.mark.django_db
+def test_batch_update_wishlist_unknown_ids(authenticated_client, sample_db, new_accommodation):
+    wishlist = sample_db["wishlist"]
+    payload = {"add": [new_accommodation.pk, 10000]}
+    response = authenticated_client.post(BATCH_UPDATE_WISHLIST_URL(wishlist.pk), payload, format="json")
+
+    assert response.status_code == 404
+    assert response.data["ids"] == [10000]
+    assert wishlist.accommodations.count() == 1
+
+
+# Failure 2: Same id in both lists
+@pytest.mark.django_db
+def test_batch_update_wishlist_conflicting_ids(authenticated_client, sample_db):
+    wishlist = sample_db["wishlist"]
+    accommodation_pk = sample_db["accommodation"].pk
+    payload = {"add": [accommodation_pk], "remove": [accommodation_pk]}
+    response = authenticated_client.post(BATCH_UPDATE_WISHLIST_URL(wishlist.pk), payload, format="json")
+
+    assert response.status_code == 400
+
+
+# ----- Counters Test -----
+
+
+def assert_counters(wishlist, *accommodations):
+    wishlist.refresh_from_db()
+    assert wishlist.accommodation_count == wishlist.accommodations.count()
+    for accommodation in accommodations:
+        accommodation.refresh_from_db()
+        assert accommodation.wishlist_count == accommodation.wishlists.count()
+
+
+# Success 1: Adding, re-adding and removing keep both counters exact
+@pytest.mark.django_db
+def test_counters_follow_add_and_remove(sample_db, new_accommodation):
+    wishlist, accommodation = sample_db["wishlist"], sample_db["accommodation"]
+    assert_counters(wishlist, accommodation, new_accommodation)
+
+    wishlist.accommodations.add(accommodation, new_accommodation)
+    assert_counters(wishlist, accommodation, new_accommodation)
+    assert wishlist.accommodation_count == 2
+
+    # Removing something that is not saved must not decrement anything
+    wishlist.accommodations.remove(new_accommodation)
+    wishlist.accommodations.remove(new_accommodation)
+    assert_counters(wishlist, accommodation, new_accommodation)
+    assert new_accommodation.wishlist_count == 0
+
+
+# Success 2: Changes made from the accommodation side and clear() are counted too
+@pytest.mark.django_db
+def test_counters_follow_reverse_side_and_clear(sample_db, new_accommodation):
+    wishlist, accommodation = sample_db["wishlist"], sample_db["accommodation"]
+    other_user = User.objects.create(username="other", phone_number="01033334444")
+    other = Wishlist.objects.create(user=other_user, name="other")
+
+    accommodation.wishlists.add(other)
+    assert_counters(other, accommodation)
+    assert accommodation.wishlist_count == 2
+
+    accommodation.wishlists.clear()
+    assert_counters(wishlist, accommodation)
+    assert_counters(other, accommodation)
+    assert accommodation.wishlist_count == 0
+
+    wishlist.accommodations.set([accommodation, new_accommodation])
+    wishlist.accommodations.clear()
+    assert_counters(wishlist, accommodation, new_accommodation)
+
+
+# Success 3: Deleting either side releases the counts held by the other
+@pytest.mark.django_db
+def test_counters_follow_deletes(sample_db, new_accommodation):
+    wishlist, accommodation = sample_db["wishlist"], sample_db["accommodation"]
+    wishlist.accommodations.add(new_accommodation)
+
+    new_accommodation.delete()
+    assert_counters(wishlist, accommodation)
+    assert wishlist.accommodation_count == 1
+
+    wishlist.delete()
+    accommodation.refresh_from_db()
+    assert accommodation.wishlist_count == 0
+
+
+# Success 4: Reconcile repairs drifted counters and leaves correct ones alone
+@pytest.mark.django_db
+def test_reconcile_wishlist_counters(sample_db, new_accommodation):
+    wishlist, accommodation = sample_db["wishlist"], sample_db["accommodation"]
+    Wishlist.objects.filter(pk=wishlist.pk).update(accommodation_count=7)
+    Accommodation.objects.filter(pk=accommodation.pk).update(wishlist_count=0)
+
+    out = StringIO()
+    call_command("reconcile_wishlist_counters", stdout=out)
+
+    assert "Fixed 1 accommodation and 1 wishlist counters" in out.getvalue()
+    assert_counters(wishlist, accommodation, new_accommodation)
+
+
+# Success 5: The cached accommodation detail follows the counter
+@pytest.mark.django_db
+def test_counters_refresh_cached_detail(client, sample_db, new_accommodation):
+    get_cache().clear()
+    detail_url = f"/api/v1/accommodations/{new_accommodation.pk}"
+    assert client.get(detail_url).data["wishlist_count"] == 0
+
+    sample_db["wishlist"].accommodations.add(new_accommodation)
+    assert client.get(detail_url).data["wishlist_count"] == 1
+
+    Accommodation.objects.filter(pk=new_accommodation.pk).update(wishlist_count=5)
+    client.get(detail_url)
+    call_command("reconcile_wishlist_counters", stdout=StringIO())
+    assert client.get(detail_url).data["wishlist_count"] == 1
@@ -1,3 +1,5 @@
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
@@ -5,33 +7,58 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from .models import Wishlist
-from .serializers import WishlistDetailSerializer
+from .serializers import WishlistBatchSerializer, WishlistDetailSerializer
 from accommodations.models import Accommodation
 
 
-def get_wishlist_or_404(pk, user):
+def wishlist_detail_queryset():
+    """Wishlists with everything WishlistDetailSerializer reads, loaded in a constant number of queries"""
+    return Wishlist.objects.select_related("user").prefetch_related(
+        Prefetch(
+            "accommodations",
+            queryset=Accommodation.objects.select_related("city").only(
+                "id", "name", "type", "location", "description", "wishlist_count", "city__name"
+            ),
+        )
+    )
+
+
+def get_wishlist_or_404(pk, user, queryset=None):
     """A function to retrieve a wishlist. Throws 404 error if a wishlist does not exist"""
+    queryset = Wishlist.objects.all() if queryset is None else queryset
     try:
-        wishlist = Wishlist.objects.get(pk=pk)
-        if user != wishlist.user:
+        wishlist = queryset.get(pk=pk)
+        # Compare ids so the owner does not have to be loaded
+        if user.pk != wishlist.user_id:
             raise PermissionDenied({"error": "You do not have a permission to access this wishlist"})
     except Wishlist.DoesNotExist:
         raise NotFound({"error": "Wishlist not found"})
     return wishlist
 
 
+def wants_delta(request):
+    """Clients pass ?delta=true to get only the change instead of the whole wishlist"""
+    return request.query_params.get("delta", "").lower() in ("1", "true")
+
+
+def current_count(wishlist):
+    """The counter is updated in the database by wishlists.signals, so reload it after a change"""
+    wishlist.refresh_from_db(fields=["accommodation_count"])
+    return wishlist.num_of_accommodations()
+
+
 class WishlistDetailView(APIView):
     """API view that allows an authenticated user to retrieve or delete or update(name only) their own wishlist"""
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        wishlist = get_wishlist_or_404(pk, request.user)
+        wishlist = get_wishlist_or_404(pk, request.user, wishlist_detail_queryset())
         serializer = WishlistDetailSerializer(wishlist)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request, pk):
-        wishlist = get_wishlist_or_404(pk, request.user)
+        wishlist = get_wishlist_or_404(pk, request.user, wishlist_detail_queryset())
         serializer = WishlistDetailSerializer(wishlist, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
@@ -60,28 +87,81 @@ class CreateWishlistView(APIView):
 
 
 class AddAccommodationToWishlistView(APIView):
-    """API view to add an accommodation to the specified wishlist if both exist and the user has permission"""
+    """
+    API view to add an accommodation to the specified wishlist if both exist and the user has permission.
+    With ?delta=true only the added id and the new size are returned.
+    """
 
     def post(self, request, pk, accommodation_pk):
         wishlist = get_wishlist_or_404(pk, request.user)
-        try:
-            accommodation = Accommodation.objects.get(pk=accommodation_pk)
-        except Accommodation.DoesNotExist:
+        if not Accommodation.objects.filter(pk=accommodation_pk).exists():
             raise NotFound({"error": "Accommodation not found"})
-        wishlist.accommodations.add(accommodation)
-        serializer = WishlistDetailSerializer(wishlist)
+        wishlist.accommodations.add(accommodation_pk)
+        if wants_delta(request):
+            return Response(
+                {"success": "Accommodation added", "added": accommodation_pk, "count": current_count(wishlist)},
+                status=status.HTTP_200_OK,
+            )
+        serializer = WishlistDetailSerializer(wishlist_detail_queryset().get(pk=wishlist.pk))
         return Response({"success": "Accommodation added", "wishlist": serializer.data}, status=status.HTTP_200_OK)
 
 
 class RemoveAccommodationFromWishlistView(APIView):
-    """API view to remove an accommodation to the specified wishlist if both exist and the user has permission"""
+    """
+    API view to remove an accommodation to the specified wishlist if both exist and the user has permission.
+    With ?delta=true only the removed id and the new size are returned.
+    """
 
     def delete(self, request, pk, accommodation_pk):
         wishlist = get_wishlist_or_404(pk, request.user)
-        try:
-            accommodation = Accommodation.objects.get(pk=accommodation_pk)
-        except Accommodation.DoesNotExist:
+        if not Accommodation.objects.filter(pk=accommodation_pk).exists():
             raise NotFound({"error": "Accommodation not found"})
-        wishlist.accommodations.remove(accommodation)
-        serializer = WishlistDetailSerializer(wishlist)
+        wishlist.accommodations.remove(accommodation_pk)
+        if wants_delta(request):
+            return Response(
+                {
+                    "success": "Accommodation removed",
+                    "removed": accommodation_pk,
+                    "count": current_count(wishlist),
+                },
+                status=status.HTTP_200_OK,
+            )
+        serializer = WishlistDetailSerializer(wishlist_detail_queryset().get(pk=wishlist.pk))
         return Response({"success": "Accommodation removed", "wishlist": serializer.data}, status=status.HTTP_200_OK)
+
+
+class BatchUpdateWishlistView(APIView):
+    """
+    API view to add and remove many accommodations of the specified wishlist in one request.
+    With ?delta=true only the changed ids and the new size are returned.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        wishlist = get_wishlist_or_404(pk, request.user)
+        serializer = WishlistBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        to_add = set(serializer.validated_data["add"])
+        to_remove = set(serializer.validated_data["remove"])
+
+        # Validate every id with a single query
+        found = set(Accommodation.objects.filter(id__in=to_add | to_remove).values_list("id", flat=True))
+        missing = sorted((to_add | to_remove) - found)
+        if missing:
+            return Response({"error": "Accommodation not found", "ids": missing}, status=status.HTTP_404_NOT_FOUND)
+
+        # One bulk insert and one bulk delete on the through table
+        with transaction.atomic():
+            if to_add:
+                wishlist.accommodations.add(*to_add)
+            if to_remove:
+                wishlist.accommodations.remove(*to_remove)
+
+        if wants_delta(request):
+            return Response(
+                {"added": sorted(to_add), "removed": sorted(to_remove), "count": current_count(wishlist)},
+                status=status.HTTP_200_OK,
+            )
+        serializer = WishlistDetailSerializer(wishlist_detail_queryset().get(pk=wishlist.pk))
+        return Response(serializer.data, status=status.HTTP_200_OK)